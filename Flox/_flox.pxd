@@ -13,3 +13,7 @@ cimport numpy as np
 # We'll use DTYPE_t everywhere.
 ctypedef np.float_t DTYPE_t
 
+# Solver state is stored either z-major, as (nz, nn) in memory, or mode-major, as (nn, nz).
+# Kernels always index [j,k], and use this to walk along whichever axis is contiguous.
+cdef inline bint mode_major(DTYPE_t[:,:] a) nogil:
+    return a.strides[0] < a.strides[1]
@@ -12,6 +12,13 @@ from __future__ import division
 cimport cython
 
 from Flox._flox cimport DTYPE_t
+from Flox.nonlinear.galerkin cimport CouplingTable
+
+# Time integration schemes for TimeSolver.
+cdef enum:
+    SCHEME_AB2
+    SCHEME_AB3
+    SCHEME_RK3
 
 cdef class Solver:
     
@@ -22,8 +29,11 @@ cdef class Solver:
     cdef DTYPE_t[:] V_m
     cdef DTYPE_t[:,:] _transform
     cdef bint transform_ready
+    cdef readonly bint mode_major
     
     cpdef int prepare(self, DTYPE_t dz)
+    cdef int _prepare(self, DTYPE_t dz) nogil
+    cdef int _relayout(self, object order) except -1
     
     cpdef int transform(self, int Kx, DTYPE_t[:,:] V_trans)
     
@@ -32,7 +42,23 @@ cdef class TimeSolver(Solver):
 
     cdef DTYPE_t[:,:] G_curr
     cdef DTYPE_t[:,:] G_prev
+    cdef DTYPE_t[:,:] G_prev2
+    cdef DTYPE_t[:,:] S_curr
+    cdef DTYPE_t[:,:] V_save
+    cdef DTYPE_t[:] _rowmax
     cdef DTYPE_t timestep
+    cdef DTYPE_t timestep_p
+    cdef public bint history
+    cdef public int scheme
     cdef bint ready
+    cdef public bint implicit
+    cdef public object galerkin
+    cdef CouplingTable table
 
-    cpdef int advance(self, DTYPE_t deltaT)
\ No newline at end of file
+    cpdef int advance(self, DTYPE_t deltaT)
+    cdef int _advance(self, DTYPE_t deltaT) nogil
+    cpdef int stage(self, int stage, DTYPE_t deltaT)
+    cdef int _stage(self, int stage, DTYPE_t deltaT) nogil
+    cdef DTYPE_t _error(self) nogil
+    cdef int _save(self) nogil
+    cdef int _retract(self) nogil
@@ -19,8 +19,9 @@ cimport numpy as np
 cimport cython
 from cython.parallel cimport prange
 from cpython.array cimport array, clone
+from libc.math cimport fabs
 
-from Flox._flox cimport DTYPE_t
+from Flox._flox cimport DTYPE_t, mode_major
 from Flox.finitedifference cimport first_derivative2D
 from Flox.component._transform import transform
 
@@ -35,8 +36,12 @@ cdef class Solver:
         self.V_p = np.zeros((nx,), dtype=np.float)
         self.V_m = np.zeros((nx,), dtype=np.float)
         self.transform_ready = False
+        self.mode_major = False
         
     cpdef int prepare(self, DTYPE_t dz):
+        return self._prepare(dz)
+    
+    cdef int _prepare(self, DTYPE_t dz) nogil:
         self.dVdz[...] = 0.0    
         return first_derivative2D(self.nz, self.nx, self.dVdz, self.V_curr, dz, self.V_p, self.V_m, 1.0)
     
@@ -44,13 +49,39 @@ cdef class Solver:
         
         return transform(self.nz, self.nx, Kx, V_trans, self.V_curr, self._transform)
     
+    cdef int _relayout(self, object order) except -1:
+        # Copy the (nz, nx) state arrays into the given memory order.
+        self.V_curr = np.asarray(self.V_curr).copy(order=order)
+        self.dVdz = np.asarray(self.dVdz).copy(order=order)
+        return 0
+    
+    property order:
+        
+        """Memory layout of the state arrays, 'C' for z-major (nz, nn) or 'F' for mode-major (nn, nz).
+        
+        Arrays always have the shape (nz, nn). In the mode-major layout, each mode is
+        contiguous in z, so the tridiagonal solve and z derivatives are unit-stride.
+        """
+        
+        def __get__(self):
+            if self.mode_major:
+                return "F"
+            else:
+                return "C"
+        
+        def __set__(self, value):
+            if value not in ("C", "F"):
+                raise ValueError("Unknown memory order '{}'".format(value))
+            self._relayout(value)
+            self.mode_major = (value == "F")
+    
     property Value:
         
         def __get__(self):
             return np.asanyarray(self.V_curr)
             
         def __set__(self, value):
-            self.V_curr = np.asanyarray(value).copy()
+            self.V_curr = np.asanyarray(value).copy(order=self.order)
     
     property Transform:
         
@@ -84,7 +115,11 @@ cpdef int advance_cdt(int J, int K, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] G_prev, DT
     
     cdef int j, k
     
-    for j in prange(J):
+    if mode_major(V_curr):
+        # Each element is independent, so sweep the transposed arrays along their contiguous rows.
+        return advance_cdt(K, J, V_curr.T, G_prev.T, G_curr.T, deltaT)
+    
+    for j in prange(J, schedule='static'):
         for k in range(K):
             V_curr[j,k] = V_curr[j,k] + deltaT / 2.0 * (3.0 * G_curr[j,k] - G_prev[j,k])
             G_prev[j,k] = G_curr[j,k]
@@ -96,16 +131,66 @@ cpdef int advance_vdt(int J, int K, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] G_prev, DT
     cdef int j, k
     cdef DTYPE_t c1, c2
     
+    if mode_major(V_curr):
+        return advance_vdt(K, J, V_curr.T, G_prev.T, G_curr.T, deltaT, deltaTp)
+    
     c1 = (1.0 + deltaT / (2.0 * deltaTp))
     c2 = (deltaT / (2.0 * deltaTp))
     
-    for j in prange(J):
+    for j in prange(J, schedule='static'):
         for k in range(K):
             V_curr[j,k] = V_curr[j,k] + deltaT * (c1 * G_curr[j, k] - c2 * G_prev[j, k])
             G_prev[j,k] = G_curr[j,k]
     
     return 0
     
+cpdef int advance_ab3(int J, int K, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] G_prev2, DTYPE_t[:,:] G_prev, DTYPE_t[:,:] G_curr, DTYPE_t deltaT, DTYPE_t deltaTp, DTYPE_t deltaTpp) nogil:
+    
+    cdef int j, k
+    cdef DTYPE_t c0, c1, c2
+    cdef DTYPE_t h = deltaT, a = deltaTp, b = deltaTpp
+    
+    if mode_major(V_curr):
+        return advance_ab3(K, J, V_curr.T, G_prev2.T, G_prev.T, G_curr.T, deltaT, deltaTp, deltaTpp)
+    
+    # The integrals of the Lagrange polynomials through the last three time derivatives,
+    # which are (23, -16, 5) * h / 12 for constant steps.
+    c0 = (h * h / 3.0 + (2.0 * a + b) * h / 2.0 + a * (a + b)) / (a * (a + b))
+    c1 = -(h * h / 3.0 + (a + b) * h / 2.0) / (a * b)
+    c2 = (h * h / 3.0 + a * h / 2.0) / (b * (a + b))
+    
+    for j in prange(J, schedule='static'):
+        for k in range(K):
+            V_curr[j,k] = V_curr[j,k] + deltaT * (c0 * G_curr[j,k] + c1 * G_prev[j,k] + c2 * G_prev2[j,k])
+            G_prev2[j,k] = G_prev[j,k]
+            G_prev[j,k] = G_curr[j,k]
+    
+    return 0
+    
+# Williamson's low-storage coefficients for Wray's third order Runge-Kutta scheme.
+cdef DTYPE_t[3] rk3_A = [0.0, -5.0 / 9.0, -153.0 / 128.0]
+cdef DTYPE_t[3] rk3_B = [1.0 / 3.0, 15.0 / 16.0, 8.0 / 15.0]
+DEF stages_rk3 = 3
+
+cpdef int advance_rk3(int J, int K, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] S_curr, DTYPE_t[:,:] G_curr, DTYPE_t deltaT, int stage) nogil:
+    
+    cdef int j, k
+    cdef DTYPE_t A = rk3_A[stage], B = rk3_B[stage]
+    
+    if mode_major(V_curr):
+        return advance_rk3(K, J, V_curr.T, S_curr.T, G_curr.T, deltaT, stage)
+    
+    for j in prange(J, schedule='static'):
+        for k in range(K):
+            S_curr[j,k] = A * S_curr[j,k] + deltaT * G_curr[j,k]
+            V_curr[j,k] = V_curr[j,k] + B * S_curr[j,k]
+    
+    return 0
+    
+# The time integration schemes, by name, and the number of evaluations of G in each step.
+schemes = {"ab2": SCHEME_AB2, "ab3": SCHEME_AB3, "rk3": SCHEME_RK3}
+stages = {SCHEME_AB2: 1, SCHEME_AB3: 1, SCHEME_RK3: stages_rk3}
+    
 cdef class TimeSolver(Solver):
     
     def __cinit__(self, int nz, int nx):
@@ -113,28 +198,108 @@ cdef class TimeSolver(Solver):
         self.nx = nx
         self.nz = nz
         self.ready = False
+        self.implicit = False
         self.timestep = 0.0
+        self.timestep_p = 0.0
+        self.history = False
+        self.scheme = SCHEME_AB2
         self.G_curr = np.zeros((nz, nx), dtype=np.float)
         self.G_prev = np.zeros((nz, nx), dtype=np.float)
+        self.G_prev2 = np.zeros((nz, nx), dtype=np.float)
+        self.S_curr = np.zeros((nz, nx), dtype=np.float)
+        self.V_save = np.zeros((nz, nx), dtype=np.float)
+        self._rowmax = np.zeros((nz,), dtype=np.float)
 
-    cpdef int prepare(self, DTYPE_t dz):
+    cdef int _relayout(self, object order) except -1:
+        Solver._relayout(self, order)
+        self.G_curr = np.asarray(self.G_curr).copy(order=order)
+        self.G_prev = np.asarray(self.G_prev).copy(order=order)
+        self.G_prev2 = np.asarray(self.G_prev2).copy(order=order)
+        self.S_curr = np.asarray(self.S_curr).copy(order=order)
+        self.V_save = np.asarray(self.V_save).copy(order=order)
+        return 0
+
+    cdef int _prepare(self, DTYPE_t dz) nogil:
         
         self.G_curr[...] = 0.0
         self.ready = True
-        return Solver.prepare(self, dz)
+        return Solver._prepare(self, dz)
         
     cpdef int advance(self, DTYPE_t deltaT):
+        return self._advance(deltaT)
+    
+    cdef int _advance(self, DTYPE_t deltaT) nogil:
         
         cdef int r
-        if self.timestep == 0.0:
-            r = advance_cdt(self.nz, self.nx, self.V_curr, self.G_prev, self.G_curr, deltaT)
-        elif deltaT == self.timestep:
-            r = advance_cdt(self.nz, self.nx, self.V_curr, self.G_prev, self.G_curr, deltaT)
+        if self.scheme == SCHEME_AB3 and self.timestep_p != 0.0:
+            r = advance_ab3(self.nz, self.nx, self.V_curr, self.G_prev2, self.G_prev, self.G_curr, deltaT, self.timestep, self.timestep_p)
         else:
-            r = advance_vdt(self.nz, self.nx, self.V_curr, self.G_prev, self.G_curr, deltaT, self.timestep)
-            self.timestep = deltaT
+            if self.history or self.scheme == SCHEME_AB3:
+                # Keep one more time derivative, for AB3 or the error estimate.
+                self.G_prev2[...] = self.G_prev
+            
+            # AB3 starts with AB2 steps.
+            if self.timestep == 0.0:
+                r = advance_cdt(self.nz, self.nx, self.V_curr, self.G_prev, self.G_curr, deltaT)
+            elif deltaT == self.timestep:
+                r = advance_cdt(self.nz, self.nx, self.V_curr, self.G_prev, self.G_curr, deltaT)
+            else:
+                r = advance_vdt(self.nz, self.nx, self.V_curr, self.G_prev, self.G_curr, deltaT, self.timestep)
+        self.timestep_p = self.timestep
+        self.timestep = deltaT
+        
+        self.ready = False
+        return 0
+        
+    cpdef int stage(self, int stage, DTYPE_t deltaT):
+        return self._stage(stage, deltaT)
         
+    cdef int _stage(self, int stage, DTYPE_t deltaT) nogil:
+        # One stage of a Runge-Kutta step. G_prev keeps the last stage's time derivative.
+        cdef int r
+        r = advance_rk3(self.nz, self.nx, self.V_curr, self.S_curr, self.G_curr, deltaT, stage)
+        if stage == stages_rk3 - 1:
+            self.G_prev[...] = self.G_curr
+            self.timestep_p = self.timestep
+            self.timestep = deltaT
         self.ready = False
+        return r
+        
+    cdef DTYPE_t _error(self) nogil:
+        # The local error of the last Adams-Bashforth step, relative to 1 + |V|. G_curr is
+        # the time derivative at the end of that step, so the step is compared against a
+        # trapezoidal corrector, and the difference is scaled to the predictor's share.
+        # Returns 0.0 until the last step was taken with two time derivatives.
+        cdef int j, k
+        cdef DTYPE_t h = self.timestep, h_p = self.timestep_p
+        cdef DTYPE_t c, e, result = 0.0
+        if not self.history or h == 0.0 or h_p == 0.0:
+            return 0.0
+        c = h / 2.0 * (2.0 * h + 3.0 * h_p) / (3.0 * (h + h_p))
+        for j in prange(self.nz, schedule='static'):
+            self._rowmax[j] = 0.0
+            for k in range(self.nx):
+                e = (self.G_curr[j,k] - self.G_prev[j,k]) - h / h_p * (self.G_prev[j,k] - self.G_prev2[j,k])
+                e = c * fabs(e) / (1.0 + fabs(self.V_curr[j,k]))
+                if e > self._rowmax[j]:
+                    self._rowmax[j] = e
+        for j in range(self.nz):
+            if self._rowmax[j] > result:
+                result = self._rowmax[j]
+        return result
+        
+    cdef int _save(self) nogil:
+        # Keep the values from before a step, so that the step can be retracted.
+        self.V_save[...] = self.V_curr
+        return 0
+        
+    cdef int _retract(self) nogil:
+        # Undo the last Adams-Bashforth step, leaving G_curr as the time derivative it used.
+        self.V_curr[...] = self.V_save
+        self.G_curr[...] = self.G_prev
+        self.G_prev[...] = self.G_prev2
+        self.timestep = self.timestep_p
+        self.timestep_p = 0.0
         return 0
         
     property dValuedt:
@@ -143,5 +308,5 @@ cdef class TimeSolver(Solver):
             return np.asanyarray(self.G_prev)
 
         def __set__(self, value):
-            self.G_prev = np.asanyarray(value)
+            self.G_prev = np.asanyarray(value, order=self.order)
         
@@ -10,4 +10,9 @@
 from Flox._flox cimport DTYPE_t
 
 cpdef int transform(int J, int K, int Kx, DTYPE_t[:,:] V_trans, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] _transform) nogil
-
+cdef int transform_row(int j, int K, int Kx, DTYPE_t[:,:] V_trans, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] _transform) nogil
+cpdef int transform_frames(int J, int K, int Kx, int Nt, DTYPE_t[:,:,:] V_trans, DTYPE_t[:,:,:] V_curr, DTYPE_t[:,:] _transform) nogil
+cdef int transform_frame_row(int j, int K, int Kx, int Nt, DTYPE_t[:,:,:] V_trans, DTYPE_t[:,:,:] V_curr, DTYPE_t[:,:] _transform) nogil
+cpdef DTYPE_t transform_magnitude(int J, int K, int Kx, DTYPE_t[:,:] M, DTYPE_t[:,:] X, DTYPE_t[:,:] X_curr, DTYPE_t[:,:] X_transform, DTYPE_t[:,:] Z, DTYPE_t[:,:] Z_curr, DTYPE_t[:,:] Z_transform, DTYPE_t fx, DTYPE_t z0, DTYPE_t[:] rowmax) nogil
+cdef DTYPE_t magnitude_row(int j, int Kx, DTYPE_t[:,:] M, DTYPE_t[:,:] X, DTYPE_t[:,:] Z, DTYPE_t fx, DTYPE_t z0) nogil
+cpdef DTYPE_t transform_magnitude_bound(int J, int K, DTYPE_t[:,:] X_curr, DTYPE_t[:] X_amplitude, DTYPE_t[:,:] Z_curr, DTYPE_t[:] Z_amplitude, DTYPE_t fx, DTYPE_t z0, DTYPE_t[:] rowmax) nogil
@@ -19,14 +19,91 @@ cimport numpy as np
 cimport cython
 from cpython.array cimport array, clone
 from cython.parallel cimport prange
+from libc.math cimport fabs
 
 from Flox._flox cimport DTYPE_t
 
 cpdef int transform(int J, int K, int Kx, DTYPE_t[:,:] V_trans, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] _transform) nogil:
+    """Add the matrix product V_curr . _transform to V_trans, computing rows in parallel."""
+    cdef int j
+    for j in prange(J, schedule='static'):
+        transform_row(j, K, Kx, V_trans, V_curr, _transform)
+    return 0
     
-    cdef int j, k, x
+cdef int transform_row(int j, int K, int Kx, DTYPE_t[:,:] V_trans, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] _transform) nogil:
+    
+    cdef int k, x
+    cdef DTYPE_t v
+    for k in range(K):
+        v = V_curr[j,k]
+        for x in range(Kx):
+            V_trans[j,x] += _transform[k,x] * v
+    return 0
+    
+cpdef int transform_frames(int J, int K, int Kx, int Nt, DTYPE_t[:,:,:] V_trans, DTYPE_t[:,:,:] V_curr, DTYPE_t[:,:] _transform) nogil:
+    """Add the transform of a stack of frames, (J, K, Nt), to V_trans, (J, Kx, Nt)."""
+    cdef int j
+    for j in prange(J, schedule='static'):
+        transform_frame_row(j, K, Kx, Nt, V_trans, V_curr, _transform)
+    return 0
+    
+cdef int transform_frame_row(int j, int K, int Kx, int Nt, DTYPE_t[:,:,:] V_trans, DTYPE_t[:,:,:] V_curr, DTYPE_t[:,:] _transform) nogil:
+    
+    cdef int k, x, t
+    cdef DTYPE_t c
+    for k in range(K):
+        for x in range(Kx):
+            c = _transform[k,x]
+            for t in range(Nt):
+                V_trans[j,x,t] += c * V_curr[j,k,t]
+    return 0
+    
+cpdef DTYPE_t transform_magnitude(int J, int K, int Kx, DTYPE_t[:,:] M, DTYPE_t[:,:] X, DTYPE_t[:,:] X_curr, DTYPE_t[:,:] X_transform, DTYPE_t[:,:] Z, DTYPE_t[:,:] Z_curr, DTYPE_t[:,:] Z_transform, DTYPE_t fx, DTYPE_t z0, DTYPE_t[:] rowmax) nogil:
+    """Transform two components into X and Z, set M = fx X^2 + (z0 + Z)^2, and return the maximum of M.
+    
+    Rows are computed in parallel, each with its own maximum in rowmax, which are combined at the end.
+    """
+    cdef int j, x
+    cdef DTYPE_t result = 0.0
+    for j in prange(J, schedule='static'):
+        for x in range(Kx):
+            X[j,x] = 0.0
+            Z[j,x] = 0.0
+        transform_row(j, K, Kx, X, X_curr, X_transform)
+        transform_row(j, K, Kx, Z, Z_curr, Z_transform)
+        rowmax[j] = magnitude_row(j, Kx, M, X, Z, fx, z0)
     for j in range(J):
+        if rowmax[j] > result:
+            result = rowmax[j]
+    return result
+    
+cdef DTYPE_t magnitude_row(int j, int Kx, DTYPE_t[:,:] M, DTYPE_t[:,:] X, DTYPE_t[:,:] Z, DTYPE_t fx, DTYPE_t z0) nogil:
+    
+    cdef int x
+    cdef DTYPE_t m, result = 0.0
+    for x in range(Kx):
+        m = fx * X[j,x] * X[j,x] + (z0 + Z[j,x]) * (z0 + Z[j,x])
+        M[j,x] = m
+        if m > result:
+            result = m
+    return result
+    
+cpdef DTYPE_t transform_magnitude_bound(int J, int K, DTYPE_t[:,:] X_curr, DTYPE_t[:] X_amplitude, DTYPE_t[:,:] Z_curr, DTYPE_t[:] Z_amplitude, DTYPE_t fx, DTYPE_t z0, DTYPE_t[:] rowmax) nogil:
+    """An upper bound on the maximum of transform_magnitude, from the modes alone.
+    
+    The amplitudes are the largest absolute value in each row of the transforms, so
+    that |X| <= sum(|X_k| X_amplitude[k]) everywhere in a row, and likewise for Z.
+    """
+    cdef int j, k
+    cdef DTYPE_t xb, zb, result = 0.0
+    for j in prange(J, schedule='static'):
+        xb = 0.0
+        zb = 0.0
         for k in range(K):
-            for x in range(Kx):
-                V_trans[j,x] += _transform[k,x] * V_curr[j,k]
-    return 0
\ No newline at end of file
+            xb = xb + fabs(X_curr[j,k]) * X_amplitude[k]
+            zb = zb + fabs(Z_curr[j,k]) * Z_amplitude[k]
+        rowmax[j] = fx * xb * xb + (fabs(z0) + zb) * (fabs(z0) + zb)
+    for j in range(J):
+        if rowmax[j] > result:
+            result = rowmax[j]
+    return result
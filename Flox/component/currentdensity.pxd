@@ -11,4 +11,5 @@ from Flox._flox cimport DTYPE_t
 from Flox.component._solve cimport Solver
 
 cdef class CurrentDensitySolver(Solver):
-    cpdef int compute_base(self, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdzz, DTYPE_t[:] npa)
\ No newline at end of file
+    cpdef int compute_base(self, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdzz, DTYPE_t[:] npa)
+    cdef int _compute_base(self, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdzz, DTYPE_t[:] npa) nogil
@@ -24,17 +24,18 @@ from Flox.component._solve cimport Solver
 cpdef int currentdensity(int J, int K, DTYPE_t[:,:] J_curr, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdzz, DTYPE_t[:] npa) nogil:
     
     cdef int j, k
-    cdef DTYPE_t npa_s
     
-    for k in prange(K):
-        npa_s = npa[k] * npa[k]
-        for j in range(J):
-            J_curr[j, k] = -1.0 * ( dAdzz[j, k] - npa_s * A_curr[j, k])
+    for j in prange(J, schedule='static'):
+        for k in range(K):
+            J_curr[j, k] = -1.0 * ( dAdzz[j, k] - (npa[k] * npa[k]) * A_curr[j, k])
     
     return 0
 
 cdef class CurrentDensitySolver(Solver):
     
     cpdef int compute_base(self, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdzz, DTYPE_t[:] npa):
+        return self._compute_base(A_curr, dAdzz, npa)
+    
+    cdef int _compute_base(self, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdzz, DTYPE_t[:] npa) nogil:
         
         return currentdensity(self.nz, self.nx, self.V_curr, A_curr, dAdzz, npa)
\ No newline at end of file
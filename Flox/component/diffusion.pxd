@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+#
+#  diffusion.pxd
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-14.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from Flox._flox cimport DTYPE_t
+from Flox.component._solve cimport TimeSolver
+from Flox.tridiagonal._tridiagonal cimport TridiagonalSolver
+
+cpdef int diffusion_explicit(int J, int K, DTYPE_t[:,:] rhs, DTYPE_t[:,:] V_curr, DTYPE_t[:] npa, DTYPE_t factor) nogil
+
+cpdef int diffusion_boundaries(int J, int K, DTYPE_t[:,:] rhs, DTYPE_t[:] f_p, DTYPE_t[:] f_m, DTYPE_t dz, DTYPE_t factor) nogil
+
+cpdef int diffusion_accumulate(int J, int K, DTYPE_t[:,:] rhs, DTYPE_t[:,:] V_curr) nogil
+
+cdef class DiffusionSolver(TridiagonalSolver):
+    cdef DTYPE_t dz
+    cdef DTYPE_t[:] npa
+    cdef bint neumann
+    cdef readonly DTYPE_t deltaT
+    cdef readonly DTYPE_t diffusivity
+    cdef DTYPE_t[:,:] rhs
+
+    cdef int factor(self, DTYPE_t deltaT, DTYPE_t diffusivity)
+    cpdef int setup(self, DTYPE_t dz, DTYPE_t[:] npa, bint neumann)
+    cpdef int advance(self, TimeSolver solver, DTYPE_t deltaT, DTYPE_t diffusivity)
+    cdef int _advance(self, TimeSolver solver, DTYPE_t deltaT, DTYPE_t diffusivity) nogil
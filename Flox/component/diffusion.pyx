@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+#  diffusion.pyx
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-14.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+#cython: overflowcheck=False
+#cython: wraparound=False
+#cython: boundscheck=False
+#cython: cdivision=True
+from __future__ import division
+
+import numpy as np
+cimport numpy as np
+cimport cython
+from cython.parallel cimport prange
+
+from Flox._flox cimport DTYPE_t
+from Flox.finitedifference cimport second_derivative2D
+from Flox.component._solve cimport TimeSolver
+from Flox.component.vectorpotential cimport vectorpotential_dzz
+from Flox.tridiagonal._tridiagonal cimport TridiagonalSolver
+
+# The Crank-Nicolson implicitness.
+cdef DTYPE_t theta = 0.5
+
+cpdef int diffusion_explicit(int J, int K, DTYPE_t[:,:] rhs, DTYPE_t[:,:] V_curr, DTYPE_t[:] npa, DTYPE_t factor) nogil:
+
+    cdef int j, k
+
+    for j in prange(J, schedule='static'):
+        for k in range(K):
+            rhs[j,k] += -factor * (npa[k] * npa[k]) * V_curr[j,k]
+
+    return 0
+
+cpdef int diffusion_boundaries(int J, int K, DTYPE_t[:,:] rhs, DTYPE_t[:] f_p, DTYPE_t[:] f_m, DTYPE_t dz, DTYPE_t factor) nogil:
+
+    cdef int k
+
+    for k in range(K):
+        rhs[0,k] += factor * f_m[k] / (dz * dz)
+        rhs[J-1,k] += factor * f_p[k] / (dz * dz)
+
+    return 0
+
+cpdef int diffusion_accumulate(int J, int K, DTYPE_t[:,:] rhs, DTYPE_t[:,:] V_curr) nogil:
+
+    cdef int j, k
+
+    for j in prange(J, schedule='static'):
+        for k in range(K):
+            rhs[j,k] += V_curr[j,k]
+
+    return 0
+
+cdef class DiffusionSolver(TridiagonalSolver):
+    """Crank-Nicolson solver for the diffusion terms of a TimeSolver."""
+
+    def __cinit__(self, int nz, int nx):
+        self.rhs = np.zeros((nz, nx), dtype=np.float)
+        self.deltaT = 0.0
+        self.diffusivity = 0.0
+
+    cdef int _relayout(self, object order) except -1:
+        TridiagonalSolver._relayout(self, order)
+        self.rhs = np.asarray(self.rhs).copy(order=order)
+        return 0
+
+    cpdef int setup(self, DTYPE_t dz, DTYPE_t[:] npa, bint neumann):
+
+        self.dz = dz
+        self.npa = npa
+        self.neumann = neumann
+        self.warmed = False
+        return 0
+
+    cdef int factor(self, DTYPE_t deltaT, DTYPE_t diffusivity):
+
+        cdef int j, k
+        cdef DTYPE_t c = theta * deltaT * diffusivity / (self.dz * self.dz)
+        cdef DTYPE_t d = theta * deltaT * diffusivity
+
+        # With an adaptive timestep this is refactored on most steps.
+        with nogil:
+            for j in prange(1, self.J-1, schedule='static'):
+                for k in range(self.K):
+                    self.sub[j,k] = -c
+                    self.sup[j,k] = -c
+                    self.dia[j,k] = 1.0 + 2.0 * c + d * self.npa[k] * self.npa[k]
+
+        for k in range(self.K):
+            self.sub[0,k] = 0.0
+            self.sup[0,k] = 0.0
+            self.dia[0,k] = 1.0
+            self.sub[self.J-1,k] = 0.0
+            self.sup[self.J-1,k] = 0.0
+            self.dia[self.J-1,k] = 1.0
+
+            if self.neumann:
+                # The first derivative vanishes, so the ghost points mirror the interior.
+                self.sub[1,k] = 0.0
+                self.sup[1,k] = -2.0 * c
+                self.sub[self.J-2,k] = -2.0 * c
+                self.sup[self.J-2,k] = 0.0
+
+        self.deltaT = deltaT
+        self.diffusivity = diffusivity
+        return self._warm_work()
+
+    cpdef int advance(self, TimeSolver solver, DTYPE_t deltaT, DTYPE_t diffusivity):
+        return self._advance(solver, deltaT, diffusivity)
+
+    cdef int _advance(self, TimeSolver solver, DTYPE_t deltaT, DTYPE_t diffusivity) nogil:
+
+        cdef int r = 0
+        cdef DTYPE_t f = (1.0 - theta) * deltaT * diffusivity
+
+        if not self.warmed or deltaT != self.deltaT or diffusivity != self.diffusivity:
+            with gil:
+                r += self.factor(deltaT, diffusivity)
+
+        # The explicit half of the diffusion, at the current time.
+        self.rhs[...] = 0.0
+        if self.neumann:
+            r += vectorpotential_dzz(self.nz, self.nx, self.rhs, solver.V_curr, self.dz, f)
+        else:
+            r += second_derivative2D(self.nz, self.nx, self.rhs, solver.V_curr, self.dz, solver.V_p, solver.V_m, f)
+            # The boundary values are fixed, so they carry the implicit half too.
+            r += diffusion_boundaries(self.nz, self.nx, self.rhs, solver.V_p, solver.V_m, self.dz, theta * deltaT * diffusivity)
+        r += diffusion_explicit(self.nz, self.nx, self.rhs, solver.V_curr, self.npa, f)
+
+        # Adams-Bashforth for everything else.
+        r += solver._advance(deltaT)
+        r += diffusion_accumulate(self.nz, self.nx, self.rhs, solver.V_curr)
+
+        # The implicit half of the diffusion.
+        r += self._solve(self.rhs, solver.V_curr)
+        return r
@@ -15,8 +15,13 @@ cdef class StreamSolver(TridiagonalSolver):
     cdef DTYPE_t[:,:] Vz
     cdef DTYPE_t[:,:] Vx_transform
     cdef DTYPE_t[:,:] Vz_transform
-    cdef DTYPE_t[:,:] Velocity
-    cdef DTYPE_t maxV
+    cdef readonly DTYPE_t[:,:] Velocity
+    cdef DTYPE_t[:] Vx_amplitude
+    cdef DTYPE_t[:] Vz_amplitude
+    cdef DTYPE_t[:] _rowmax
+    cdef readonly DTYPE_t maxV
+    cdef public bint bound
     cpdef int setup(self, DTYPE_t dz, DTYPE_t[:] npa)
     cpdef int setup_transform(self, DTYPE_t[:] npa)
-    cpdef int compute_velocity(self)
\ No newline at end of file
+    cpdef int compute_velocity(self)
+    cdef int _compute_velocity(self) nogil
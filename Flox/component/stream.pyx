@@ -20,7 +20,7 @@ from cython.parallel cimport prange
 
 from Flox._flox cimport DTYPE_t
 from Flox.tridiagonal._tridiagonal cimport TridiagonalSolver
-from Flox.component._transform cimport transform
+from Flox.component._transform cimport transform_magnitude, transform_magnitude_bound
 from Flox.transform import setup_transform
 
 cdef class StreamSolver(TridiagonalSolver):
@@ -29,6 +29,15 @@ cdef class StreamSolver(TridiagonalSolver):
         self.Velocity = np.zeros((nz, nx), dtype=np.float)
         self.Vx = np.zeros((nz, nx), dtype=np.float)
         self.Vz = np.zeros((nz, nx), dtype=np.float)
+        self._rowmax = np.zeros((nz,), dtype=np.float)
+        self.bound = False
+    
+    cdef int _relayout(self, object order) except -1:
+        TridiagonalSolver._relayout(self, order)
+        self.Velocity = np.asarray(self.Velocity).copy(order=order)
+        self.Vx = np.asarray(self.Vx).copy(order=order)
+        self.Vz = np.asarray(self.Vz).copy(order=order)
+        return 0
     
     cpdef int setup_transform(self, DTYPE_t[:] npa):
         
@@ -38,25 +47,21 @@ cdef class StreamSolver(TridiagonalSolver):
             for kp in range(self.nx):
                 self.Vx_transform[k,kp] *= -1.0
                 self.Vz_transform[k,kp] *= npa[k]
+        self.Vx_amplitude = np.abs(self.Vx_transform).max(axis=1)
+        self.Vz_amplitude = np.abs(self.Vz_transform).max(axis=1)
         self.transform_ready = True
     
     cpdef int compute_velocity(self):
-        # Compute and update the internal variable handling the maximum fluid velocity.
-        cdef int r, j, k
-        cdef DTYPE_t Vz, Vx
-        self.Vx[...] = 0.0
-        self.Vz[...] = 0.0
-        self.maxV = 0.0
-        r = transform(self.nz, self.nx, self.nx, self.Vx, self.dVdz, self.Vx_transform)
-        r += transform(self.nz, self.nx, self.nx, self.Vz, self.V_curr, self.Vz_transform)
-        for j in range(self.nz):
-            for k in range(self.nx):
-                Vz = (self.Vz[j,k])*(self.Vz[j,k])
-                Vx = (self.Vx[j,k])*(self.Vx[j,k])
-                self.Velocity[j,k] = Vx + Vz
-                if Vz > self.maxV:
-                    self.maxV = Vz
-        return r
+        return self._compute_velocity()
+    
+    cdef int _compute_velocity(self) nogil:
+        # Compute and update the internal variable handling the maximum fluid velocity, |V|^2.
+        if self.bound:
+            # A cheap upper bound from the modes, which leaves Vx, Vz and Velocity alone.
+            self.maxV = transform_magnitude_bound(self.nz, self.nx, self.dVdz, self.Vx_amplitude, self.V_curr, self.Vz_amplitude, 1.0, 0.0, self._rowmax)
+        else:
+            self.maxV = transform_magnitude(self.nz, self.nx, self.nx, self.Velocity, self.Vx, self.dVdz, self.Vx_transform, self.Vz, self.V_curr, self.Vz_transform, 1.0, 0.0, self._rowmax)
+        return 0
     
     cpdef int setup(self, DTYPE_t dz, DTYPE_t[:] npa):
         
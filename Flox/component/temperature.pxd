@@ -25,3 +25,7 @@ cdef class TemperatureSolver(TimeSolver):
     cpdef int compute_linear(self, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t[:,:] P_curr)
     cpdef int compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a, DTYPE_t[:] npa)
     cpdef int compute_forcing(self)
+    cdef int _compute_base(self, DTYPE_t dz, DTYPE_t[:] npa) nogil
+    cdef int _compute_linear(self, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t[:,:] P_curr) nogil
+    cdef int _compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a, DTYPE_t[:] npa) nogil
+    cdef int _compute_forcing(self) nogil
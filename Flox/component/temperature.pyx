@@ -26,12 +26,10 @@ from Flox.nonlinear.galerkin cimport galerkin_cos_grad_sin
 cpdef int temperature(int J, int K, DTYPE_t[:,:] d_T, DTYPE_t[:,:] T_curr, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t[:] f_p, DTYPE_t[:] f_m) nogil:
     
     cdef int j, k
-    cdef DTYPE_t npa_s
     # The last term in equation (2.10)
-    for k in prange(K):
-        npa_s = npa[k] * npa[k]
-        for j in range(J):
-            d_T[j,k] +=  -T_curr[j,k] * npa_s
+    for j in prange(J, schedule='static'):
+        for k in range(K):
+            d_T[j,k] +=  -T_curr[j,k] * (npa[k] * npa[k])
     
     # The second last term in equation (2.10)
     r1 = second_derivative2D(J, K, d_T, T_curr, dz, f_p, f_m, 1.0)
@@ -41,12 +39,10 @@ cpdef int temperature(int J, int K, DTYPE_t[:,:] d_T, DTYPE_t[:,:] T_curr, DTYPE
 cpdef int temperature_linear(int J, int K, DTYPE_t[:,:] d_T, DTYPE_t[:,:] P_curr, DTYPE_t[:] npa) nogil:
     
     cdef int j, k
-    cdef DTYPE_t npa_i
     
-    for k in prange(K):
-        npa_i = npa[k]
-        for j in range(J):
-            d_T[j, k] += npa_i * P_curr[j,k]
+    for j in prange(J, schedule='static'):
+        for k in range(K):
+            d_T[j, k] += npa[k] * P_curr[j,k]
     
     return 0
     
@@ -64,18 +60,38 @@ cdef class TemperatureSolver(TimeSolver):
         self.T_s = np.zeros((nz,), dtype=np.float)
     
     cpdef int compute_base(self, DTYPE_t dz, DTYPE_t[:] npa):
+        return self._compute_base(dz, npa)
+    
+    cdef int _compute_base(self, DTYPE_t dz, DTYPE_t[:] npa) nogil:
         
+        if self.implicit:
+            # The diffusion terms are handled by a DiffusionSolver.
+            return 0
         return temperature(self.nz, self.nx, self.G_curr, self.V_curr, dz, npa, self.V_p, self.V_m)
         
     cpdef int compute_linear(self, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t[:,:] P_curr):
+        return self._compute_linear(dz, npa, P_curr)
+    
+    cdef int _compute_linear(self, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t[:,:] P_curr) nogil:
         
         return temperature_linear(self.nz, self.nx, self.G_curr, P_curr, npa)
         
     cpdef int compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a, DTYPE_t[:] npa):
+        return self._compute_nonlinear(P_curr, dPdz, a, npa)
+    
+    cdef int _compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a, DTYPE_t[:] npa) nogil:
     
         # Now we do the non-linear terms from equation 4.6
+        if self.galerkin is not None:
+            with gil:
+                return self.galerkin.cos_grad_sin(self.G_curr, self.V_curr, self.dVdz, P_curr, dPdz, 1.0)
+        if self.table is not None:
+            return self.table.cos_grad_sin(self.nz, self.G_curr, self.V_curr, self.dVdz, P_curr, dPdz, a, 1.0)
         return galerkin_cos_grad_sin(self.nz, self.nx, self.G_curr, self.V_curr, self.dVdz, P_curr, dPdz, a, npa, 1.0)
     
     cpdef int compute_forcing(self):
+        return self._compute_forcing()
+    
+    cdef int _compute_forcing(self) nogil:
         return temperature_forcing(self.nz, self.nx, self.G_curr, self.V_curr, self.T_s, self.tau, self.fzmi, self.fzpi)
 
@@ -23,10 +23,17 @@ cdef class VectorPotentialSolver(TimeSolver):
     cdef DTYPE_t[:,:] Bz
     cdef DTYPE_t[:,:] Bx_transform
     cdef DTYPE_t[:,:] Bz_transform
+    cdef DTYPE_t[:] Bx_amplitude
+    cdef DTYPE_t[:] Bz_amplitude
     cdef DTYPE_t maxAlfven
+    cdef public bint bound
     
     cpdef int setup_transform(self, DTYPE_t[:] npa)
     cpdef int compute_alfven(self, DTYPE_t Q, DTYPE_t q, DTYPE_t Pr)
     cpdef int compute_base(self, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t q)
     cpdef int compute_linear(self, DTYPE_t[:,:] dPdz)
-    cpdef int compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a, DTYPE_t dz)
\ No newline at end of file
+    cpdef int compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a, DTYPE_t dz)
+    cdef int _compute_alfven(self, DTYPE_t Q, DTYPE_t q, DTYPE_t Pr) nogil
+    cdef int _compute_base(self, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t q) nogil
+    cdef int _compute_linear(self, DTYPE_t[:,:] dPdz) nogil
+    cdef int _compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a, DTYPE_t dz) nogil
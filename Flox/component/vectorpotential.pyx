@@ -23,19 +23,17 @@ from Flox._flox cimport DTYPE_t
 from Flox.finitedifference cimport second_derivative2D_nb
 from Flox.component._solve cimport TimeSolver
 from Flox.nonlinear.galerkin cimport galerkin_cos_grad_cos
-from Flox.component._transform cimport transform
+from Flox.component._transform cimport transform_magnitude, transform_magnitude_bound
 from Flox.transform import setup_transform
 
 cpdef int vectorpotential(int J, int K, DTYPE_t[:,:] d_A, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdzz, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t q) nogil:
     
     cdef int j, k, r
-    cdef DTYPE_t npa_s
     # The last term in equation (11.25)
     # This resets the values in d_A
-    for k in prange(K):
-        npa_s = npa[k] * npa[k]
-        for j in range(J):
-            d_A[j,k] += (dAdzz[j, k] - A_curr[j,k] * npa_s) / q
+    for j in prange(J, schedule='static'):
+        for k in range(K):
+            d_A[j,k] += (dAdzz[j, k] - A_curr[j,k] * (npa[k] * npa[k])) / q
         
     return 0
 
@@ -43,8 +41,8 @@ cpdef int vectorpotential_linear(int J, int K, DTYPE_t[:,:] d_A, DTYPE_t[:,:] dP
     
     cdef int j, k
     
-    for k in prange(K):
-        for j in range(J):
+    for j in prange(J, schedule='static'):
+        for k in range(K):
             d_A[j, k] += dPdz[j, k]
     
     return 0
@@ -88,12 +86,21 @@ cdef class VectorPotentialSolver(TimeSolver):
         self.Alfven = np.zeros((nz, nx), dtype=np.float)
         self.Bx = np.zeros((nz, nx), dtype=np.float)
         self.Bz = np.zeros((nz, nx), dtype=np.float)
+        self.bound = False
+    
+    cdef int _relayout(self, object order) except -1:
+        TimeSolver._relayout(self, order)
+        self.dVdzz = np.asarray(self.dVdzz).copy(order=order)
+        self.Alfven = np.asarray(self.Alfven).copy(order=order)
+        self.Bx = np.asarray(self.Bx).copy(order=order)
+        self.Bz = np.asarray(self.Bz).copy(order=order)
+        return 0
     
-    cpdef int prepare(self, DTYPE_t dz):
+    cdef int _prepare(self, DTYPE_t dz) nogil:
         # Compute the first and second z derivatives of the vector potential here.
         cdef int r
         self.dVdzz[...] = 0.0
-        r = TimeSolver.prepare(self, dz)
+        r = TimeSolver._prepare(self, dz)
         r += vectorpotential_dzz(self.nz, self.nx, self.dVdzz, self.V_curr, dz, 1.0)
         r += vectorpotential_dz(self.nz, self.nx, self.dVdz)
         return r
@@ -106,34 +113,45 @@ cdef class VectorPotentialSolver(TimeSolver):
         for k in range(self.nx):
             for kp in range(self.nx):
                 self.Bz_transform[k,kp] *= npa[k]
+        self.Bx_amplitude = np.abs(self.Bx_transform).max(axis=1)
+        self.Bz_amplitude = np.abs(self.Bz_transform).max(axis=1)
         self.transform_ready = True
         return 0
     
     cpdef int compute_alfven(self, DTYPE_t Q, DTYPE_t q, DTYPE_t Pr):
+        return self._compute_alfven(Q, q, Pr)
+    
+    cdef int _compute_alfven(self, DTYPE_t Q, DTYPE_t q, DTYPE_t Pr) nogil:
         # Compute and update the internal variable handling the alfven velocity.
-        cdef int r, j, k
         cdef DTYPE_t f = (Q * Pr)/q
-        self.Bx[...] = 0.0
-        self.Bz[...] = 0.0
-        self.maxAlfven = 0.0
-        r = transform(self.nz, self.nx, self.nx, self.Bx, self.dVdz, self.Bx_transform)
-        r += transform(self.nz, self.nx, self.nx, self.Bz, self.V_curr, self.Bz_transform)
-        for j in range(self.nz):
-            for k in range(self.nx):
-                self.Alfven[j,k] = f * (self.Bx[j,k])*(self.Bx[j,k]) + (1.0 + self.Bz[j,k])*(1.0 + self.Bz[j,k])
-                if self.Alfven[j,k] > self.maxAlfven:
-                    self.maxAlfven = self.Alfven[j,k]
-        return r
+        if self.bound:
+            # A cheap upper bound from the modes, which leaves Bx, Bz and Alfven alone.
+            self.maxAlfven = transform_magnitude_bound(self.nz, self.nx, self.dVdz, self.Bx_amplitude, self.V_curr, self.Bz_amplitude, f, 1.0, self._rowmax)
+        else:
+            self.maxAlfven = transform_magnitude(self.nz, self.nx, self.nx, self.Alfven, self.Bx, self.dVdz, self.Bx_transform, self.Bz, self.V_curr, self.Bz_transform, f, 1.0, self._rowmax)
+        return 0
     
     cpdef int compute_base(self, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t q):
+        return self._compute_base(dz, npa, q)
     
+    cdef int _compute_base(self, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t q) nogil:
+        
+        if self.implicit:
+            # The diffusion terms are handled by a DiffusionSolver.
+            return 0
         return vectorpotential(self.nz, self.nx, self.G_curr, self.V_curr, self.dVdzz, dz, npa, q)
     
     cpdef int compute_linear(self, DTYPE_t[:,:] dPdz):
+        return self._compute_linear(dPdz)
+    
+    cdef int _compute_linear(self, DTYPE_t[:,:] dPdz) nogil:
     
         return vectorpotential_linear(self.nz, self.nx, self.G_curr, dPdz)
     
     cpdef int compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a, DTYPE_t dz):
+        return self._compute_nonlinear(P_curr, dPdz, a, dz)
+    
+    cdef int _compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a, DTYPE_t dz) nogil:
         
         cdef int k,j
         # First we tweak the advection on the boundaries.
@@ -144,5 +162,10 @@ cdef class VectorPotentialSolver(TimeSolver):
             dPdz[ j, k ] = - P_curr[j - 1, k] / dz
         
         # Now we do the non-linear terms from equation 11.25
+        if self.galerkin is not None:
+            with gil:
+                return self.galerkin.cos_grad_cos(self.G_curr, self.V_curr, self.dVdz, P_curr, dPdz, 1.0)
+        if self.table is not None:
+            return self.table.cos_grad_cos(self.nz, self.G_curr, self.V_curr, self.dVdz, P_curr, dPdz, a, 1.0)
         return galerkin_cos_grad_cos(self.nz, self.nx, self.G_curr, self.V_curr, self.dVdz, P_curr, dPdz, a, 1.0)
 
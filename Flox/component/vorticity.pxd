@@ -12,9 +12,14 @@ from Flox.component._solve cimport TimeSolver
 
 cpdef int vorticity(int J, int K, DTYPE_t[:,:] d_V, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] T_curr, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t Pr, DTYPE_t Ra, DTYPE_t[:] f_p, DTYPE_t[:] f_m) nogil
 
+cpdef int vorticity_buoyancy(int J, int K, DTYPE_t[:,:] d_V, DTYPE_t[:,:] T_curr, DTYPE_t[:] npa, DTYPE_t Pr, DTYPE_t Ra) nogil
+
 cpdef int linear_lorentz(int J, int K, DTYPE_t[:,:] d_V, DTYPE_t[:,:] dJdz, DTYPE_t factor) nogil
 
 cdef class VorticitySolver(TimeSolver):
     cpdef int compute_base(self, DTYPE_t[:,:] T_curr, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t Pr, DTYPE_t Ra)
     cpdef int compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a)
-    cpdef int compute_lorentz(self, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdz, DTYPE_t[:,:] J_curr, DTYPE_t[:,:] dJdz, DTYPE_t a, DTYPE_t Q, DTYPE_t Pr, DTYPE_t q)
\ No newline at end of file
+    cpdef int compute_lorentz(self, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdz, DTYPE_t[:,:] J_curr, DTYPE_t[:,:] dJdz, DTYPE_t a, DTYPE_t Q, DTYPE_t Pr, DTYPE_t q)
+    cdef int _compute_base(self, DTYPE_t[:,:] T_curr, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t Pr, DTYPE_t Ra) nogil
+    cdef int _compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a) nogil
+    cdef int _compute_lorentz(self, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdz, DTYPE_t[:,:] J_curr, DTYPE_t[:,:] dJdz, DTYPE_t a, DTYPE_t Q, DTYPE_t Pr, DTYPE_t q) nogil
@@ -29,8 +29,8 @@ cpdef int vorticity(int J, int K, DTYPE_t[:,:] d_V, DTYPE_t[:,:] V_curr, DTYPE_t
     cdef int j, k
     
     # The second term and fourth in equation (2.11)
-    for k in range(K):
-        for j in range(J):
+    for j in prange(J, schedule='static'):
+        for k in range(K):
             d_V[j,k] += (Ra * Pr * npa[k] * T_curr[j,k]) - (Pr * npa[k] * npa[k] * V_curr[j,k])
         
     # The second last term in equation (2.11)
@@ -41,28 +41,61 @@ cpdef int vorticity(int J, int K, DTYPE_t[:,:] d_V, DTYPE_t[:,:] V_curr, DTYPE_t
     
     return r1
     
+cpdef int vorticity_buoyancy(int J, int K, DTYPE_t[:,:] d_V, DTYPE_t[:,:] T_curr, DTYPE_t[:] npa, DTYPE_t Pr, DTYPE_t Ra) nogil:
+    
+    cdef int j, k
+    
+    # The second term in equation (2.11)
+    for j in prange(J, schedule='static'):
+        for k in range(K):
+            d_V[j,k] += (Ra * Pr * npa[k] * T_curr[j,k])
+    
+    return 0
+    
 cpdef int linear_lorentz(int J, int K, DTYPE_t[:,:] d_V, DTYPE_t[:,:] dJdz, DTYPE_t factor) nogil:
     cdef int j, k
-    for k in prange(K):
-        for j in range(j):
+    for j in prange(J, schedule='static'):
+        for k in range(K):
             d_V[j, k] += factor * dJdz[j , k]
     return 0
 
 cdef class VorticitySolver(TimeSolver):
     
     cpdef int compute_base(self, DTYPE_t[:,:] T_curr, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t Pr, DTYPE_t Ra):
+        return self._compute_base(T_curr, dz, npa, Pr, Ra)
+    
+    cdef int _compute_base(self, DTYPE_t[:,:] T_curr, DTYPE_t dz, DTYPE_t[:] npa, DTYPE_t Pr, DTYPE_t Ra) nogil:
         
+        if self.implicit:
+            # The diffusion terms are handled by a DiffusionSolver.
+            return vorticity_buoyancy(self.nz, self.nx, self.G_curr, T_curr, npa, Pr, Ra)
         return vorticity(self.nz, self.nx, self.G_curr, self.V_curr, T_curr, dz, npa, Pr, Ra, self.V_p, self.V_m)
         
     cpdef int compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a):
+        return self._compute_nonlinear(P_curr, dPdz, a)
+    
+    cdef int _compute_nonlinear(self, DTYPE_t[:,:] P_curr, DTYPE_t[:,:] dPdz, DTYPE_t a) nogil:
     
         # Now we do the non-linear terms from equation 4.6
+        if self.galerkin is not None:
+            with gil:
+                return self.galerkin.cos_grad_cos(self.G_curr, self.V_curr, self.dVdz, P_curr, dPdz, 1.0)
+        if self.table is not None:
+            return self.table.cos_grad_cos(self.nz, self.G_curr, self.V_curr, self.dVdz, P_curr, dPdz, a, 1.0)
         return galerkin_cos_grad_cos(self.nz, self.nx, self.G_curr, self.V_curr, self.dVdz, P_curr, dPdz, a, 1.0)
     
     cpdef int compute_lorentz(self, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdz, DTYPE_t[:,:] J_curr, DTYPE_t[:,:] dJdz, DTYPE_t a, DTYPE_t Q, DTYPE_t Pr, DTYPE_t q):
+        return self._compute_lorentz(A_curr, dAdz, J_curr, dJdz, a, Q, Pr, q)
+    
+    cdef int _compute_lorentz(self, DTYPE_t[:,:] A_curr, DTYPE_t[:,:] dAdz, DTYPE_t[:,:] J_curr, DTYPE_t[:,:] dJdz, DTYPE_t a, DTYPE_t Q, DTYPE_t Pr, DTYPE_t q) nogil:
         cdef int r
         # Compute the linear magnetic lorentz force due to the background field.
         r = linear_lorentz(self.nz, self.nx, self.G_curr, dJdz, -1.0 * (Q * Pr)/q)
         # Compute the magnetic lorentz force from equation 
+        if self.galerkin is not None:
+            with gil:
+                return r + self.galerkin.cos_grad_cos(self.G_curr, J_curr, dJdz, A_curr, dAdz, -1.0 * (Q * Pr)/q)
+        if self.table is not None:
+            return r + self.table.cos_grad_cos(self.nz, self.G_curr, J_curr, dJdz, A_curr, dAdz, a, -1.0 * (Q * Pr)/q)
         r += galerkin_cos_grad_cos(self.nz, self.nx, self.G_curr, J_curr, dJdz, A_curr, dAdz, a, -1.0 * (Q * Pr)/q)
         return r
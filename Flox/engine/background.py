@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+#  background.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-19.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import threading
+from six.moves import queue
+
+import logging
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+class BackgroundWriter(object):
+    """A single thread which performs writes from a bounded queue.
+
+    :param write: Called in the writer thread with a list of queued items. Items which
+        are already waiting when the thread wakes up are handed over together, so that
+        the writer can coalesce them.
+    :param maxsize: The number of items which can be waiting. :meth:`put` blocks when
+        the queue is full, so a slow disk slows down the producer instead of filling memory.
+    """
+
+    def __init__(self, write, maxsize=8, name=None):
+        super(BackgroundWriter, self).__init__()
+        self._write = write
+        self._queue = queue.Queue(maxsize)
+        self._name = name
+        self._thread = None
+        self._error = None
+
+    @property
+    def alive(self):
+        """Whether the writer thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _start(self):
+        """Start the writer thread."""
+        self._thread = threading.Thread(target=self._run, name=self._name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        """Write items until the stop marker arrives."""
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _STOP:
+                stop = True
+            items = [ item for item in batch if item is not _STOP ]
+            try:
+                if items:
+                    self._write(items)
+            except Exception as e:
+                log.exception("Background write failed.")
+                self._error = e
+            finally:
+                for item in batch:
+                    self._queue.task_done()
+
+    def _raise(self):
+        """Re-raise an error from the writer thread."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def put(self, item):
+        """Queue an item for writing, blocking while the queue is full."""
+        self._raise()
+        if not self.alive:
+            self._start()
+        self._queue.put(item)
+
+    def join(self):
+        """Wait for all queued items to be written."""
+        if self.alive:
+            self._queue.join()
+        self._raise()
+
+    def close(self):
+        """Write all queued items, then stop the writer thread."""
+        if self.alive:
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+        self._raise()
@@ -17,14 +17,21 @@ import six
 from pyshell.util import setup_kwargs, configure_class, resolve
 
 from ..process.packet import PacketInterface
-from .views import DimensionalView, NonDimensionalView, TransformedView, BaseView, PerturbedTransformedView
+from .views import DimensionalView, NonDimensionalView, TransformedView, RawView, PerturbedTransformedView
 
 class EngineIterator(collections.Iterator):
-    """An iterator wrapper for the engine class."""
+    """An iterator wrapper for the engine class.
+    
+    The systems for each iteration share the configuration and unit bases of the original
+    system, so moving to a new iteration doesn't set up the system again.
+    """
     def __init__(self, engine, system):
         super(EngineIterator, self).__init__()
         self.engine = engine
-        self._system = system.__getstate__()
+        self._type = type(system)
+        self._system = dict(system.__dict__)
+        self._system['_engine'] = engine
+        self._system.pop('_array_values', None)
         self.iteration = 0
         self.expired = False
         
@@ -44,11 +51,10 @@ class EngineIterator(collections.Iterator):
             return self.system(self.iteration)
             
     def system(self, iteration):
-        """Return a new system"""
-        system = self.engine.type.__new__(self.engine.type)
-        self._system['_iteration'] = iteration
-        system.__setstate__(self._system)
-        system.engine = self.engine
+        """Return a system at an iteration."""
+        system = self._type.__new__(self._type)
+        system.__dict__.update(self._system)
+        system.__dict__['_iteration'] = iteration
         return system
     
     def __len__(self):
@@ -65,6 +71,9 @@ class ArrayEngine(collections.Mapping, PacketInterface):
     Should refuse to implicitly allocate arrays, and all operations should happen in-place.
     """
     
+    # A count of writes to the arrays, which views use to tell when their caches are stale.
+    writes = 0
+    
     def __init__(self, system):
         super(ArrayEngine, self).__init__()
         self._system_type = type(system)
@@ -77,7 +86,7 @@ class ArrayEngine(collections.Mapping, PacketInterface):
         self._views["nondimensional"] = NonDimensionalView(self)
         self._views["transformed"] = TransformedView(self)
         self._views["perturbation"] = PerturbedTransformedView(self)
-        self._views["raw"] = BaseView(self)
+        self._views["raw"] = RawView(self)
         
     @property
     def type(self):
@@ -131,6 +140,10 @@ class ArrayEngine(collections.Mapping, PacketInterface):
     def allocate(self, name, shape):
         """Allocate a given array."""
         raise NotImplementedError()
+    
+    def flush(self):
+        """Write any buffered data to storage."""
+        pass
         
     def shape(self, obj, shape):
         """Hook into modification of the array shape."""
@@ -146,6 +159,7 @@ class ArrayEngine(collections.Mapping, PacketInterface):
         
     def read_packet(self, system, packet):
         """Create the packet."""
+        self.writes += 1
         for key in self.get_data_list():
             self.check_array(packet[key], key)
             self.__setdata__(system, key, packet[key])
@@ -10,6 +10,7 @@
 from __future__ import (absolute_import, unicode_literals, division, print_function)
 
 import six
+import weakref
 
 from pyshell.util import descriptor__get__
 
@@ -30,12 +31,26 @@ def EvolverProperty(propname):
     
 
 class ArrayValue(object):
-    """An array value instance"""
+    """An array value instance
+    
+    Array values are cached on their system, so they only hold a weak reference back to it.
+    """
+    
+    __slots__ = ('_engine', '_attr', '_system_ref')
+    
     def __init__(self, engine, system, attribute):
         super(ArrayValue, self).__init__()
         self._engine = engine
         self._attr = attribute
-        self._system = system
+        self._system_ref = weakref.ref(system)
+        
+    @property
+    def _system(self):
+        """The system this array belongs to."""
+        system = self._system_ref()
+        if system is None:
+            raise ReferenceError("The system for array '{0}' no longer exists.".format(self._attr))
+        return system
         
     def __getattr__(self, attribute):
         """Return an inverted view of this array."""
@@ -102,8 +117,17 @@ class ArrayProperty(object):
         
     @descriptor__get__
     def __get__(self, obj, objtype):
-        """Get this object."""
-        return ArrayValue(getattr(obj, self._engine), obj, self._attr)
+        """Get this object.
+        
+        Array values are cached on the instance, and rebuilt when the engine is replaced.
+        The cache isn't part of the pickled state.
+        """
+        engine = getattr(obj, self._engine)
+        values = obj.__dict__.setdefault('_array_values', {})
+        value = values.get(self._attr)
+        if value is None or value._engine is not engine or value._system_ref() is not obj:
+            value = values[self._attr] = ArrayValue(engine, obj, self._attr)
+        return value
         
 class SpectralArrayProperty(ArrayProperty):
     """An array with spectral property support"""
@@ -113,5 +137,5 @@ class SpectralArrayProperty(ArrayProperty):
         
     def itransform(self, obj, perturbed=False):
         """Perform the inverse transform."""
-        return spectral_transform(self._func, self.__get__(obj, type(obj)).raw, obj.nx, obj.aspect.value, perturbed)
+        return spectral_transform(self._func, getattr(obj, self._engine).__getdata__(obj, self._attr), obj.nx, obj.aspect.value, perturbed)
         
@@ -11,26 +11,37 @@ from __future__ import (absolute_import, unicode_literals, division, print_funct
 
 import numpy as np
 import h5py
-from threading import Thread
+import threading
 import os, os.path
 from .core import TimekeepingEngine, ArrayEngine
+from .background import BackgroundWriter
+from ..io import dataset_options
 
 class HDF5ArrayEngine(h5py.File, TimekeepingEngine):
-    """A numpy-based array engine"""
+    """A numpy-based array engine
     
-    def __init__(self, system, filename, dtype=np.float):
+    The storage options, `chunks`, `compression`, `compression_opts` and `shuffle`, are
+    passed to :func:`~Flox.io.dataset_options`. By default each chunk is a single frame,
+    so appending a frame and reading a frame are each a single chunk operation.
+    """
+    
+    def __init__(self, system, filename, dtype=np.float, queue_size=8, chunks="frame", compression=None, compression_opts=None, shuffle=False):
         """Initialize this object."""
         TimekeepingEngine.__init__(self, system)
         super(HDF5ArrayEngine, self).__init__(os.path.normpath(os.path.expanduser(filename)))
         self._dtype = dtype
+        self._storage = dict(chunks=chunks, compression=compression, compression_opts=compression_opts, shuffle=shuffle)
         self._iterations = 0
         self._length = None
-        self._threads = []
+        # Frames are collected here until they are written, so that they can still be read.
+        self._frames = {}
+        self._frames_lock = threading.Lock()
+        self._writer = BackgroundWriter(self.write_frames, maxsize=queue_size, name="HDF5ArrayEngine")
         
     def __del__(self):
-        """Delete this object, closing threads."""
-        for thread in self._threads:
-            thread.join()
+        """Delete this object, finishing any writes."""
+        if getattr(self, '_writer', None) is not None and self.id.valid:
+            self.close()
         
     @property
     def iterations(self):
@@ -76,26 +87,83 @@ class HDF5ArrayEngine(h5py.File, TimekeepingEngine):
     @classmethod
     def get_parameter_list(cls):
         """Get the parameter list pairs."""
-        return ['_dtype'] + ['filename'] + super(HDF5ArrayEngine, cls).get_parameter_list()
+        return ['_dtype', '_storage'] + ['filename'] + super(HDF5ArrayEngine, cls).get_parameter_list()
         
     def allocate(self, name, shape):
         """Allocate arrays with empty numpy arrays"""
+        options = dataset_options(shape + (self.length,), **self._storage)
+        options.setdefault('chunks', True)
         try:
-            self.require_dataset(name, shape + (self.length,), maxshape = shape + (None,), chunks=True, dtype=self.dtype)
+            self.require_dataset(name, shape + (self.length,), maxshape = shape + (None,), dtype=self.dtype, **options)
         except TypeError:
             del self[name]
-        self.require_dataset(name, shape + (self.length,), maxshape = shape + (None,),  chunks=True, dtype=self.dtype)
+        self.require_dataset(name, shape + (self.length,), maxshape = shape + (None,), dtype=self.dtype, **options)
+        
+    def __getdata__(self, obj, name):
+        """Engine caller to the underlying get method, including frames which are not yet written."""
+        with self._frames_lock:
+            frame = self._frames.get(obj.iteration, {})
+            if name in frame:
+                return frame[name]
+        return super(HDF5ArrayEngine, self).__getdata__(obj, name)
         
     def __setdata__(self, obj, name, value):
         """Engine caller to the underlying set method."""
         if self._iterations < obj.iteration:
             self._iterations = obj.iteration
-        thread = Thread(target=self.write, args=(name, value, obj.iteration), daemon=True)
-        thread.start()
-        self._threads.append(thread)
+        with self._frames_lock:
+            pending = [ i for i in self._frames if i < obj.iteration and not self._frames[i].queued ]
+            frame = self._frames.get(obj.iteration)
+            if frame is None or frame.queued:
+                # Don't modify a frame which the writer thread may be using.
+                frame = self._frames[obj.iteration] = _Frame(obj.iteration, frame or {})
+            frame[name] = np.array(value, copy=True)
+        # Arrays for an iteration arrive one at a time, so the frame is queued once the next iteration starts.
+        for i in pending:
+            self._queue_frame(i)
+    
+    def _queue_frame(self, i):
+        """Hand a complete frame to the writer thread."""
+        with self._frames_lock:
+            frame = self._frames[i]
+            frame.queued = True
+        self._writer.put(frame)
+    
+    def write_frames(self, frames):
+        """Write frames to the datasets, resizing each dataset at most once."""
+        end = max(frame.iteration for frame in frames) + 1
+        names = set().union(*frames)
+        for name in names:
+            dataset = self[name]
+            if dataset.shape[-1] < end:
+                dataset.resize(end, axis=len(dataset.shape)-1)
+            for frame in frames:
+                if name in frame:
+                    dataset[...,frame.iteration] = frame[name]
+        with self._frames_lock:
+            for frame in frames:
+                if self._frames.get(frame.iteration) is frame:
+                    del self._frames[frame.iteration]
+    
+    def flush(self):
+        """Write all collected frames, and flush the file."""
+        with self._frames_lock:
+            pending = sorted(i for i in self._frames if not self._frames[i].queued)
+        for i in pending:
+            self._queue_frame(i)
+        self._writer.join()
+        super(HDF5ArrayEngine, self).flush()
+    
+    def close(self):
+        """Write all collected frames, stop the writer thread and close the file."""
+        self.flush()
+        self._writer.close()
+        super(HDF5ArrayEngine, self).close()
+    
+class _Frame(dict):
+    """The arrays for a single iteration."""
     
-    def write(self, name, value, i):
-        """docstring for write"""
-        if self[name].shape[-1] < (i + 1):
-            self[name].resize(i+1, axis=len(self[name].shape)-1)
-        self[name][...,i] = value
+    def __init__(self, iteration, arrays={}):
+        super(_Frame, self).__init__(arrays)
+        self.iteration = iteration
+        self.queued = False
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+#  memmap.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-18.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import os, os.path
+import numpy as np
+from numpy.lib.format import open_memmap
+from .core import TimekeepingEngine
+
+class MemmapArrayEngine(dict, TimekeepingEngine):
+    """An array engine backed by memory-mapped .npy files, one per array.
+
+    Only the pages in use are resident, so long snapshot histories don't have
+    to fit in memory. The files are plain .npy files, and can be reopened with
+    ``mode='r'`` to view or animate a run without reading it back into memory.
+
+    With ``layout='time-first'``, each frame is contiguous on disk. The arrays
+    are always presented time-last, as with :class:`NumpyArrayEngine`.
+    """
+
+    modes = ('w+', 'r+', 'r')
+    layouts = ('time-last', 'time-first')
+
+    def __init__(self, system, directory, length=None, dtype=np.float, mode='w+', layout='time-last'):
+        """Initialize this object."""
+        TimekeepingEngine.__init__(self, system)
+        super(MemmapArrayEngine, self).__init__()
+        if mode not in self.modes:
+            raise ValueError("Mode '{}' should be one of {!r}".format(mode, self.modes))
+        if layout not in self.layouts:
+            raise ValueError("Layout '{}' should be one of {!r}".format(layout, self.layouts))
+        self._directory = os.path.normpath(os.path.expanduser(directory))
+        self._dtype = dtype
+        self._mode = mode
+        self._layout = layout
+        self._length = length
+        self._iterations = 0
+        self._memmaps = {}
+        self._counter = None
+
+    @property
+    def iterations(self):
+        """Number of iterations available."""
+        return self._iterations
+
+    @iterations.setter
+    def iterations(self, value):
+        """Set the iterations"""
+        if value < self.length:
+            self._iterations = value
+            self._save_iterations()
+
+    @property
+    def length(self):
+        """Maximum object length."""
+        if self._length is None:
+            raise ValueError("Length has not been set.")
+        return self._length
+
+    @length.setter
+    def length(self, value):
+        """Maximum object length."""
+        if self._length is None:
+            self._length = value
+        else:
+            raise ValueError("Can't adjust length.")
+
+    @property
+    def persistent(self):
+        """Whether this engine opens data which is already on disk."""
+        return self._mode != 'w+'
+
+    @property
+    def dtype(self):
+        """dtype"""
+        return np.dtype(self._dtype).str
+
+    @classmethod
+    def get_parameter_list(cls):
+        """Get the parameter list pairs."""
+        return ['_dtype', '_directory', '_mode', '_layout'] + super(MemmapArrayEngine, cls).get_parameter_list()
+
+    def _path(self, name):
+        """Path to the file for a named array."""
+        return os.path.join(self._directory, "{}.npy".format(name))
+
+    def _save_iterations(self):
+        """Record the number of iterations alongside the arrays."""
+        if self._counter is not None and self._mode != 'r':
+            self._counter[0] = self._iterations
+
+    def initialize_arrays(self, system):
+        """Open the iteration counter before initializing."""
+        if self._mode == 'w+':
+            if not os.path.isdir(self._directory):
+                os.makedirs(self._directory)
+            self._counter = open_memmap(self._path("iterations"), mode='w+', dtype=np.int64, shape=(1,))
+            self._iterations = 0
+        else:
+            self._counter = np.load(self._path("iterations"), mmap_mode=self._mode)
+            self._iterations = int(self._counter[0])
+        return super(MemmapArrayEngine, self).initialize_arrays(system)
+
+    def allocate(self, name, shape):
+        """Allocate arrays as memory maps."""
+        if self._mode == 'w+':
+            if self._layout == 'time-first':
+                full_shape = tuple([self.length]) + shape
+            else:
+                full_shape = shape + tuple([self.length])
+            memmap = open_memmap(self._path(name), mode='w+', dtype=self._dtype, shape=full_shape)
+        else:
+            memmap = np.load(self._path(name), mmap_mode=self._mode)
+            if self._layout == 'time-first':
+                length, file_shape = memmap.shape[0], memmap.shape[1:]
+            else:
+                length, file_shape = memmap.shape[-1], memmap.shape[:-1]
+            if file_shape != shape:
+                raise ValueError("Array '{}' in '{}' has shape {!r}, expected {!r}".format(name, self._path(name), file_shape, shape))
+            if self._length is None:
+                self._length = length
+            elif self._length != length:
+                raise ValueError("Array '{}' in '{}' has length {}, expected {}".format(name, self._path(name), length, self._length))
+        self._memmaps[name] = memmap
+        if self._layout == 'time-first':
+            memmap = np.rollaxis(memmap, 0, memmap.ndim)
+        super(MemmapArrayEngine, self).__setitem__(name, memmap)
+
+    def __setitem__(self, name, value):
+        """Copy values into the existing memory maps, rather than replacing them."""
+        if name not in self:
+            raise KeyError("Array '{}' has not been allocated.".format(name))
+        self[name][...] = value
+
+    def __setdata__(self, obj, name, value):
+        """Engine caller to the underlying set method."""
+        super(MemmapArrayEngine, self).__setdata__(obj, name, value)
+        self._save_iterations()
+
+    def flush(self):
+        """Write any changes in the memory maps to disk."""
+        if self._mode == 'r':
+            return
+        for memmap in self._memmaps.values():
+            memmap.flush()
+        if self._counter is not None:
+            self._counter.flush()
+
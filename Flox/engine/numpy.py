@@ -9,8 +9,13 @@
 
 from __future__ import (absolute_import, unicode_literals, division, print_function)
 
+import sys
 import numpy as np
+import h5py
+import os, os.path
 from .core import TimekeepingEngine, ArrayEngine
+from .background import BackgroundWriter
+from ..io import dataset_options
 
 class NumpyArrayEngine(dict, TimekeepingEngine):
     """A numpy-based array engine"""
@@ -69,11 +74,31 @@ class NumpyArrayEngine(dict, TimekeepingEngine):
         self[name] = np.zeros(shape + tuple([self.length]), dtype=self._dtype)
         
 class NumpyWriterEngine(NumpyArrayEngine):
-    """A numpy engine which dumps its contents and writes every n frames."""
-    def __init__(self, system, length=None, dtype=np.float, writeargs=dict()):
-        """docstring for __init__"""
+    """A numpy engine which holds `length` frames, and writes them out each time the buffer fills.
+    
+    Iteration ``i`` lives in slot ``i % length``. When an iteration arrives for the next
+    segment, the full buffer is copied and handed to a background writer, so memory use
+    doesn't grow with the length of the run. Segments are appended to datasets in an HDF5
+    file (``format='hdf5'``) or saved as ``<name>.<segment>.npy`` files in a directory
+    (``format='npy'``). Frames from earlier segments are read back from the output, but
+    can't be changed.
+    
+    The HDF5 storage options are passed to :func:`~Flox.io.dataset_options`.
+    """
+    
+    formats = ('hdf5', 'npy')
+    
+    def __init__(self, system, filename, length=None, dtype=np.float, format='hdf5', queue_size=2, chunks="frame", compression=None, compression_opts=None, shuffle=False):
+        """Initialize this object."""
         super(NumpyWriterEngine, self).__init__(system, length, dtype)
-        self.writeargs = writeargs
+        if format not in self.formats:
+            raise ValueError("Format '{}' should be one of {!r}".format(format, self.formats))
+        self._filename = os.path.normpath(os.path.expanduser(filename))
+        self._format = format
+        self._queue_size = queue_size
+        self._storage = dict(chunks=chunks, compression=compression, compression_opts=compression_opts, shuffle=shuffle)
+        self._segment = 0
+        self._writer = None
     
     @property
     def iterations(self):
@@ -85,20 +110,105 @@ class NumpyWriterEngine(NumpyArrayEngine):
         """Set the iterations"""
         self._iterations = value
     
+    @property
+    def free(self):
+        """Number of free-space iterations available, which isn't limited by the buffer."""
+        return sys.maxsize
+    
+    @classmethod
+    def get_parameter_list(cls):
+        """Get the parameter list pairs."""
+        return ['_filename', '_format', '_queue_size', '_storage'] + super(NumpyWriterEngine, cls).get_parameter_list()
+    
+    @property
+    def writer(self):
+        """The background writer, started on first use."""
+        if getattr(self, '_writer', None) is None:
+            self._writer = BackgroundWriter(self.write_segments, maxsize=self._queue_size, name="NumpyWriterEngine")
+        return self._writer
+    
+    def initialize_arrays(self, system):
+        """Start a new output file before initializing."""
+        self._segment = 0
+        if self._format == 'hdf5':
+            h5py.File(self._filename, 'w').close()
+        elif not os.path.isdir(self._filename):
+            os.makedirs(self._filename)
+        return super(NumpyWriterEngine, self).initialize_arrays(system)
+    
+    def _check_segment(self, iteration):
+        """Check that an iteration is in the current segment."""
+        if iteration // self.length < self._segment:
+            raise ValueError("Iteration {} has already been written to '{}'".format(iteration, self._filename))
+    
     def __getdata__(self, obj, name):
         """Engine caller to the underlying get method."""
-        it = (obj.iteration % self.length)
-        return self[name][...,it]
+        if obj.iteration // self.length < self._segment:
+            return self._read_written(name, obj.iteration)
+        return self[name][...,obj.iteration % self.length]
+    
+    def _read_written(self, name, iteration):
+        """Read a single frame back from a segment which has already been written."""
+        self.writer.join()
+        if self._format == 'npy':
+            segment = np.load(os.path.join(self._filename, "{}.{:06d}.npy".format(name, iteration // self.length)), mmap_mode='r')
+            return np.array(segment[...,iteration % self.length])
+        with h5py.File(self._filename, 'r') as datafile:
+            return datafile[name][...,iteration]
     
     def __setdata__(self, obj, name, value):
         """Modify __setdata__ to write when the iteration ticks over."""
-        if (self.iterations % self.length) == 0:
-            self.write(**writeargs)
+        self._check_segment(obj.iteration)
+        if obj.iteration // self.length > self._segment:
+            self._queue_segment(self.length)
+            self._segment = obj.iteration // self.length
         if self.iterations < obj.iteration:
             self.iterations = obj.iteration
-        it = (obj.iteration % self.length)
-        self[name][...,it] = value
-        
+        self[name][...,obj.iteration % self.length] = value
+    
+    def _queue_segment(self, n):
+        """Hand a copy of the first `n` frames of the buffer to the writer thread."""
+        arrays = { name:np.array(self[name][...,:n], copy=True) for name in self.get_data_list() }
+        self.writer.put(_Segment(self._segment, self._segment * self.length, arrays))
+    
+    def write_segments(self, segments):
+        """Write segments to the output file or directory."""
+        if self._format == 'npy':
+            for segment in segments:
+                for name, array in segment.items():
+                    np.save(os.path.join(self._filename, "{}.{:06d}.npy".format(name, segment.index)), array)
+            return
+        with h5py.File(self._filename, 'a') as datafile:
+            for segment in segments:
+                for name, array in segment.items():
+                    if name not in datafile:
+                        options = dataset_options(array.shape[:-1] + (self.length,), **self._storage)
+                        options.setdefault('chunks', True)
+                        datafile.create_dataset(name, array.shape[:-1] + (0,), maxshape=array.shape[:-1] + (None,), dtype=array.dtype, **options)
+                    dataset = datafile[name]
+                    end = segment.start + array.shape[-1]
+                    if dataset.shape[-1] < end:
+                        dataset.resize(end, axis=dataset.ndim - 1)
+                    dataset[...,segment.start:end] = array
+                    datafile.attrs['iterations'] = max(datafile.attrs.get('iterations', 0), end - 1)
+    
+    def flush(self):
+        """Write the frames collected so far in the current segment, and wait for all writes to finish."""
+        self._queue_segment(self.iterations - self._segment * self.length + 1)
+        self.writer.join()
+    
+    def close(self):
+        """Write all collected frames and stop the writer thread."""
+        self.flush()
+        self.writer.close()
+    
+class _Segment(dict):
+    """The arrays for one full (or partial) buffer."""
+    
+    def __init__(self, index, start, arrays):
+        super(_Segment, self).__init__(arrays)
+        self.index = index
+        self.start = start
     
 class NumpyFrameEngine(dict, ArrayEngine):
     """A numpy-based array engine which only holds a single frame."""
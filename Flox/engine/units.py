@@ -10,10 +10,13 @@
 from __future__ import (absolute_import, unicode_literals, division, print_function)
 
 import collections
+import numpy as np
 
-from pyshell.astron.units import recompose
+from pyshell.astron.units import ComputedUnitsProperty
+from pyshell.util import descriptor__get__
 import astropy.units as u
 
+from ..units import recompose, recompose_unit
 from ..process.packet import PickleInterface
 
 class BasesView(object):
@@ -30,6 +33,25 @@ class BasesView(object):
         """Return the base set for this key."""
         return set(self.bases[key].values())
 
+class CachedUnitsProperty(ComputedUnitsProperty):
+    """A units property computed from parameters, which is kept until a parameter or the bases change.
+    
+    Only use this for values which don't depend on the arrays or the iteration.
+    """
+    
+    @descriptor__get__
+    def __get__(self, obj, objtype):
+        """Getter which calls the property function once."""
+        cache = obj.__dict__.setdefault('_computed_units', {})
+        try:
+            return cache[self.fget.__name__]
+        except KeyError:
+            value = super(CachedUnitsProperty, self).__get__(obj, objtype)
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            cache[self.fget.__name__] = value
+            return value
+
 class WithUnitBases(PickleInterface):
     """An object with unit bases"""
     
@@ -38,13 +60,22 @@ class WithUnitBases(PickleInterface):
         self.setup_bases()
     
     _bases = None
+    _unit_cache = None
     
     def setup_bases(self):
         """This method is called to setup the unit bases systems."""
         pass
     
+    def __setattr__(self, name, value):
+        """Set an attribute, forgetting cached properties when a parameter changes."""
+        if not name.startswith("_"):
+            self.__dict__.pop('_computed_units', None)
+        super(WithUnitBases, self).__setattr__(name, value)
+    
     def add_bases(self, name, bases):
         """Add a bases state."""
+        self._unit_cache = {}
+        self.__dict__.pop('_computed_units', None)
         if self._bases is None:
             self._bases = {}
         if isinstance(bases, collections.Set):
@@ -65,6 +96,20 @@ class WithUnitBases(PickleInterface):
             self._bases = {}
         return BasesView(self, self._bases)
     
+    def unit_conversion(self, key, unit, bases='nondimensional'):
+        """The unit for an array in a bases state, and the factor which converts that unit to `unit`.
+        
+        Recomposing a unit is slow, so the result is cached for each array until the bases are set up again.
+        """
+        if self._unit_cache is None:
+            self._unit_cache = {}
+        try:
+            return self._unit_cache[(key, bases)]
+        except KeyError:
+            base_unit = recompose_unit(unit, self.bases[bases])
+            conversion = self._unit_cache[(key, bases)] = (base_unit, base_unit.to(unit))
+            return conversion
+    
     def nondimensionalize(self, quantity):
         """Nondimensionalize a given quantity for use somewhere."""
         return recompose(quantity, self.bases['nondimensional'])
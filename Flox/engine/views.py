@@ -12,9 +12,9 @@ from __future__ import (absolute_import, unicode_literals, division, print_funct
 import abc
 import six
 import copy
+import collections
 import numpy as np
 import astropy.units as u
-from pyshell.astron.units import recompose, recompose_unit
 
 class BaseView(object):
     """The view interface"""
@@ -28,8 +28,20 @@ class BaseView(object):
         
     def __setdata__(self, system, key, value):
         """Set data belonging to a system with a key"""
+        self.source.writes += 1
         self.source.__setdata__(system, key, value)
 
+class RawView(BaseView):
+    """A view of the engine's own arrays.
+    
+    The arrays can be changed in place, so handing one out counts as a write.
+    """
+    
+    def __getdata__(self, system, key):
+        """Get data belonging to a system with a key."""
+        self.source.writes += 1
+        return super(RawView, self).__getdata__(system, key)
+
 class UnitView(BaseView):
     """A view for retrieving units, etc."""
     
@@ -39,8 +51,11 @@ class UnitView(BaseView):
         
     def __ndunit__(self, system, key):
         """Non-dimensional unit for a key."""
-        unit = getattr(self.source.type, key).unit
-        return recompose_unit(unit, system.bases['nondimensional'])
+        return self.__conversion__(system, key)[0]
+        
+    def __conversion__(self, system, key):
+        """Non-dimensional unit for a key, and the factor which converts it to the unit for that key."""
+        return system.unit_conversion(key, self.__unit__(system, key))
 
 class DimensionalView(UnitView):
     """Return a dimensionalizer for the array engine."""
@@ -48,11 +63,15 @@ class DimensionalView(UnitView):
     def __getdata__(self, system, key):
         """Get item."""
         value = super(DimensionalView, self).__getdata__(system, key)
-        return (value * self.__ndunit__(system, key)).to(self.__unit__(system, key))
+        factor = self.__conversion__(system, key)[1]
+        # The raw value is the engine's buffer, so it is scaled into a new array rather than in place.
+        output = np.empty(np.shape(value), dtype=np.result_type(value, factor))
+        np.multiply(value, factor, out=output)
+        return u.Quantity(output, unit=self.__unit__(system, key), copy=False)
         
     def __setdata__(self, system, key, value):
         """Set an item."""
-        value = u.Quantity(value, unit=self.__unit__(system, key)).to(self.__ndunit__(system, key)).value
+        value = u.Quantity(value, unit=self.__unit__(system, key)).value / self.__conversion__(system, key)[1]
         return super(DimensionalView, self).__setdata__(system, key, value)
         
 class NonDimensionalView(UnitView):
@@ -68,25 +87,44 @@ class NonDimensionalView(UnitView):
     def __setdata__(self, system, key, value):
         """Set an item."""
         value = u.Quantity(value, unit=self.__ndunit__(system, key)).value
-        return super(NonDimensionalView, self).__setitem__(system, key, value)
+        return super(NonDimensionalView, self).__setdata__(system, key, value)
         
 class TransformedView(DimensionalView):
-    """docstring for TransformedView"""
+    """A view of spectral arrays, transformed to x-space.
+    
+    Transforms are cached for the most recent `cache_size` (array, iteration) pairs. A
+    cached transform is used only until the engine's arrays are written, or handed out
+    through the raw view, again. Transformed arrays are read-only, so copy one before
+    changing it.
+    """
+    
+    cache_size = 16
+    perturbed = False
+    
+    def __init__(self, source):
+        super(TransformedView, self).__init__(source)
+        self._cache = collections.OrderedDict()
     
     def __getdata__(self, system, key):
         """Get item."""
-        descriptor = getattr(self.source.type, key)
-        return (descriptor.itransform(system) * self.__ndunit__(system, key)).to(self.__unit__(system, key))
+        cache_key = (key, system.iteration)
+        cached = self._cache.pop(cache_key, None)
+        if cached is None or cached[0] != self.source.writes:
+            descriptor = getattr(self.source.type, key)
+            value = u.Quantity(descriptor.itransform(system, perturbed=self.perturbed) * self.__conversion__(system, key)[1], unit=self.__unit__(system, key), copy=False)
+            value.setflags(write=False)
+            cached = (self.source.writes, value)
+        self._cache[cache_key] = cached
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return cached[1]
         
     def __setdata__(self, system, key, value):
         """Set item."""
         raise AttributeError("{}: Can't set a transformed array! Key={}".format(system, key))
         
 class PerturbedTransformedView(TransformedView):
-    """docstring for PerturbedTransformedView"""
+    """A view of spectral arrays, transformed to x-space without the mean (n=0) mode."""
+    
+    perturbed = True
     
-    def __getdata__(self, system, key):
-        """Get item."""
-        descriptor = getattr(self.source.type, key)
-        return (descriptor.itransform(system, perturbed=True) * self.__ndunit__(system, key)).to(self.__unit__(system, key))
-    
\ No newline at end of file
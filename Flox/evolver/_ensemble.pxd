@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+#
+#  _ensemble.pxd
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-23.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from cpython.ref cimport PyObject
+
+from Flox._flox cimport DTYPE_t
+from Flox.evolver._evolve cimport Evolver
+
+cdef class EnsembleEvolver:
+    cdef list _members
+    cdef PyObject** _evolvers
+    cdef readonly int M
+    cdef readonly int nz
+    cdef readonly int nx
+    cdef dict _fields
+
+    cpdef int evolve(self, DTYPE_t time, int max_iterations)
+    cdef int _evolve(self, DTYPE_t time, int max_iterations) nogil
+    cdef int _bind(self, int m) except -1
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#
+#  _ensemble.pyx
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-23.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+#cython: overflowcheck=False
+#cython: wraparound=False
+#cython: boundscheck=False
+#cython: cdivision=True
+
+from __future__ import division
+
+import numpy as np
+cimport numpy as np
+cimport cython
+from cython.parallel cimport prange
+from cpython.ref cimport PyObject
+from libc.stdlib cimport malloc, free
+
+from Flox._flox cimport DTYPE_t
+from Flox.evolver._evolve cimport Evolver
+from Flox.evolver._evolve import overrides_dispatch
+
+cdef class EnsembleEvolver:
+    """Evolve many members on the same grid together, one member per thread.
+
+    The fields of the members are stacked into (M, nz, nx) arrays, and each member
+    evolves in place in its own slice. Members keep their own parameters (Ra, Pr, forcing)
+    and their own timestep.
+    """
+
+    def __cinit__(self, members):
+        cdef Evolver member
+        cdef int m
+        self._members = list(members)
+        self.M = len(self._members)
+        if self.M == 0:
+            raise ValueError("An ensemble needs at least one member.")
+
+        member = self._members[0]
+        self.nz = member._Temperature.nz
+        self.nx = member._Temperature.nx
+        magneto = member._VectorPotential is not None
+        order = member.order
+        for member in self._members:
+            if overrides_dispatch(type(member)):
+                # Members are evolved without the GIL, which skips these overrides.
+                raise ValueError("Ensemble members can't override step or delta_time: {}".format(type(member).__name__))
+            if member._Temperature.nz != self.nz or member._Temperature.nx != self.nx:
+                raise ValueError("Ensemble members must share a grid: ({:d}x{:d}) != ({:d}x{:d})".format(
+                    member._Temperature.nz, member._Temperature.nx, self.nz, self.nx))
+            if (member._VectorPotential is not None) != magneto:
+                raise ValueError("Ensemble members must all be hydro or all be magneto evolvers.")
+            if member.order != order:
+                raise ValueError("Ensemble members must share a memory order: '{}' != '{}'".format(member.order, order))
+
+        names = ["Temperature", "dTemperature", "Vorticity", "dVorticity", "Stream"]
+        if magneto:
+            names += ["VectorPotential", "dVectorPotential", "CurrentDensity"]
+        if order == "F":
+            # Each member's slice is mode-major, like the member's own arrays.
+            self._fields = { name:np.zeros((self.M, self.nx, self.nz), dtype=np.float).transpose(0, 2, 1) for name in names }
+        else:
+            self._fields = { name:np.zeros((self.M, self.nz, self.nx), dtype=np.float) for name in names }
+
+        self._evolvers = <PyObject**>malloc(self.M * sizeof(PyObject*))
+        if self._evolvers == NULL:
+            raise MemoryError()
+        for m in range(self.M):
+            self._evolvers[m] = <PyObject*>self._members[m]
+            self._bind(m)
+
+    def __dealloc__(self):
+        free(self._evolvers)
+
+    cdef int _bind(self, int m) except -1:
+        # Copy a member's fields into the ensemble arrays, and point the member at its slices.
+        cdef Evolver member = self._members[m]
+        fields = self._fields
+        fields["Temperature"][m] = member.Temperature
+        fields["dTemperature"][m] = member.dTemperature
+        fields["Vorticity"][m] = member.Vorticity
+        fields["dVorticity"][m] = member.dVorticity
+        fields["Stream"][m] = member.Stream
+        member._Temperature.V_curr = fields["Temperature"][m]
+        member._Temperature.G_prev = fields["dTemperature"][m]
+        member._Vorticity.V_curr = fields["Vorticity"][m]
+        member._Vorticity.G_prev = fields["dVorticity"][m]
+        member._Stream.V_curr = fields["Stream"][m]
+        if "VectorPotential" in fields:
+            fields["VectorPotential"][m] = member.VectorPotential
+            fields["dVectorPotential"][m] = member.dVectorPotential
+            fields["CurrentDensity"][m] = member.CurrentDensity
+            member._VectorPotential.V_curr = fields["VectorPotential"][m]
+            member._VectorPotential.G_prev = fields["dVectorPotential"][m]
+            member._CurrentDensity.V_curr = fields["CurrentDensity"][m]
+        return 0
+
+    def bind(self, int m):
+        """Move a member's fields back into the ensemble, after they were replaced (e.g. by reading a packet)."""
+        if not 0 <= m < self.M:
+            raise IndexError("Member {:d} out of range for an ensemble of {:d}".format(m, self.M))
+        self._bind(m)
+
+    cpdef int evolve(self, DTYPE_t time, int max_iterations):
+        cdef int r
+        with nogil:
+            r = self._evolve(time, max_iterations)
+        return r
+
+    cdef int _evolve(self, DTYPE_t time, int max_iterations) nogil:
+        # Members take different timesteps, so they are handed out to threads as they finish.
+        cdef int m, r = 0
+        for m in prange(self.M, schedule='dynamic'):
+            r += (<Evolver>self._evolvers[m])._evolve(time, max_iterations)
+        return r
+
+    def __len__(self):
+        return self.M
+
+    def __getitem__(self, m):
+        return self._members[m]
+
+    def __iter__(self):
+        return iter(self._members)
+
+    property fields:
+
+        "The stacked (M, nz, nx) fields of every member."
+
+        def __get__(self):
+            return dict(self._fields)
+
+    property Time:
+
+        """Time of each member"""
+
+        def __get__(self):
+            return np.array([ member.Time for member in self._members ])
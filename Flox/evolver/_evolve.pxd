@@ -12,11 +12,13 @@ from __future__ import division
 cimport cython
 
 from Flox._flox cimport DTYPE_t
+from Flox.component._solve cimport TimeSolver
 from Flox.component.temperature cimport TemperatureSolver
 from Flox.component.vorticity cimport VorticitySolver
 from Flox.component.stream cimport StreamSolver
 from Flox.component.vectorpotential cimport VectorPotentialSolver
 from Flox.component.currentdensity cimport CurrentDensitySolver
+from Flox.component.diffusion cimport DiffusionSolver
 
 cdef class Evolver:
     cdef public DTYPE_t Time
@@ -34,7 +36,21 @@ cdef class Evolver:
     cdef VectorPotentialSolver _VectorPotential
     cdef CurrentDensitySolver _CurrentDensity
     
+    cdef bint _implicit
+    cdef bint _release_gil
+    cdef DiffusionSolver _TemperatureDiffusion
+    cdef DiffusionSolver _VorticityDiffusion
+    cdef DiffusionSolver _VectorPotentialDiffusion
+    
     cdef public DTYPE_t tau
+    cdef object _galerkin
+    
+    cdef bint _adaptive
+    cdef public DTYPE_t tolerance
+    cdef readonly int rejected
+    cdef readonly DTYPE_t error
+    cdef int _scheme
+    cdef object _order
     
     cpdef DTYPE_t delta_time(self)
     cpdef int step(self, DTYPE_t delta_time)
@@ -43,4 +59,18 @@ cdef class Evolver:
     cpdef int compute(self)
     cpdef int advance(self, DTYPE_t delta_time)
     cpdef int solve(self)
+    cdef DTYPE_t _delta_time(self) nogil
+    cdef int _step(self, DTYPE_t delta_time) nogil
+    cdef int _evolve(self, DTYPE_t time, int max_iterations) nogil
+    cdef int _prepare(self) nogil
+    cdef int _compute(self) nogil
+    cdef int _advance(self, DTYPE_t delta_time) nogil
+    cdef int _solve(self) nogil
+    cdef DTYPE_t _error(self) nogil
+    cdef int _retry(self) nogil
+    cdef DTYPE_t _adapt(self, DTYPE_t ceiling) nogil
+    cdef int _save(self) nogil
+    cpdef int stage(self, int stage, DTYPE_t delta_time)
+    cdef int _stage(self, int stage, DTYPE_t delta_time) nogil
+    cdef DiffusionSolver _diffusion_solver(self, TimeSolver solver, bint neumann)
     
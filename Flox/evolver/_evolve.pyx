@@ -18,53 +18,201 @@ import numpy as np
 cimport numpy as np
 cimport cython
 from cpython.array cimport array, clone
+from libc.math cimport cbrt
 
 from Flox._flox cimport DTYPE_t
+from Flox.component._solve cimport TimeSolver, SCHEME_AB2, SCHEME_RK3
+from Flox.component._solve import schemes, stages
+from Flox.component.diffusion cimport DiffusionSolver
+from Flox.nonlinear.pseudospectral import PseudoSpectralGalerkin
+
+# Limits on the change in an adaptive timestep from one step to the next.
+DEF ADAPT_SAFETY = 0.9
+DEF ADAPT_SHRINK = 0.2
+DEF ADAPT_GROW = 2.0
+# The most times a single step is retracted and retried.
+DEF ADAPT_RETRIES = 10
+
+def overrides_dispatch(cls):
+    """Whether an evolver type overrides the python level step or delta_time.
+    
+    The nogil evolution calls the cdef _step and _delta_time directly, so these types
+    must be evolved through the python methods.
+    """
+    for name in ("step", "delta_time"):
+        if getattr(getattr(cls, name), "__objclass__", cls) is not Evolver:
+            return True
+    return False
 
 cdef class Evolver:
     
     def __cinit__(self, *args, **kwargs):
         self.timestep_ready = False
+        self._galerkin = "convolution"
+        self._implicit = False
+        self._release_gil = not overrides_dispatch(type(self))
+        self._adaptive = False
+        self.tolerance = 1e-3
+        self.rejected = 0
+        self.error = 0.0
+        self._scheme = SCHEME_AB2
+        self._order = "C"
     
     cpdef DTYPE_t delta_time(self):
+        return self._delta_time()
+    
+    cdef DTYPE_t _delta_time(self) nogil:
         
         return self.timestep * self.safety
     
     cpdef int prepare(self):
+        return self._prepare()
+    
+    cdef int _prepare(self) nogil:
         
         return 0
         
     cpdef int compute(self):
+        return self._compute()
+    
+    cdef int _compute(self) nogil:
         
         return 0
     
     cpdef int advance(self, DTYPE_t delta_time):
+        return self._advance(delta_time)
+    
+    cdef int _advance(self, DTYPE_t delta_time) nogil:
         
         self.Time += delta_time
         
         return 0
     
     cpdef int solve(self):
+        return self._solve()
+    
+    cdef int _solve(self) nogil:
         
         return 0
     
     
     cpdef int step(self, DTYPE_t delta_time):
+        return self._step(delta_time)
+    
+    cdef int _step(self, DTYPE_t delta_time) nogil:
+        
+        cdef int r, stage
         
-        cdef int r
+        if self._scheme == SCHEME_RK3:
+            # Each stage needs the time derivatives at the stage's values.
+            r = 0
+            for stage in range(3):
+                r += self._prepare()
+                r += self._compute()
+                r += self._stage(stage, delta_time)
+                r += self._solve()
+            self.Time += delta_time
+            return r
         
-        r = self.prepare()
-        r += self.compute()
-        r += self.advance(delta_time)
-        r += self.solve()
+        r = self._prepare()
+        r += self._compute()
+        if self._adaptive:
+            r += self._retry()
+            delta_time = self._adapt(delta_time)
+            r += self._save()
+        r += self._advance(delta_time)
+        r += self._solve()
         
         
         return r
         
+    cpdef int stage(self, int stage, DTYPE_t delta_time):
+        return self._stage(stage, delta_time)
+    
+    cdef int _stage(self, int stage, DTYPE_t delta_time) nogil:
+        
+        return 0
+    
+    cdef DTYPE_t _error(self) nogil:
+        # The largest local error of the last step, over the time dependent variables.
+        cdef DTYPE_t E, E_s
+        E = self._Temperature._error()
+        E_s = self._Vorticity._error()
+        if E_s > E:
+            E = E_s
+        if self._VectorPotential is not None:
+            E_s = self._VectorPotential._error()
+            if E_s > E:
+                E = E_s
+        return E
+    
+    cdef int _retry(self) nogil:
+        # G is now known at the end of the last step, so its error can be estimated. While
+        # the error is above the tolerance, retract the step and take it again, shorter.
+        cdef int r = 0, retries = 0
+        cdef DTYPE_t h, factor
+        
+        self.error = self._error()
+        while self.error > self.tolerance and retries < ADAPT_RETRIES:
+            self.rejected += 1
+            retries += 1
+            h = self._Temperature.timestep
+            factor = ADAPT_SAFETY * cbrt(self.tolerance / self.error)
+            if factor < ADAPT_SHRINK:
+                factor = ADAPT_SHRINK
+            
+            self.Time -= h
+            self._Temperature._retract()
+            self._Vorticity._retract()
+            if self._VectorPotential is not None:
+                self._VectorPotential._retract()
+            r += self._advance(h * factor)
+            r += self._solve()
+            r += self._prepare()
+            r += self._compute()
+            self.error = self._error()
+        return r
+    
+    cdef DTYPE_t _adapt(self, DTYPE_t ceiling) nogil:
+        # Choose the next timestep, up to the CFL ceiling, from the error of the last one.
+        # The local error of an Adams-Bashforth step grows as h^3.
+        cdef DTYPE_t h, factor
+        cdef DTYPE_t h_p = self._Temperature.timestep
+        
+        if h_p == 0.0:
+            # The first step has no history, so start small and let the step grow.
+            return ceiling * ADAPT_SHRINK * ADAPT_SHRINK
+        if self.error == 0.0:
+            factor = ADAPT_GROW
+        else:
+            factor = ADAPT_SAFETY * cbrt(self.tolerance / self.error)
+            if factor < ADAPT_SHRINK:
+                factor = ADAPT_SHRINK
+            elif factor > ADAPT_GROW:
+                factor = ADAPT_GROW
+        h = h_p * factor
+        return ceiling if h > ceiling else h
+    
+    cdef int _save(self) nogil:
+        # Save the variables before a step, so that it can be retracted.
+        cdef int r = 0
+        r += self._Temperature._save()
+        r += self._Vorticity._save()
+        if self._VectorPotential is not None:
+            r += self._VectorPotential._save()
+        return r
+        
     cpdef int evolve(self, DTYPE_t time, int max_iterations):
         
         cdef int j, r = 0, cfl = 0
         cdef DTYPE_t timestep
+        
+        if self._release_gil:
+            with nogil:
+                r = self._evolve(time, max_iterations)
+            return r
+        
+        # Dispatch through the python methods, so that they can be overridden.
         self.timestep_ready = False
         
         for j in range(max_iterations):
@@ -88,82 +236,252 @@ cdef class Evolver:
         
         return r
     
+    cdef int _evolve(self, DTYPE_t time, int max_iterations) nogil:
+        
+        cdef int j, r = 0, cfl = 0
+        cdef DTYPE_t timestep
+        self.timestep_ready = False
+        
+        for j in range(max_iterations):
+            if self.Time > time:
+                break
+            
+            timestep = self._delta_time()
+            
+            cfl += 1
+            # We check the CFL every N iterations and at the first iteration.
+            if cfl >= self.checkCFL or j==0:
+                cfl = 0
+                self.timestep_ready = False
+            
+            r += self._step(timestep)
+            
+            if r == 0:
+                pass
+            else:
+                break
+        
+        return r
+    
+    property release_gil:
+        
+        "Release the GIL for the whole of evolve."
+        
+        def __get__(self):
+            if self._release_gil:
+                return True
+            else:
+                return False
+        
+        def __set__(self, value):
+            if value and overrides_dispatch(type(self)):
+                raise ValueError("{} overrides step or delta_time, so it can't release the GIL.".format(type(self).__name__))
+            self._release_gil = value
+    
+    property adaptive:
+        
+        """Choose each timestep from an estimate of the local error, up to the CFL limit.
+        
+        The error of each step is estimated once the time derivatives at its end are known,
+        and steps with an error above the tolerance are retracted and taken again. They are
+        counted in rejected.
+        """
+        
+        def __get__(self):
+            if self._adaptive:
+                return True
+            else:
+                return False
+        
+        def __set__(self, value):
+            if value and self._scheme != SCHEME_AB2:
+                raise ValueError("Adaptive timesteps need the 'ab2' scheme.")
+            self._adaptive = value
+            for solver in (self._Temperature, self._Vorticity, self._VectorPotential):
+                if solver is not None:
+                    solver.history = value
+    
+    property cfl_bound:
+        
+        "Check the CFL condition against an upper bound from the modes, rather than the largest velocity."
+        
+        def __get__(self):
+            if self._Stream is not None:
+                return self._Stream.bound
+            return False
+        
+        def __set__(self, value):
+            for solver in (self._Stream, self._VectorPotential):
+                if solver is not None:
+                    solver.bound = value
+    
+    property scheme:
+        
+        "Select the time integration scheme, 'ab2', 'ab3' or 'rk3'."
+        
+        def __get__(self):
+            return { code:name for name, code in schemes.items() }[self._scheme]
+        
+        def __set__(self, value):
+            if value not in schemes:
+                raise ValueError("Unknown time integration scheme '{}'".format(value))
+            if schemes[value] != SCHEME_AB2 and self._adaptive:
+                raise ValueError("Adaptive timesteps need the 'ab2' scheme.")
+            if stages[schemes[value]] > 1 and self._implicit:
+                raise ValueError("Implicit diffusion needs a single stage scheme.")
+            for solver in (self._Temperature, self._Vorticity, self._VectorPotential):
+                if solver is not None:
+                    solver.scheme = schemes[value]
+            self._scheme = schemes[value]
+    
+    property galerkin:
+        
+        "Select the nonlinear Galerkin engine, 'convolution' or 'pseudospectral'."
+        
+        def __get__(self):
+            return self._galerkin
+        
+        def __set__(self, value):
+            if value == "convolution":
+                engine = None
+            elif value == "pseudospectral":
+                engine = PseudoSpectralGalerkin(self._Temperature.nz, self._Temperature.nx, self.a)
+            else:
+                raise ValueError("Unknown Galerkin engine '{}'".format(value))
+            for solver in (self._Temperature, self._Vorticity, self._VectorPotential):
+                if solver is not None:
+                    solver.galerkin = engine
+            self._galerkin = value
+    
+    cdef DiffusionSolver _diffusion_solver(self, TimeSolver solver, bint neumann):
+        # Set up a Crank-Nicolson solver for the diffusion terms of a TimeSolver.
+        cdef DiffusionSolver diffusion = DiffusionSolver(solver.nz, solver.nx)
+        diffusion.order = self._order
+        diffusion.setup(self.dz, self.npa, neumann)
+        return diffusion
+    
+    property implicit:
+        
+        "Treat the diffusion terms implicitly, with Crank-Nicolson."
+        
+        def __get__(self):
+            if self._implicit:
+                return True
+            else:
+                return False
+        
+        def __set__(self, value):
+            if value and stages[self._scheme] > 1:
+                raise ValueError("Implicit diffusion needs a single stage scheme.")
+            self._implicit = value
+            for solver in (self._Temperature, self._Vorticity, self._VectorPotential):
+                if solver is not None:
+                    solver.implicit = value
+            if not value:
+                return
+            if self._Temperature is not None and self._TemperatureDiffusion is None:
+                self._TemperatureDiffusion = self._diffusion_solver(self._Temperature, False)
+            if self._Vorticity is not None and self._VorticityDiffusion is None:
+                self._VorticityDiffusion = self._diffusion_solver(self._Vorticity, False)
+            if self._VectorPotential is not None and self._VectorPotentialDiffusion is None:
+                # The vector potential has vanishing first derivatives on the boundaries.
+                self._VectorPotentialDiffusion = self._diffusion_solver(self._VectorPotential, True)
+    
+    property order:
+        
+        """Memory layout of the solver state, 'C' for z-major or 'F' for mode-major.
+        
+        Packets are always z-major, so systems and files don't depend on the layout.
+        """
+        
+        def __get__(self):
+            return self._order
+        
+        def __set__(self, value):
+            if value not in ("C", "F"):
+                raise ValueError("Unknown memory order '{}'".format(value))
+            for solver in (self._Temperature, self._Vorticity, self._Stream, self._VectorPotential, self._CurrentDensity,
+                self._TemperatureDiffusion, self._VorticityDiffusion, self._VectorPotentialDiffusion):
+                if solver is not None:
+                    solver.order = value
+            self._order = value
+    
     property Temperature:
     
         """Temperature"""
     
         def __get__(self):
-            return np.asanyarray(self._Temperature.V_curr)
+            return np.ascontiguousarray(self._Temperature.V_curr)
         
         def __set__(self, value):
-            self._Temperature.V_curr = np.asanyarray(value).copy()
+            self._Temperature.V_curr = np.asanyarray(value).copy(order=self._order)
         
     property dTemperature:
     
         """Derivative of Temperature with Time"""
     
         def __get__(self):
-            return np.asanyarray(self._Temperature.G_prev)
+            return np.ascontiguousarray(self._Temperature.G_prev)
 
         def __set__(self, value):
-            self._Temperature.G_prev = np.asanyarray(value).copy()
+            self._Temperature.G_prev = np.asanyarray(value).copy(order=self._order)
 
     property Vorticity:
 
         """Vorticity"""
 
         def __get__(self):
-            return np.asanyarray(self._Vorticity.V_curr)
+            return np.ascontiguousarray(self._Vorticity.V_curr)
 
         def __set__(self, value):
-            self._Vorticity.V_curr = np.asanyarray(value).copy()
+            self._Vorticity.V_curr = np.asanyarray(value).copy(order=self._order)
 
     property dVorticity:
 
         """Derivative of Vorticity with Time"""
 
         def __get__(self):
-            return np.asanyarray(self._Vorticity.G_prev)
+            return np.ascontiguousarray(self._Vorticity.G_prev)
 
         def __set__(self, value):
-            self._Vorticity.G_prev = np.asanyarray(value).copy()
+            self._Vorticity.G_prev = np.asanyarray(value).copy(order=self._order)
         
     property Stream:
     
         """Stream function"""
     
         def __get__(self):
-            return np.asanyarray(self._Stream.V_curr)
+            return np.ascontiguousarray(self._Stream.V_curr)
 
         def __set__(self, value):
-            self._Stream.V_curr = np.asanyarray(value).copy()
+            self._Stream.V_curr = np.asanyarray(value).copy(order=self._order)
  
     property VectorPotential:
     
         """Magnetic Vector Potential"""
         
         def __get__(self):
-            return np.asanyarray(self._VectorPotential.V_curr)
+            return np.ascontiguousarray(self._VectorPotential.V_curr)
 
         def __set__(self, value):
-            self._VectorPotential.V_curr = np.asanyarray(value).copy()
+            self._VectorPotential.V_curr = np.asanyarray(value).copy(order=self._order)
             
     property dVectorPotential:
 
         """Derivative of Magnetic Vector Potential with Time"""
 
         def __get__(self):
-            return np.asanyarray(self._VectorPotential.G_prev)
+            return np.ascontiguousarray(self._VectorPotential.G_prev)
 
         def __set__(self, value):
-            self._VectorPotential.G_prev = np.asanyarray(value).copy()
+            self._VectorPotential.G_prev = np.asanyarray(value).copy(order=self._order)
             
     property CurrentDensity:
 
         """Magnetic Current Density"""
 
         def __get__(self):
-            return np.asanyarray(self._CurrentDensity.V_curr)
+            return np.ascontiguousarray(self._CurrentDensity.V_curr)
 
         def __set__(self, value):
-            self._CurrentDensity.V_curr = np.asanyarray(value).copy()
\ No newline at end of file
+            self._CurrentDensity.V_curr = np.asanyarray(value).copy(order=self._order)
\ No newline at end of file
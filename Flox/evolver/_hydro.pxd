@@ -17,4 +17,12 @@ cdef class HydroEvolver(Evolver):
     cdef bint _linear
     
     # Thermal Forcing Variables
-    cdef bint _forcing
\ No newline at end of file
+    cdef bint _forcing
+    
+    # Fused single-pass step
+    cdef bint _fused
+    cdef DTYPE_t[:,:,:] _halo
+    
+    cdef bint _fusable(self) nogil
+    cdef int _fused_step(self, DTYPE_t delta_time) nogil
+    cdef int _fused_tile(self, int t, DTYPE_t delta_time, bint vdt_T, DTYPE_t cT1, DTYPE_t cT2, bint vdt_W, DTYPE_t cW1, DTYPE_t cW2) nogil
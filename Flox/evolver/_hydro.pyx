@@ -21,13 +21,24 @@ cimport numpy as np
 cimport cython
 from cpython.array cimport array, clone
 from cython.parallel cimport prange
+from libc.math cimport sqrt, M_PI
 
 from Flox._flox cimport DTYPE_t
 from Flox.evolver._evolve cimport Evolver
+from Flox.component._solve cimport SCHEME_AB2
 from Flox.component.temperature cimport TemperatureSolver
 from Flox.component.vorticity cimport VorticitySolver
 from Flox.component.stream cimport StreamSolver
+from Flox.nonlinear.galerkin cimport coupling_table, galerkin_coupled_row
 
+# Rows of z in each tile of the fused step.
+DEF Z_TILE = 8
+
+cdef inline DTYPE_t adams_bashforth(DTYPE_t V, DTYPE_t G, DTYPE_t G_p, DTYPE_t deltaT, bint vdt, DTYPE_t c1, DTYPE_t c2) nogil:
+    # A single element of advance_cdt or advance_vdt.
+    if vdt:
+        return V + deltaT * (c1 * G - c2 * G_p)
+    return V + deltaT / 2.0 * (3.0 * G - G_p)
 
 cdef class HydroEvolver(Evolver):
     
@@ -40,96 +51,297 @@ cdef class HydroEvolver(Evolver):
         self._Vorticity = VorticitySolver(nz, nx)
         self._Stream = StreamSolver(nz, nx)
         self._Stream.setup(self.dz, self.npa)
+        # The Galerkin coupling table is shared by every solver with nx modes.
+        self._Temperature.table = coupling_table(nx)
+        self._Vorticity.table = coupling_table(nx)
         self.safety = safety
         self.checkCFL = checkCFL
         self.maxV = 0.0
         self._linear = False
         self._forcing = False
+        self._fused = False
+        self._halo = np.zeros((2, 2 * ((nz + Z_TILE - 1) // Z_TILE), nx), dtype=np.float)
         log.debug("Initialized with safety={} checkCFL={}".format(safety, checkCFL))
         
     
-    cpdef DTYPE_t delta_time(self):
+    cdef DTYPE_t _delta_time(self) nogil:
         
         cdef DTYPE_t dt_diffusion, dt_gmode, dt_velocity, dt
         if self.timestep_ready:
-            return Evolver.delta_time(self)
+            return Evolver._delta_time(self)
         
         dt_diffusion = (self.dz * self.dz) / 4.0
-        dt_gmode = (2.0 * np.pi) / (50.0 * np.sqrt(self.Ra * self.Pr))
+        dt_gmode = (2.0 * M_PI) / (50.0 * sqrt(self.Ra * self.Pr))
         if self.maxV == 0:
             dt_velocity = dt_diffusion
+            if self._implicit:
+                dt_velocity = dt_gmode
         else:
-            dt_velocity = (self.dz) / np.sqrt(self.maxV)
+            dt_velocity = (self.dz) / sqrt(self.maxV)
         
-        # Check the timestep.
-        dt = dt_diffusion
-        if dt > dt_gmode:
-            dt = dt_gmode
+        # Check the timestep. Implicit diffusion is unconditionally stable.
+        dt = dt_gmode
+        if dt > dt_diffusion and not self._implicit:
+            dt = dt_diffusion
         if dt > dt_velocity:
             dt = dt_velocity
         self.timestep = dt
         self.timestep_ready = True
-        return Evolver.delta_time(self)
+        return Evolver._delta_time(self)
         
-    cpdef int prepare(self):
+    cdef int _prepare(self) nogil:
         # Prepare the computation, resetting arrays and computing first spatial derivatives.
         cdef int r = 0
-        r += Evolver.prepare(self)
-        r += self._Temperature.prepare(self.dz)
-        r += self._Vorticity.prepare(self.dz)
-        r += self._Stream.prepare(self.dz)
+        r += Evolver._prepare(self)
+        r += self._Temperature._prepare(self.dz)
+        r += self._Vorticity._prepare(self.dz)
+        r += self._Stream._prepare(self.dz)
         return r
         
-    cpdef int compute(self):
+    cdef int _compute(self) nogil:
         # First the regular linear terms.
         cdef int r = 0
-        r += Evolver.compute(self)
-        r += self._Temperature.compute_base(self.dz, self.npa)
+        r += Evolver._compute(self)
+        r += self._Temperature._compute_base(self.dz, self.npa)
         if self._linear:
             # Then the linear only terms.
-            r += self._Temperature.compute_linear(self.dz, self.npa, self._Stream.V_curr)
+            r += self._Temperature._compute_linear(self.dz, self.npa, self._Stream.V_curr)
         else:
             # Then the nonlinear galerkin terms.
-            r += self._Temperature.compute_nonlinear(self._Stream.V_curr, self._Stream.dVdz, self.a, self.npa)
+            r += self._Temperature._compute_nonlinear(self._Stream.V_curr, self._Stream.dVdz, self.a, self.npa)
         
         if self._forcing:
             # Apply the thermal forcing terms.
-            r += self._Temperature.compute_forcing()
+            r += self._Temperature._compute_forcing()
         
         
         # First the regular linear terms.
-        r += self._Vorticity.compute_base(self._Temperature.V_curr, self.dz, self.npa, self.Pr, self.Ra)
+        r += self._Vorticity._compute_base(self._Temperature.V_curr, self.dz, self.npa, self.Pr, self.Ra)
         # Then the nonlinear galerkin terms.
         if not self._linear:
-            r += self._Vorticity.compute_nonlinear(self._Stream.V_curr, self._Stream.dVdz, self.a)
+            r += self._Vorticity._compute_nonlinear(self._Stream.V_curr, self._Stream.dVdz, self.a)
         
         return r
     
     
-    cpdef int advance(self, DTYPE_t delta_time):
+    cdef int _advance(self, DTYPE_t delta_time) nogil:
         cdef int r = 0
-        r += Evolver.advance(self, delta_time)
+        r += Evolver._advance(self, delta_time)
         # Advance the variables.
-        r += self._Temperature.advance(delta_time)
-        r += self._Vorticity.advance(delta_time)
+        if self._implicit:
+            r += self._TemperatureDiffusion._advance(self._Temperature, delta_time, 1.0)
+            r += self._VorticityDiffusion._advance(self._Vorticity, delta_time, self.Pr)
+        else:
+            r += self._Temperature._advance(delta_time)
+            r += self._Vorticity._advance(delta_time)
         
         return r
     
-    cpdef int solve(self):
+    cdef int _stage(self, int stage, DTYPE_t delta_time) nogil:
+        cdef int r = 0
+        r += Evolver._stage(self, stage, delta_time)
+        r += self._Temperature._stage(stage, delta_time)
+        r += self._Vorticity._stage(stage, delta_time)
+        return r
+    
+    cdef int _solve(self) nogil:
         cdef int r = 0
-        r += Evolver.solve(self)
+        r += Evolver._solve(self)
         # Advance the stream function.
-        r += self._Stream.solve(self._Vorticity.V_curr, self._Stream.V_curr)
+        r += self._Stream._solve(self._Vorticity.V_curr, self._Stream.V_curr)
         
         # If requried, do things to compute the fluid velocity.
         if not self._Stream.transform_ready:
-            r += self._Stream.setup_transform(self.npa)
+            with gil:
+                r += self._Stream.setup_transform(self.npa)
         if not self.timestep_ready:
-            r += self._Stream.compute_velocity()
+            r += self._Stream._compute_velocity()
             self.maxV = self._Stream.maxV
         
         return r
     
+    cdef int _step(self, DTYPE_t delta_time) nogil:
+        
+        cdef int r
+        if not self._fusable():
+            return Evolver._step(self, delta_time)
+        
+        r = self._fused_step(delta_time)
+        r += self._solve()
+        return r
+        
+    cdef bint _fusable(self) nogil:
+        # The fused step only covers the explicit hydrodynamic terms with the coupling table,
+        # and fixed timesteps.
+        if not self._fused or self._implicit or self._adaptive or self._scheme != SCHEME_AB2:
+            return False
+        if self._Temperature.mode_major:
+            # The fused step walks along rows of modes.
+            return False
+        if self._VectorPotential is not None:
+            return False
+        if self._Temperature.galerkin is not None or self._Temperature.table is None:
+            return False
+        if self._Vorticity.galerkin is not None or self._Vorticity.table is None:
+            return False
+        return True
+        
+    cdef int _fused_step(self, DTYPE_t delta_time) nogil:
+        # Prepare, compute and advance in one pass over tiles of Z_TILE rows.
+        cdef int t, k, j0, j1, r = 0
+        cdef int J = self._Temperature.nz
+        cdef int K = self._Temperature.nx
+        cdef int ntiles = (J + Z_TILE - 1) // Z_TILE
+        cdef bint vdt_T, vdt_W
+        cdef DTYPE_t cT1 = 0.0, cT2 = 0.0, cW1 = 0.0, cW2 = 0.0
+        
+        # Tiles advance in place, so take a copy of the rows which border each tile first.
+        for t in range(ntiles):
+            j0 = t * Z_TILE
+            j1 = min(j0 + Z_TILE, J)
+            for k in range(K):
+                if j0 == 0:
+                    self._halo[0, 2 * t, k] = self._Temperature.V_m[k]
+                    self._halo[1, 2 * t, k] = self._Vorticity.V_m[k]
+                else:
+                    self._halo[0, 2 * t, k] = self._Temperature.V_curr[j0-1, k]
+                    self._halo[1, 2 * t, k] = self._Vorticity.V_curr[j0-1, k]
+                if j1 == J:
+                    self._halo[0, 2 * t + 1, k] = self._Temperature.V_p[k]
+                    self._halo[1, 2 * t + 1, k] = self._Vorticity.V_p[k]
+                else:
+                    self._halo[0, 2 * t + 1, k] = self._Temperature.V_curr[j1, k]
+                    self._halo[1, 2 * t + 1, k] = self._Vorticity.V_curr[j1, k]
+        
+        # The same choice of Adams-Bashforth step as TimeSolver.advance
+        vdt_T = not (self._Temperature.timestep == 0.0 or delta_time == self._Temperature.timestep)
+        if vdt_T:
+            cT1 = (1.0 + delta_time / (2.0 * self._Temperature.timestep))
+            cT2 = (delta_time / (2.0 * self._Temperature.timestep))
+        vdt_W = not (self._Vorticity.timestep == 0.0 or delta_time == self._Vorticity.timestep)
+        if vdt_W:
+            cW1 = (1.0 + delta_time / (2.0 * self._Vorticity.timestep))
+            cW2 = (delta_time / (2.0 * self._Vorticity.timestep))
+        
+        for t in prange(ntiles):
+            r += self._fused_tile(t, delta_time, vdt_T, cT1, cT2, vdt_W, cW1, cW2)
+        
+        self._Temperature.timestep = delta_time
+        self._Vorticity.timestep = delta_time
+        self._Temperature.ready = False
+        self._Vorticity.ready = False
+        self.Time += delta_time
+        return r
+        
+    cdef int _fused_tile(self, int t, DTYPE_t delta_time, bint vdt_T, DTYPE_t cT1, DTYPE_t cT2, bint vdt_W, DTYPE_t cW1, DTYPE_t cW2) nogil:
+        
+        cdef int j, k
+        cdef int J = self._Temperature.nz
+        cdef int K = self._Temperature.nx
+        cdef int j0 = t * Z_TILE
+        cdef int j1 = min(j0 + Z_TILE, J)
+        cdef DTYPE_t dzs = self.dz * self.dz
+        cdef DTYPE_t dz2 = 2.0 * self.dz
+        cdef DTYPE_t Ta, Tb, Wa, Wb, Pa, Pb, npa_s
+        
+        cdef DTYPE_t[:,:] T = self._Temperature.V_curr
+        cdef DTYPE_t[:,:] dT = self._Temperature.dVdz
+        cdef DTYPE_t[:,:] G_T = self._Temperature.G_curr
+        cdef DTYPE_t[:,:] G_Tp = self._Temperature.G_prev
+        cdef DTYPE_t[:,:] W = self._Vorticity.V_curr
+        cdef DTYPE_t[:,:] dW = self._Vorticity.dVdz
+        cdef DTYPE_t[:,:] G_W = self._Vorticity.G_curr
+        cdef DTYPE_t[:,:] G_Wp = self._Vorticity.G_prev
+        cdef DTYPE_t[:,:] P = self._Stream.V_curr
+        cdef DTYPE_t[:,:] dP = self._Stream.dVdz
+        cdef DTYPE_t[:] P_p = self._Stream.V_p
+        cdef DTYPE_t[:] P_m = self._Stream.V_m
+        cdef DTYPE_t[:,:] halo_T = self._halo[0]
+        cdef DTYPE_t[:,:] halo_W = self._halo[1]
+        cdef DTYPE_t[:] npa = self.npa
+        cdef DTYPE_t Pr = self.Pr, Ra = self.Ra
+        cdef bint linear = self._linear
+        
+        cdef int[:] sin_start = self._Temperature.table.sin_start
+        cdef int[:] sin_kp = self._Temperature.table.sin_kp
+        cdef int[:] sin_kpp = self._Temperature.table.sin_kpp
+        cdef DTYPE_t[:] sin_wV = self._Temperature.table.sin_wV
+        cdef DTYPE_t[:] sin_wO = self._Temperature.table.sin_wO
+        cdef int[:] cos_start = self._Vorticity.table.cos_start
+        cdef int[:] cos_kp = self._Vorticity.table.cos_kp
+        cdef int[:] cos_kpp = self._Vorticity.table.cos_kpp
+        cdef DTYPE_t[:] cos_wV = self._Vorticity.table.cos_wV
+        cdef DTYPE_t[:] cos_wO = self._Vorticity.table.cos_wO
+        
+        # Derivatives and time derivatives, row by row, from the values at the start of the step.
+        for j in range(j0, j1):
+            for k in range(K):
+                if j == j0:
+                    Tb = halo_T[2 * t, k]
+                    Wb = halo_W[2 * t, k]
+                else:
+                    Tb = T[j-1, k]
+                    Wb = W[j-1, k]
+                if j == j1 - 1:
+                    Ta = halo_T[2 * t + 1, k]
+                    Wa = halo_W[2 * t + 1, k]
+                else:
+                    Ta = T[j+1, k]
+                    Wa = W[j+1, k]
+                if j == 0:
+                    Pb = P_m[k]
+                else:
+                    Pb = P[j-1, k]
+                if j == J - 1:
+                    Pa = P_p[k]
+                else:
+                    Pa = P[j+1, k]
+                
+                dT[j, k] = (Ta - Tb) / dz2
+                dW[j, k] = (Wa - Wb) / dz2
+                dP[j, k] = (Pa - Pb) / dz2
+                
+                # Equation (2.10), as temperature()
+                npa_s = npa[k] * npa[k]
+                G_T[j, k] = -T[j, k] * npa_s
+                G_T[j, k] += (Ta - 2.0 * T[j, k] + Tb) / dzs
+                if linear:
+                    G_T[j, k] += npa[k] * P[j, k]
+                
+                # Equation (2.11), as vorticity()
+                G_W[j, k] = (Ra * Pr * npa[k] * T[j, k]) - (Pr * npa[k] * npa[k] * W[j, k])
+                G_W[j, k] += Pr * (Wa - 2.0 * W[j, k] + Wb) / dzs
+            
+            if not linear:
+                galerkin_coupled_row(j, K, G_T, T, dT, P, dP, self.a, 1.0, sin_start, sin_kp, sin_kpp, sin_wV, sin_wO)
+                galerkin_coupled_row(j, K, G_W, W, dW, P, dP, self.a, 1.0, cos_start, cos_kp, cos_kpp, cos_wV, cos_wO)
+            
+            if self._forcing and self._Temperature.fzmi <= j < self._Temperature.fzpi:
+                G_T[j, 0] += -(T[j, 0] - self._Temperature.T_s[j]) / self._Temperature.tau
+        
+        # Then advance the tile, while it is still in cache.
+        for j in range(j0, j1):
+            for k in range(K):
+                T[j, k] = adams_bashforth(T[j, k], G_T[j, k], G_Tp[j, k], delta_time, vdt_T, cT1, cT2)
+                G_Tp[j, k] = G_T[j, k]
+                W[j, k] = adams_bashforth(W[j, k], G_W[j, k], G_Wp[j, k], delta_time, vdt_W, cW1, cW2)
+                G_Wp[j, k] = G_W[j, k]
+        
+        return 0
+    
+    property fused:
+        
+        "Prepare, compute and advance in a single cache-blocked pass."
+        
+        def __set__(self, value):
+            self._fused = value
+        
+        def __get__(self):
+            if self._fused:
+                return True
+            else:
+                return False
+    
     property linear:
         
         "Set the evolver into linear-only mode."
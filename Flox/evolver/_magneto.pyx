@@ -19,91 +19,104 @@ cimport numpy as np
 cimport cython
 from cpython.array cimport array, clone
 from cython.parallel cimport prange
+from libc.math cimport sqrt
 
 from Flox._flox cimport DTYPE_t
 from Flox.evolver._hydro cimport HydroEvolver
 from Flox.component.vectorpotential cimport VectorPotentialSolver
 from Flox.component.currentdensity cimport CurrentDensitySolver
+from Flox.nonlinear.galerkin cimport coupling_table
 
 cdef class MagnetoEvolver(HydroEvolver):
     
     def __cinit__(self, int nz, int nx, DTYPE_t[:] npa, DTYPE_t dz, DTYPE_t a, DTYPE_t safety, int checkCFL):
         
         self._VectorPotential = VectorPotentialSolver(nz, nx)
+        self._VectorPotential.table = coupling_table(nx)
         self._CurrentDensity = CurrentDensitySolver(nz, nx)
         self.maxAlfven = 0.0
     
-    cpdef DTYPE_t delta_time(self):
+    cdef DTYPE_t _delta_time(self) nogil:
         
         cdef DTYPE_t dt_hydro, dt_mdiff, dt_alfven, dt
         if self.timestep_ready:
-            return HydroEvolver.delta_time(self)
-        dt = HydroEvolver.delta_time(self)
+            return HydroEvolver._delta_time(self)
+        dt = HydroEvolver._delta_time(self)
         dt_hydro = self.timestep
         dt_mdiff = (self.dz * self.dz) * self.q / 4.0
         if self.maxAlfven == 0.0:
             self.maxAlfven = self.Q * self.Pr / self.q
-        dt_alfven = self.dz / np.sqrt(self.maxAlfven)
+        dt_alfven = self.dz / sqrt(self.maxAlfven)
         
         # Check the magnetic components of the timestep.
         dt = dt_hydro
-        if dt > dt_mdiff:
+        if dt > dt_mdiff and not self._implicit:
             dt = dt_mdiff
         if dt > dt_alfven:
             dt = dt_alfven
         
         self.timestep = dt
         self.timestep_ready = True
-        return HydroEvolver.delta_time(self)
+        return HydroEvolver._delta_time(self)
         
-    cpdef int prepare(self):
+    cdef int _prepare(self) nogil:
         cdef int r = 0
         
-        r += HydroEvolver.prepare(self)
+        r += HydroEvolver._prepare(self)
         if not self._VectorPotential.ready:
-            r += self._VectorPotential.prepare(self.dz)
-        r += self._CurrentDensity.prepare(self.dz)
+            r += self._VectorPotential._prepare(self.dz)
+        r += self._CurrentDensity._prepare(self.dz)
         return r
         
-    cpdef int compute(self):
+    cdef int _compute(self) nogil:
         cdef int r = 0
         
         # Vector Potential
-        r += self._VectorPotential.compute_base(self.dz, self.npa, self.q)
+        r += self._VectorPotential._compute_base(self.dz, self.npa, self.q)
         if not self._linear:
-            r += self._VectorPotential.compute_nonlinear(self._Stream.V_curr, self._Stream.dVdz, self.a, self.dz)
-        r += self._VectorPotential.compute_linear(self._Stream.dVdz)
+            r += self._VectorPotential._compute_nonlinear(self._Stream.V_curr, self._Stream.dVdz, self.a, self.dz)
+        r += self._VectorPotential._compute_linear(self._Stream.dVdz)
         
         # Hydro Computations
-        r += HydroEvolver.compute(self)
+        r += HydroEvolver._compute(self)
         
         # Lorentz Force
-        r += self._Vorticity.compute_lorentz(self._VectorPotential.V_curr, self._VectorPotential.dVdz, self._CurrentDensity.V_curr, self._CurrentDensity.dVdz, self.a, self.Q, self.Pr, self.q)
+        r += self._Vorticity._compute_lorentz(self._VectorPotential.V_curr, self._VectorPotential.dVdz, self._CurrentDensity.V_curr, self._CurrentDensity.dVdz, self.a, self.Q, self.Pr, self.q)
         
         return r
         
-    cpdef int advance(self, DTYPE_t delta_time):
+    cdef int _advance(self, DTYPE_t delta_time) nogil:
         cdef int r = 0
         # Advance the Hydro Variables
-        r += HydroEvolver.advance(self, delta_time)
+        r += HydroEvolver._advance(self, delta_time)
         # Advance the Vector potential
-        r += self._VectorPotential.advance(delta_time)
+        if self._implicit:
+            r += self._VectorPotentialDiffusion._advance(self._VectorPotential, delta_time, 1.0 / self.q)
+        else:
+            r += self._VectorPotential._advance(delta_time)
         return r
         
-    cpdef int solve(self):
+    cdef int _stage(self, int stage, DTYPE_t delta_time) nogil:
+        cdef int r = 0
+        r += HydroEvolver._stage(self, stage, delta_time)
+        r += self._VectorPotential._stage(stage, delta_time)
+        return r
+        
+    cdef int _solve(self) nogil:
         cdef int r = 0
         # Solve the Stream function.
-        r += HydroEvolver.solve(self)
+        r += HydroEvolver._solve(self)
         
         # Solve the current denstiy function.
-        r += self._VectorPotential.prepare(self.dz) # This is called to set the second-derivatives correctly.
-        r += self._CurrentDensity.compute_base(self._VectorPotential.V_curr, self._VectorPotential.dVdzz, self.npa)
+        r += self._VectorPotential._prepare(self.dz) # This is called to set the second-derivatives correctly.
+        r += self._CurrentDensity._compute_base(self._VectorPotential.V_curr, self._VectorPotential.dVdzz, self.npa)
         
         # If requried, do things to compute the alfven velocity.
         if not self._VectorPotential.transform_ready:
-            r += self._VectorPotential.setup_transform(self.npa)
+            with gil:
+                r += self._VectorPotential.setup_transform(self.npa)
         if not self.timestep_ready:
-            r += self._VectorPotential.compute_alfven(self.Q, self.q, self.Pr)
+            r += self._VectorPotential._compute_alfven(self.Q, self.q, self.Pr)
             self.maxAlfven = self._VectorPotential.maxAlfven
         
         return r
@@ -43,6 +43,8 @@ class Evolver(PacketInterface):
         r = super(Evolver, self).evolve(time, chunksize)
         log.debug("Evolved for {}".format(self.Time-time_start))
         log.debug("Timestep currently {}".format(self.delta_time()))
+        if self.adaptive:
+            log.debug("Rejected {} adaptive timesteps so far".format(self.rejected))
         return r
         
     def evolve_system(self, system, total_time, chunksize=int(1e3), chunks=1000, quiet=False, callback=None):
@@ -20,29 +20,44 @@ cimport cython
 from cpython.array cimport array, clone
 from cython.parallel cimport prange
 
-from Flox._flox cimport DTYPE_t
+from Flox._flox cimport DTYPE_t, mode_major
 
 cpdef int second_derivative2D_nb(int J, int K, DTYPE_t[:,:] ddf, DTYPE_t[:,:] f, DTYPE_t dz, DTYPE_t factor) nogil:
     # Compute the second derivative, but don't handle the boundary points.
     cdef DTYPE_t dzs = dz * dz
     cdef int k, j, r = 0
-    for k in prange(K):
-        for j in range(1, J-1):
+    if mode_major(f):
+        for k in prange(K, schedule='static'):
+            for j in range(1, J-1):
+                ddf[j,k] += factor * (f[j+1,k] - 2.0 * f[j,k] + f[j-1,k])/(dzs)
+        return 0
+    for j in prange(1, J-1, schedule='static'):
+        for k in range(K):
             ddf[j,k] += factor * (f[j+1,k] - 2.0 * f[j,k] + f[j-1,k])/(dzs)
+    return 0
 
 cpdef int second_derivative2D(int J, int K, DTYPE_t[:,:] ddf, DTYPE_t[:,:] f, DTYPE_t dz, DTYPE_t[:] f_p, DTYPE_t[:] f_m, DTYPE_t factor) nogil:
     # Compute the second derivative with known boundary points.
     cdef DTYPE_t dzs = dz * dz
     cdef int k, j, r = 0
     
-    for k in prange(K):
-        j = 0
-        ddf[j,k] += factor * (f[j+1,k] - 2.0 * f[j,k] + f_m[k])/(dzs)
-        for j in range(1, J-1):
+    if mode_major(f):
+        # Each thread walks down z for its modes.
+        for k in prange(K, schedule='static'):
+            ddf[0,k] += factor * (f[1,k] - 2.0 * f[0,k] + f_m[k])/(dzs)
+            for j in range(1, J-1):
+                ddf[j,k] += factor * (f[j+1,k] - 2.0 * f[j,k] + f[j-1,k])/(dzs)
+            ddf[J-1,k] += factor * (f_p[k] - 2.0 * f[J-1,k] + f[J-2,k])/(dzs)
+        return 0
+    
+    # The interior rows are split between threads, and each thread walks along its rows.
+    for j in prange(1, J-1, schedule='static'):
+        for k in range(K):
             ddf[j,k] += factor * (f[j+1,k] - 2.0 * f[j,k] + f[j-1,k])/(dzs)
-        
-        j = J-1
-        ddf[j,k] += factor * (f_p[k] - 2.0 * f[j,k] + f[j-1,k])/(dzs)
+    
+    for k in range(K):
+        ddf[0,k] += factor * (f[1,k] - 2.0 * f[0,k] + f_m[k])/(dzs)
+        ddf[J-1,k] += factor * (f_p[k] - 2.0 * f[J-1,k] + f[J-2,k])/(dzs)
     return 0
 
 cpdef int first_derivative2D(int J, int K, DTYPE_t[:,:] df, DTYPE_t[:,:] f, DTYPE_t dz, DTYPE_t[:] f_p, DTYPE_t[:] f_m, DTYPE_t factor) nogil:
@@ -50,14 +65,21 @@ cpdef int first_derivative2D(int J, int K, DTYPE_t[:,:] df, DTYPE_t[:,:] f, DTYP
     cdef DTYPE_t dzs = 2.0 * dz
     cdef int k, j, r = 0
     
-    for k in prange(K):
-        j = 0
-        df[j,k] += factor * (f[j+1,k] - f_m[k])/(dzs)
-        for j in range(1, J-1):
+    if mode_major(f):
+        for k in prange(K, schedule='static'):
+            df[0,k] += factor * (f[1,k] - f_m[k])/(dzs)
+            for j in range(1, J-1):
+                df[j,k] += factor * (f[j+1,k] - f[j-1,k])/(dzs)
+            df[J-1,k] += factor * (f_p[k] - f[J-2,k])/(dzs)
+        return 0
+    
+    for j in prange(1, J-1, schedule='static'):
+        for k in range(K):
             df[j,k] += factor * (f[j+1,k] - f[j-1,k])/(dzs)
-        
-        j = J-1
-        df[j,k] += factor * (f_p[k] - f[j-1,k])/(dzs)
+    
+    for k in range(K):
+        df[0,k] += factor * (f[1,k] - f_m[k])/(dzs)
+        df[J-1,k] += factor * (f_p[k] - f[J-2,k])/(dzs)
     
     return 0
 
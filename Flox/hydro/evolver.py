@@ -10,7 +10,9 @@
 from __future__ import (absolute_import, unicode_literals, division, print_function)
 
 from ..evolver._hydro import HydroEvolver as _HydroEvolver
+from ..evolver._ensemble import EnsembleEvolver as _EnsembleEvolver
 from ..evolver.base import Evolver
+from ..process._threads import omp_set_num_threads
 
 class HydroBase(Evolver):
     """Base evolver for hydro systems."""
@@ -24,8 +26,11 @@ class HydroBase(Evolver):
         return super(HydroBase, self).get_data_list() + [ "Temperature", "dTemperature", "Vorticity", "dVorticity", "Stream", "Time"]
     
     @classmethod
-    def from_system(cls, system, safety=0.5, checkCFL=10):
+    def from_system(cls, system, safety=0.5, checkCFL=10, galerkin="convolution", implicit=False, fused=None, adaptive=False, tolerance=1e-3, scheme="ab2", cfl_bound=False, threads=None, order="C"):
         """Load the grid parameters into the LE"""
+        if threads is not None:
+            # The evolver may live in its own process, which has its own OpenMP settings.
+            omp_set_num_threads(threads)
         ev = cls(
             system.nz, system.nn,
             system.nondimensionalize(system.npa).value,
@@ -35,6 +40,17 @@ class HydroBase(Evolver):
             checkCFL
             )
         ev.linear = system.linear
+        ev.galerkin = galerkin
+        ev.scheme = scheme
+        ev.implicit = implicit
+        if fused is None:
+            # The fused step pays off once a step's arrays no longer fit in cache.
+            fused = (system.nz * system.nn) >= 8192
+        ev.fused = fused
+        ev.adaptive = adaptive
+        ev.cfl_bound = cfl_bound
+        ev.order = order
+        ev.tolerance = tolerance
         ev.set_T_bounds(*system._T_Bounds())
         if system.forcing:
             ev.set_T_forcing(system.fzmi, system.fzpi, system._T_Stability(), system.nondimensionalize(system.tau_forcing).value)
@@ -46,4 +62,47 @@ class HydroEvolver(HydroBase, _HydroEvolver):
     """Nonlinear evolver"""
     def __init__(self, *args, **kwargs):
         super(HydroEvolver, self).__init__()
-    
\ No newline at end of file
+    
+class EnsembleHydroEvolver(_EnsembleEvolver):
+    """Evolve many hydro systems on the same grid together.
+    
+    Each member keeps its own parameters, e.g. for a sweep over the Rayleigh number.
+    """
+    
+    member = HydroEvolver
+    
+    def __init__(self, *args, **kwargs):
+        super(EnsembleHydroEvolver, self).__init__()
+    
+    def __repr__(self):
+        """Represent this ensemble."""
+        return "<{} of {:d} ({:d}x{:d})>".format(self.__class__.__name__, self.M, self.nz, self.nx)
+    
+    @classmethod
+    def from_systems(cls, systems, **kwargs):
+        """Load each system into a member evolver."""
+        members = []
+        for system in systems:
+            member = cls.member.from_system(system, **kwargs)
+            member.read_packet(system.create_packet())
+            members.append(member)
+        return cls(members)
+    
+    def create_packet(self, m):
+        """Create a packet from a single member."""
+        return self[m].create_packet()
+        
+    def read_packet(self, m, packet):
+        """Read a packet into a single member."""
+        self[m].read_packet(packet)
+        self.bind(m)
+    
+    def evolve_cb(self, total_time, chunksize=int(1e3), chunks=int(1e3), callback=lambda i,m,p : None):
+        """Run the evolution, with a callback for each member after each chunk."""
+        for i in range(chunks):
+            if (self.Time >= total_time).all():
+                break
+            self.evolve(total_time, chunksize)
+            for m in range(self.M):
+                callback(i, m, self.create_packet(m))
+        return i
@@ -18,6 +18,7 @@ from pyshell.astron.units import UnitsProperty, HasUnitsProperties, recompose, C
 from pyshell.util import setup_kwargs, configure_class, resolve
 
 from ..engine.descriptors import SpectralArrayProperty, ArrayProperty
+from ..engine.units import CachedUnitsProperty
 from ..system import System2D
 from ..transform import setup_transform
 from ..component._transform import transform
@@ -69,7 +70,7 @@ class HydroSystem(System2D):
         """Thermal Diffusivity"""
         raise NotImplementedError()
     
-    @ComputedUnitsProperty
+    @CachedUnitsProperty
     def primary_viscosity(self):
         """Primary Viscosity component"""
         if self.kinematic_viscosity > self.thermal_diffusivity:
@@ -196,7 +197,7 @@ class NDSystem2D(HydroSystem):
     Prandtl = UnitsProperty("Prandtl", u.dimensionless_unscaled, latex=r"$Pr$")
     Rayleigh = UnitsProperty("Rayleigh", u.dimensionless_unscaled, latex=r"$Re$")
     
-    @ComputedUnitsProperty
+    @CachedUnitsProperty
     def thermal_diffusivity(self):
         """Thermal Diffusivity"""
         return self.kinematic_viscosity * self.Prandtl
@@ -247,17 +248,17 @@ class PhysicalSystem2D(HydroSystem):
     thermal_expansion = UnitsProperty("thermal expansion", 1.0 / u.K, latex=r"$\alpha$")
     gravitaional_acceleration = UnitsProperty("gravitational acceleration", u.m / u.s**2.0, latex=r"$g$")
     
-    @ComputedUnitsProperty
+    @CachedUnitsProperty
     def width(self):
         """The box width."""
         return self.aspect * self.depth
     
-    @ComputedUnitsProperty
+    @CachedUnitsProperty
     def Prandtl(self):
         """The Prandtl number."""
         return (self.thermal_diffusivity / self.kinematic_viscosity)
     
-    @ComputedUnitsProperty
+    @CachedUnitsProperty
     def Rayleigh(self):
         """The Rayleigh number."""
         return (self.gravitaional_acceleration * self.thermal_expansion * self.deltaT * self.depth**3.0) / (self.thermal_diffusivity * self.kinematic_viscosity)
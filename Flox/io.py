@@ -17,6 +17,34 @@ import six
 import h5py
 from pyshell.util import resolve
 
+def dataset_options(shape, chunks="frame", compression=None, compression_opts=None, shuffle=False):
+    """Keyword arguments to :meth:`h5py.Group.create_dataset` for an array with time as the last axis.
+    
+    :param shape: The full shape of the dataset, including the time axis.
+    :param chunks: ``"frame"`` makes each chunk a single frame, ``(nz, nx, 1)``, so that
+        writing or reading one frame touches one chunk. ``"auto"`` lets h5py guess, ``None``
+        uses contiguous storage, and a tuple sets the chunk shape directly.
+    :param compression: The HDF5 filter, ``None`` (or ``"none"``), ``"lzf"`` or ``"gzip"``.
+    :param compression_opts: Options for the filter, e.g. the gzip level.
+    :param shuffle: Whether to apply the byte-shuffle filter before compression.
+    
+    """
+    options = {}
+    if chunks == "frame":
+        # A chunk per frame of a 1D history would be a chunk per value.
+        options['chunks'] = tuple(shape[:-1]) + (1,) if len(shape) > 1 else True
+    elif chunks == "auto":
+        options['chunks'] = True
+    elif chunks is not None:
+        options['chunks'] = tuple(chunks)
+    if compression not in (None, "none"):
+        options['compression'] = compression
+        if compression_opts is not None:
+            options['compression_opts'] = compression_opts
+    if shuffle:
+        options['shuffle'] = True
+    return options
+
 @six.add_metaclass(abc.ABCMeta)
 class GridWriter(object):
     """A grid writing object."""
@@ -42,20 +70,28 @@ class WriterInterface(object):
     """A mixin for classes which can use a writer interface."""
     
     @staticmethod
-    def _get_writer(writer, filename):
+    def _get_writer(writer, filename, **kwargs):
         """Get a writer class for the appropriate type."""
-        return resolve(writer)(filename)
+        return resolve(writer)(filename, **kwargs)
     
-    def write(self, writer, filename, dataname):
+    def write(self, writer, filename, dataname, **kwargs):
         """Get the writer and write!"""
-        self._get_writer(writer, filename).write(self, dataname)
+        self._get_writer(writer, filename, **kwargs).write(self, dataname)
     
-    def read(self, writer, filename, dataname):
+    def read(self, writer, filename, dataname, **kwargs):
         """Read based on a reader class."""
-        self._get_writer(writer, filename).read(self, dataname)
+        self._get_writer(writer, filename, **kwargs).read(self, dataname)
 
 class HDF5Writer(GridWriter):
-    """Write an HDF5 file."""
+    """Write an HDF5 file.
+    
+    The storage options are passed to :func:`dataset_options`. By default, each chunk
+    holds a single frame, so that reading a frame for an animation is a single chunk read.
+    """
+    
+    def __init__(self, filename, chunks="frame", compression="gzip", compression_opts=None, shuffle=False):
+        super(HDF5Writer, self).__init__(filename)
+        self.storage = dict(chunks=chunks, compression=compression, compression_opts=compression_opts, shuffle=shuffle)
     
     def write(self, data, name=""):
         """Write the data to a file."""
@@ -74,11 +110,12 @@ class HDF5Writer(GridWriter):
         """Write the array object"""
         array_obj = getattr(type(data), array_name)
         array_data = data.engine[array_name]
+        options = dataset_options(array_data.shape, **self.storage)
         try:
-            dataset = group.require_dataset(array_name, array_data.shape, compression="gzip", dtype=array_data.dtype)
+            dataset = group.require_dataset(array_name, array_data.shape, dtype=array_data.dtype, **options)
         except TypeError as e:
             del group[array_name]
-            dataset = group.create_dataset(array_name, array_data.shape, compression="gzip", dtype=array_data.dtype)
+            dataset = group.create_dataset(array_name, array_data.shape, dtype=array_data.dtype, **options)
         dataset[...] = array_data
         dataset.attrs['name'] = six.text_type(array_obj.name)
         dataset.attrs['unit'] = six.text_type(array_obj.unit)
@@ -11,6 +11,7 @@ from __future__ import (absolute_import, unicode_literals, division, print_funct
 
 from ._magneto import MagnetoEvolver as _MagnetoEvolver
 from ..evolver.base import Evolver
+from ..process._threads import omp_set_num_threads
 
 class MagnetoEvolver(_MagnetoEvolver, Evolver):
     """Nonlinear evolver"""
@@ -27,8 +28,11 @@ class MagnetoEvolver(_MagnetoEvolver, Evolver):
         return [ "Temperature", "dTemperature", "Vorticity", "dVorticity", "Stream", "VectorPotential", "dVectorPotential", "CurrentDensity", "Time"]
     
     @classmethod
-    def from_system(cls, system, safety=0.5, checkCFL=10, LinearOnly=False):
+    def from_system(cls, system, safety=0.5, checkCFL=10, LinearOnly=False, threads=None):
         """Load the grid parameters into the LE"""
+        if threads is not None:
+            # The evolver may live in its own process, which has its own OpenMP settings.
+            omp_set_num_threads(threads)
         ev = cls(
             system.nz, system.nn,
             system.nondimensionalize(system.npa).value,
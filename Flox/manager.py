@@ -16,7 +16,6 @@ import numpy as np
 import numpy.random
 import os
 
-import multiprocessing.managers as mm
 import multiprocessing as mp
 
 from logging import getLogger
@@ -29,9 +28,11 @@ from pkg_resources import resource_listdir
 from .ic import InitialConditioner
 from .input import FloxConfiguration
 from .process.manager import AsynchronousManager
+from .process.shared import SharedPacketRing
+from .process.channel import DirectQueue, FanOut
 from .process.evolver import EvolverManager
 from .plot import MultiViewController
-from .process._threads import omp_set_num_threads, omp_get_num_threads
+from .process._threads import omp_set_num_threads, omp_get_max_threads
 
 log = getLogger(__name__)
 
@@ -66,7 +67,7 @@ class FloxManager(object):
         if self.opt.num_threads != 1:
             log.info("Setting 'OMP_NUM_THREADS'={}".format(self.opt.num_threads))
         omp_set_num_threads(self.opt.num_threads)
-        log.debug("Got 'OMP_NUM_THREADS'={}".format(omp_get_num_threads()))
+        log.debug("Got 'OMP_NUM_THREADS'={}".format(omp_get_max_threads()))
         
     def run(self):
         """Run this management object."""
@@ -100,6 +101,8 @@ class FloxManager(object):
                 self.mo_evolve(System, debug=self.opt.debug)
             else:
                 self.mp_evolve(System, debug=self.opt.debug)
+        elif getattr(System.engine, 'persistent', False):
+            log.info("Using {} iterations from the engine".format(System.engine.iterations))
         else:
             log.info("Reading")
             System.read(**self.config.get('write',{}))
@@ -119,6 +122,7 @@ class FloxManager(object):
         evolver = resolve(self.config['evolve.class'])
         EV = evolver.from_system(System, **self.config.get('evolve.settings',{}))
         EV.evolve_system(System, self.config['evolve.time'], chunks=int(self.config.get('evolve.nt',System.engine.free)), chunksize=int(self.config.get('evolve.iterations',1)), quiet=debug)
+        System.engine.flush()
         if self.config.get('write', False) is not False:
             System.write(**self.config.get('write',{}))
     
@@ -140,9 +144,6 @@ class FloxManager(object):
         
         # Launch the necessary managers.
         
-        # Queue Synchronization Manager
-        SM = mm.SyncManager()
-        
         # Evolution Manager
         EM = EvolverManager()
         evolver = resolve(self.config['evolve.class'])
@@ -160,39 +161,49 @@ class FloxManager(object):
             AM.name = AM.name.replace("AsynchronousManager", "AnimationManager")
             AM.register(MultiViewController.__name__, MultiViewController.from_config)
         
+        ring = None
         try:
             # Start all of the processes.
-            SM.start()
             EM.start()
-            Qs = []
             # Set up writing
             WM.start()
+            # Packets go from the evolver to each consumer through a pipe.
+            Qs = [DirectQueue()]
             # Set up animation
             if animate:
                 AM.start()
-                AQ = SM.Queue()
-                Qs.append(AQ)
+                Qs.append(DirectQueue())
+            
+            # Frames go through shared memory, and only the slot numbers go through the pipes.
+            if self.config.get('evolve.transport', 'shared') == 'shared':
+                # The writer needs every frame, but the animation only needs the newest one.
+                policies = ['block', self.config.get('animate.policy', 'latest')][:len(Qs)]
+                ring = SharedPacketRing.from_system(System, Qs, slots=int(self.config.get('evolve.slots', 8)), policies=policies)
+                producer = ring
+                readers = [ ring.consumer(i) for i in range(len(Qs)) ]
+            else:
+                producer = FanOut(Qs)
+                readers = Qs
             
-            # Set up writing.
-            WQ = SM.Queue()
-            Qs.append(WQ)
+            # Launch the reader. It is reading before the initial state is sent, so that a full pipe can't block.
             WS = WM.send(System)
-            WQ.put(System.create_packet())
+            WS.read_queue(readers[0], timeout=60)
+            producer.put(System.create_packet(), consumers=[0])
+            
             # Launch the evolver.
-            EV = getattr(EM, evolver.__name__)(System, **self.config.get('evolve.settings',{}))
+            settings = dict(self.config.get('evolve.settings',{}))
+            settings.setdefault('threads', self.opt.num_threads)
+            EV = getattr(EM, evolver.__name__)(System, **settings)
             EV.read_packet(System.create_packet())
             nd_time = System.nondimensionalize(self.config['evolve.time'] + System.time).value
-            EV.evolve_queues(nd_time, chunks=int(self.config.get('evolve.nt',System.engine.free)), chunksize=int(self.config.get('evolve.iterations',1)), queues=Qs)
-            
-            # Launch the reader
-            WS.read_queue(WQ, timeout=60)
+            EV.evolve_queues(nd_time, chunks=int(self.config.get('evolve.nt',System.engine.free)), chunksize=int(self.config.get('evolve.iterations',1)), queues=[producer])
             
             # Launch the animator
             if animate:
                 ASystem = copy.copy(System)
                 ASystem.engine = "Flox.array.NumpyFrameEngine"
                 MVC = getattr(AM, MultiViewController.__name__)(self.config['animate'].store)
-                MVC.animate(System, AQ, buffer=self.config.get('animate.buffer',10), timeout=self.config.get('animate.timeout',2), **self.config.get('animate.view',{}))
+                MVC.animate(System, readers[1], buffer=self.config.get('animate.buffer',10), timeout=self.config.get('animate.timeout',2), **self.config.get('animate.view',{}))
             
             if writing:
                 WS.write(**self.config.get('write',{}))
@@ -204,6 +215,7 @@ class FloxManager(object):
                 AM.shutdown()
             WM.shutdown()
             EM.shutdown()
-            SM.shutdown()
+            if ring is not None:
+                ring.close()
         
         
\ No newline at end of file
@@ -18,4 +18,20 @@ from Flox._flox cimport DTYPE_t
 
 cpdef int galerkin_cos_grad_sin(int J, int K, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t[:] npa, DTYPE_t factor) nogil
 
-cpdef int galerkin_cos_grad_cos(int J, int K, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t factor) nogil
\ No newline at end of file
+cpdef int galerkin_cos_grad_cos(int J, int K, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t factor) nogil
+
+cpdef int galerkin_coupled(int J, int K, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t factor, int[:] start, int[:] kp, int[:] kpp, DTYPE_t[:] wV, DTYPE_t[:] wO) nogil
+
+cdef int galerkin_coupled_row(int j, int K, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t factor, int[:] start, int[:] kp, int[:] kpp, DTYPE_t[:] wV, DTYPE_t[:] wO) nogil
+
+cdef class CouplingTable:
+    cdef readonly int K
+    cdef readonly int[:] sin_start, sin_kp, sin_kpp
+    cdef readonly DTYPE_t[:] sin_wV, sin_wO
+    cdef readonly int[:] cos_start, cos_kp, cos_kpp
+    cdef readonly DTYPE_t[:] cos_wV, cos_wO
+    
+    cdef int cos_grad_sin(self, int J, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t factor) nogil
+    cdef int cos_grad_cos(self, int J, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t factor) nogil
+
+cpdef CouplingTable coupling_table(int K)
@@ -28,7 +28,7 @@ cpdef int galerkin_cos_grad_sin(int J, int K, DTYPE_t[:,:] G_curr, DTYPE_t[:,:]
     cdef int j, k, kp, kpp
     cdef DTYPE_t p2a = pi / (2.0 * a)
     
-    for j in prange(J, nogil=True):
+    for j in prange(J):
     
         for k in range(K):
             # n=0 special case.
@@ -60,7 +60,7 @@ cpdef int galerkin_cos_grad_cos(int J, int K, DTYPE_t[:,:] G_curr, DTYPE_t[:,:]
     cdef int j, k, kp, kpp
     cdef DTYPE_t p2a = pi / (2.0 * a)
     
-    for j in prange(J, nogil=True):
+    for j in prange(J):
         for k in range(K):
             for kp in range(1, K):
                 # 1st term, 1st delta
@@ -77,3 +77,110 @@ cpdef int galerkin_cos_grad_cos(int J, int K, DTYPE_t[:,:] G_curr, DTYPE_t[:,:]
                     G_curr[j, k] += -factor * p2a * (kp * dOdz[j, kpp] * V_curr[j, kp] + kpp * O_curr[j, kpp] * dVdz[j, kp])
                     
     return 0
+
+
+cpdef int galerkin_coupled(int J, int K, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t factor, int[:] start, int[:] kp, int[:] kpp, DTYPE_t[:] wV, DTYPE_t[:] wO) nogil:
+    
+    cdef int j
+    
+    for j in prange(J):
+        galerkin_coupled_row(j, K, G_curr, V_curr, dVdz, O_curr, dOdz, a, factor, start, kp, kpp, wV, wO)
+    
+    return 0
+
+cdef int galerkin_coupled_row(int j, int K, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t factor, int[:] start, int[:] kp, int[:] kpp, DTYPE_t[:] wV, DTYPE_t[:] wO) nogil:
+    
+    cdef int k, t
+    cdef DTYPE_t s
+    cdef DTYPE_t p2a = pi / (2.0 * a)
+    
+    # Each mode k sums the precomputed (kp, kpp) couplings between start[k] and start[k+1].
+    for k in range(K):
+        s = 0.0
+        for t in range(start[k], start[k+1]):
+            s = s + wV[t] * dOdz[j, kpp[t]] * V_curr[j, kp[t]] + wO[t] * O_curr[j, kpp[t]] * dVdz[j, kp[t]]
+        G_curr[j, k] += -factor * p2a * s
+    
+    return 0
+
+def _coupling_arrays(int K, terms):
+    """Merge coupling terms into compressed arrays sorted by mode."""
+    cdef int k
+    merged = {}
+    for k, kp, kpp, wV, wO in terms:
+        weights = merged.setdefault((k, kp, kpp), [0.0, 0.0])
+        weights[0] += wV
+        weights[1] += wO
+    keys = sorted(key for key, weights in merged.items() if weights != [0.0, 0.0])
+    start = np.zeros((K + 1,), dtype=np.intc)
+    for k, kp, kpp in keys:
+        start[k+1] += 1
+    start = np.cumsum(start).astype(np.intc)
+    kp = np.array([ key[1] for key in keys ], dtype=np.intc)
+    kpp = np.array([ key[2] for key in keys ], dtype=np.intc)
+    wV = np.array([ merged[key][0] for key in keys ], dtype=np.float)
+    wO = np.array([ merged[key][1] for key in keys ], dtype=np.float)
+    return start, kp, kpp, wV, wO
+
+def _cos_grad_sin_terms(int K):
+    """Enumerate the valid couplings of galerkin_cos_grad_sin, without the -factor * p2a scale."""
+    cdef int k, kp, kpp
+    for k in range(K):
+        # n=0 special case.
+        yield (0, k, k, k, k)
+        # Terms applied everywhere, npa[k] = 2 * p2a * k
+        yield (k, 0, k, 0.0, 2.0 * k)
+        for kp in range(1, K):
+            kpp = k - kp
+            if 0 < kpp < K:
+                yield (k, kp, kpp, -kp, kpp)
+            kpp = kp + k
+            if 0 < kpp < K:
+                yield (k, kp, kpp, kp, kpp)
+            kpp = kp - k
+            if 0 < kpp < K:
+                yield (k, kp, kpp, kp, kpp)
+
+def _cos_grad_cos_terms(int K):
+    """Enumerate the valid couplings of galerkin_cos_grad_cos, without the -factor * p2a scale."""
+    cdef int k, kp, kpp
+    for k in range(K):
+        for kp in range(1, K):
+            kpp = k - kp
+            if 0 < kpp < K:
+                yield (k, kp, kpp, -kp, kpp)
+            kpp = kp + k
+            if 0 < kpp < K:
+                yield (k, kp, kpp, -kp, -kpp)
+            kpp = kp - k
+            if 0 < kpp < K:
+                yield (k, kp, kpp, kp, kpp)
+
+cdef class CouplingTable:
+    """Valid (k, kp, kpp) couplings of the Galerkin convolution for K modes."""
+    
+    def __cinit__(self, int K):
+        self.K = K
+        self.sin_start, self.sin_kp, self.sin_kpp, self.sin_wV, self.sin_wO = _coupling_arrays(K, _cos_grad_sin_terms(K))
+        self.cos_start, self.cos_kp, self.cos_kpp, self.cos_wV, self.cos_wO = _coupling_arrays(K, _cos_grad_cos_terms(K))
+    
+    cdef int cos_grad_sin(self, int J, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t factor) nogil:
+        return galerkin_coupled(J, self.K, G_curr, V_curr, dVdz, O_curr, dOdz, a, factor, self.sin_start, self.sin_kp, self.sin_kpp, self.sin_wV, self.sin_wO)
+    
+    cdef int cos_grad_cos(self, int J, DTYPE_t[:,:] G_curr, DTYPE_t[:,:] V_curr, DTYPE_t[:,:] dVdz, DTYPE_t[:,:] O_curr, DTYPE_t[:,:] dOdz, DTYPE_t a, DTYPE_t factor) nogil:
+        return galerkin_coupled(J, self.K, G_curr, V_curr, dVdz, O_curr, dOdz, a, factor, self.cos_start, self.cos_kp, self.cos_kpp, self.cos_wV, self.cos_wO)
+    
+    property size:
+        
+        "Number of couplings stored for each kernel."
+        
+        def __get__(self):
+            return (self.sin_kp.shape[0], self.cos_kp.shape[0])
+
+_coupling_tables = {}
+
+cpdef CouplingTable coupling_table(int K):
+    """Return the coupling table for K modes, shared between all callers."""
+    if K not in _coupling_tables:
+        _coupling_tables[K] = CouplingTable(K)
+    return _coupling_tables[K]
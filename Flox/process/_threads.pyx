@@ -15,4 +15,7 @@ cpdef int omp_get_num_threads():
 
 cpdef int omp_set_num_threads(int threads):
     openmp.omp_set_num_threads(threads)
-    return 0
\ No newline at end of file
+    return 0
+
+cpdef int omp_get_max_threads():
+    return openmp.omp_get_max_threads()
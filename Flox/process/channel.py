@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#
+#  channel.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-22.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+"""
+Direct channels between processes.
+"""
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import multiprocessing as mp
+from six.moves import cPickle as pickle
+from six.moves import queue
+
+class DirectQueue(object):
+    """A one-way pipe from one process to another, with the put and get methods of a queue.
+
+    Items go straight through the pipe, rather than through a manager process. The pipe
+    ends can be sent to processes which are already running, e.g. as arguments to
+    asynchronous calls. There is a single producer and a single consumer, and :meth:`put`
+    waits while the pipe is full.
+    """
+
+    def __init__(self):
+        super(DirectQueue, self).__init__()
+        self._reader, self._writer = mp.Pipe(duplex=False)
+
+    def put(self, item):
+        """Send an item."""
+        self.put_bytes(pickle.dumps(item, pickle.HIGHEST_PROTOCOL))
+
+    def put_bytes(self, data):
+        """Send an item which has already been pickled."""
+        self._writer.send_bytes(data)
+
+    def get(self, block=True, timeout=None):
+        """Wait for the next item. Raises :exc:`queue.Empty` if it doesn't arrive in time."""
+        if not self._reader.poll(timeout if block else 0):
+            raise queue.Empty
+        return pickle.loads(self._reader.recv_bytes())
+
+    def get_nowait(self):
+        """Get the next item if it is ready."""
+        return self.get(False)
+
+class FanOut(object):
+    """Put each item on several direct queues, pickling it only once."""
+
+    def __init__(self, queues):
+        super(FanOut, self).__init__()
+        self.queues = list(queues)
+
+    def put(self, item, consumers=None):
+        """Send an item to the queues (all of them by default)."""
+        data = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        for index in (range(len(self.queues)) if consumers is None else consumers):
+            self.queues[index].put_bytes(data)
+
@@ -47,7 +47,7 @@ class AsynchronousProxy(LocalMessageReciever):
         self._input = input_queue
         self._output_sync = output_sync
         self._output_async = output_async
-        self.async = True
+        self.asynchronous = True
         
     def _call_async(self, method, args, kwargs):
         """Make an asynchronous call to the worker."""
@@ -64,7 +64,7 @@ class AsynchronousProxy(LocalMessageReciever):
         
     def __getattr__(self, method):
         """Attribute access """
-        if self.async:
+        if self.asynchronous:
             _call = self._call_async
         else:
             _call = self._call_sync
@@ -71,7 +71,7 @@ class PacketInterface(PickleInterface):
             try:
                 self.read_packet(queue.get(timeout=timeout))
             except Empty as e:
-                raise StopIteration("Queue is Empty")
+                return
             else:
                 yield self
         
@@ -88,7 +88,7 @@ class PacketInterface(PickleInterface):
             try:
                 self.read_packet(queue.get(timeout=timeout))
             except Empty as e:
-                raise StopIteration("Queue is Empty")
+                return
             else:
                 yield self
         
\ No newline at end of file
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+#
+#  shared.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-21.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+"""
+Packets passed between processes through shared memory.
+"""
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import time
+import collections
+import numpy as np
+from multiprocessing import shared_memory
+from six.moves import queue
+
+_ALIGN = 64
+
+def _align(size):
+    """Round a size up to a cache line."""
+    return -(-size // _ALIGN) * _ALIGN
+
+class SharedPacketRing(object):
+    """A ring of frame slots in shared memory, which carries packets from one producer to several consumers.
+
+    Each packet is copied into a free slot, and only the slot index is sent through each
+    consumer's queue. Every consumer has a flag for each slot. The flag is set when the
+    slot is sent to that consumer, and cleared when the consumer is done with it. A slot
+    is reused only when all of its flags are clear, so the producer waits while every
+    slot is in use.
+
+    That is the ``'block'`` policy, for consumers which need every frame, like writers.
+    Consumers with the ``'latest'`` policy, like live animation, never hold up the producer.
+    They share one extra slot, which always has the newest frame. It is guarded by a
+    sequence number, which is odd while a frame is being written, so that consumers can
+    copy a whole frame without a lock. Frames which arrive while a ``'latest'`` consumer
+    is busy are skipped.
+
+    The ring can be pickled and sent to other processes, which attach to the same
+    shared memory. The queues must survive the trip, e.g. :class:`~Flox.process.channel.DirectQueue`.
+
+    :param shapes: A mapping of array names to the shape of one frame.
+    :param queues: One queue for each consumer. ``'latest'`` consumers don't use their queue.
+    :param slots: The number of frames in the ring.
+    :param dtype: The dtype of every array.
+    :param poll: Interval, in seconds, at which the producer checks for a free slot, and
+        ``'latest'`` consumers check for a new frame.
+    :param policies: The policy for each consumer, ``'block'`` (the default) or ``'latest'``.
+    """
+
+    policies = ('block', 'latest')
+
+    def __init__(self, shapes, queues, slots=8, dtype=np.float64, poll=1e-3, policies=None):
+        super(SharedPacketRing, self).__init__()
+        self._shapes = collections.OrderedDict((name, tuple(shapes[name])) for name in sorted(shapes))
+        self._queues = list(queues)
+        self._slots = slots
+        self._dtype = np.dtype(dtype)
+        self._poll = poll
+        self._policies = list(policies) if policies is not None else ['block'] * len(self._queues)
+        if len(self._policies) != len(self._queues):
+            raise ValueError("Got {} policies for {} consumers.".format(len(self._policies), len(self._queues)))
+        for policy in self._policies:
+            if policy not in self.policies:
+                raise ValueError("Policy '{}' should be one of {!r}".format(policy, self.policies))
+        self._next = 0
+        offsets, size = self._layout()
+        self._memory = shared_memory.SharedMemory(create=True, size=size)
+        self._owner = True
+        self._setup_arrays()
+        self._flags[...] = 0
+        self._sequence[...] = 0
+
+    @classmethod
+    def from_system(cls, system, queues, slots=8, **kwargs):
+        """Create a ring with slots for each of the arrays in a system."""
+        shapes = { name:getattr(type(system), name).shape(system) for name in system.list_arrays() }
+        return cls(shapes, queues, slots=slots, **kwargs)
+
+    def __getstate__(self):
+        """Pickle the description of the ring, but not its contents."""
+        return dict(name=self._memory.name, shapes=self._shapes, queues=self._queues, slots=self._slots, dtype=self._dtype, poll=self._poll, policies=self._policies)
+
+    def __setstate__(self, state):
+        """Attach to the shared memory of the pickled ring."""
+        self._shapes = state['shapes']
+        self._queues = state['queues']
+        self._slots = state['slots']
+        self._dtype = state['dtype']
+        self._poll = state['poll']
+        self._policies = state['policies']
+        self._next = 0
+        self._memory = shared_memory.SharedMemory(name=state['name'])
+        self._owner = False
+        self._setup_arrays()
+
+    def _layout(self):
+        """The offset of each array in the shared block, and the total size of the block."""
+        offsets = {}
+        offsets['#sequence'] = _align(self._slots * len(self._queues))
+        size = offsets['#sequence'] + _ALIGN
+        for name, shape in self._shapes.items():
+            offsets[name] = size
+            size += _align(self._rows * int(np.prod(shape)) * self._dtype.itemsize)
+        return offsets, size
+
+    @property
+    def _rows(self):
+        """The number of frames in the shared block, including the slot for 'latest' consumers."""
+        return self._slots + int('latest' in self._policies)
+
+    def _setup_arrays(self):
+        """Set up the flags and frame arrays as views of the shared block."""
+        offsets, size = self._layout()
+        self._flags = np.ndarray((self._slots, len(self._queues)), dtype=np.uint8, buffer=self._memory.buf)
+        self._sequence = np.ndarray((1,), dtype=np.int64, buffer=self._memory.buf, offset=offsets['#sequence'])
+        self._arrays = collections.OrderedDict()
+        for name, shape in self._shapes.items():
+            self._arrays[name] = np.ndarray((self._rows,) + shape, dtype=self._dtype, buffer=self._memory.buf, offset=offsets[name])
+
+    @property
+    def consumers(self):
+        """The number of consumers."""
+        return len(self._queues)
+
+    def policy(self, index):
+        """The policy for a consumer."""
+        return self._policies[index]
+
+    def consumer(self, index):
+        """The queue-like end of the ring for a single consumer."""
+        return SharedPacketQueue(self, index)
+
+    def packet(self, slot):
+        """The packet in a slot, as views of the shared arrays."""
+        return { name:array[slot] for name, array in self._arrays.items() }
+
+    def _acquire(self):
+        """Wait for a free slot."""
+        while True:
+            for i in range(self._slots):
+                slot = (self._next + i) % self._slots
+                if not self._flags[slot].any():
+                    self._next = (slot + 1) % self._slots
+                    return slot
+            time.sleep(self._poll)
+
+    def put(self, packet, consumers=None):
+        """Copy a packet into a free slot, and send it to the consumers (all of them by default)."""
+        consumers = list(range(self.consumers) if consumers is None else consumers)
+        blocking = [ consumer for consumer in consumers if self._policies[consumer] == 'block' ]
+        if blocking:
+            slot = self._acquire()
+            for name, array in self._arrays.items():
+                array[slot] = packet[name]
+            self._flags[slot, blocking] = 1
+            for consumer in blocking:
+                self._queues[consumer].put(slot)
+        if len(blocking) < len(consumers):
+            self._publish(packet)
+
+    def _publish(self, packet):
+        """Replace the newest frame for 'latest' consumers."""
+        self._sequence[0] += 1
+        for name, array in self._arrays.items():
+            array[self._slots] = packet[name]
+        self._sequence[0] += 1
+
+    def latest(self, seen=0):
+        """A copy of the newest frame, and its sequence number, if it is newer than `seen`. Otherwise None."""
+        sequence = int(self._sequence[0])
+        if sequence == seen or sequence % 2:
+            return None
+        packet = { name:np.array(array[self._slots], copy=True) for name, array in self._arrays.items() }
+        if int(self._sequence[0]) != sequence:
+            # The frame was replaced while it was copied.
+            return None
+        return sequence, packet
+
+    def release(self, slot, consumer):
+        """Mark a consumer as done with a slot."""
+        self._flags[slot, consumer] = 0
+
+    def close(self):
+        """Detach from the shared memory. The process which created the ring also frees it."""
+        self._flags = None
+        self._arrays = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+class SharedPacketQueue(object):
+    """One consumer's end of a :class:`SharedPacketRing`, with the ``get`` methods of a queue.
+
+    For ``'block'`` consumers, packets are views of a slot in shared memory. They are valid
+    until the next call to :meth:`get`, which hands the slot back to the producer. Consumers
+    copy packets into their own arrays with ``read_packet``, so they can be used with
+    :meth:`~Flox.process.packet.PacketInterface.read_queue`. For ``'latest'`` consumers,
+    :meth:`get` waits for a frame newer than the last one, and returns a copy.
+    """
+
+    def __init__(self, ring, index):
+        super(SharedPacketQueue, self).__init__()
+        self.ring = ring
+        self.index = index
+        self._slot = None
+        self._seen = 0
+
+    def get(self, block=True, timeout=None):
+        """Release the previous packet, and wait for the next one."""
+        self.release()
+        if self.ring.policy(self.index) == 'latest':
+            return self._get_latest(block, timeout)
+        self._slot = self.ring._queues[self.index].get(block, timeout)
+        return self.ring.packet(self._slot)
+
+    def _get_latest(self, block, timeout):
+        """Wait for a frame newer than the last one."""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            latest = self.ring.latest(self._seen)
+            if latest is not None:
+                self._seen, packet = latest
+                return packet
+            if not block or (deadline is not None and time.time() >= deadline):
+                raise queue.Empty
+            time.sleep(self.ring._poll)
+
+    def get_nowait(self):
+        """Release the previous packet, and get the next one if it is ready."""
+        return self.get(False)
+
+    def release(self):
+        """Hand the current slot back to the producer."""
+        if self._slot is not None:
+            self.ring.release(self._slot, self.index)
+            self._slot = None
+
@@ -23,7 +23,7 @@ from .engine.core import EngineInterface
 from .io import WriterInterface
 from .util import fullname
 from .process.packet import PacketInterface
-from .engine.units import WithUnitBases
+from .engine.units import WithUnitBases, CachedUnitsProperty
 
 @six.add_metaclass(abc.ABCMeta)
 class SystemBase(EngineInterface, WriterInterface, HasUnitsProperties, WithUnitBases):
@@ -77,7 +77,7 @@ class System2D(SystemBase):
         """Box depth"""
         raise NotImplementedError()
         
-    @ComputedUnitsProperty
+    @CachedUnitsProperty
     def dz(self):
         """The z-grid spacing"""
         return self.depth / (self.nz + 2)
@@ -91,17 +91,17 @@ class System2D(SystemBase):
         """The aspect ratio of the box."""
         raise NotImplementedError()
     
-    @ComputedUnitsProperty
+    @CachedUnitsProperty
     def width(self):
         """The box width."""
         return self.aspect * self.depth
         
-    @ComputedUnitsProperty
+    @CachedUnitsProperty
     def dx(self):
         """x grid spacing."""
         return self.width / self.nn
     
-    @ComputedUnitsProperty
+    @CachedUnitsProperty
     def npa(self):
         """(n * pi / a)"""
         return np.arange(self.nn).astype(np.float) * np.pi / self.aspect
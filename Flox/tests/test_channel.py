@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+#
+#  test_channel.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-22.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import numpy as np
+import multiprocessing as mp
+from six.moves import queue
+
+import pytest
+
+from Flox.process.channel import DirectQueue, FanOut
+
+def echo(source, destination):
+    """Send an item back from another process."""
+    destination.put(source.get(timeout=10))
+
+def test_fan_out():
+    """Every queue recieves the item."""
+    queues = [DirectQueue(), DirectQueue()]
+    producer = FanOut(queues)
+    producer.put({'Temperature':np.ones((12, 10))})
+    producer.put({'Temperature':np.zeros((12, 10))}, consumers=[1])
+    assert np.all(queues[0].get()['Temperature'] == 1.0)
+    with pytest.raises(queue.Empty):
+        queues[0].get_nowait()
+    assert np.all(queues[1].get()['Temperature'] == 1.0)
+    assert np.all(queues[1].get(timeout=1)['Temperature'] == 0.0)
+
+def test_direct_queue_process():
+    """Direct queues work between processes."""
+    source, destination = DirectQueue(), DirectQueue()
+    process = mp.Process(target=echo, args=(source, destination))
+    process.start()
+    source.put(np.arange(10))
+    assert np.all(destination.get(timeout=10) == np.arange(10))
+    process.join()
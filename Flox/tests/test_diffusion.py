@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+#
+#  test_diffusion.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-14.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import numpy as np
+import numpy.random
+
+import pytest
+
+def diffusion_matrix(nz, dz, npa_k, neumann):
+    """Dense matrix for the z diffusion of one mode."""
+    L = np.diag(-2.0 * np.ones(nz)) + np.diag(np.ones(nz-1), 1) + np.diag(np.ones(nz-1), -1)
+    if neumann:
+        L[0,1] = 2.0
+        L[-1,-2] = 2.0
+    return L / (dz * dz) - np.eye(nz) * npa_k * npa_k
+
+@pytest.mark.parametrize("neumann", [False, True])
+def test_diffusion_solver(neumann):
+    """Crank-Nicolson diffusion step against a dense solve."""
+    from Flox.component.temperature import TemperatureSolver
+    from Flox.component.diffusion import DiffusionSolver
+    nz, nx, a, deltaT, diffusivity = 12, 5, 2.0, 1e-2, 0.7
+    dz = 1.0 / (nz + 1)
+    npa = np.arange(nx) * np.pi / a
+    V_curr = np.random.randn(nz, nx)
+    V_p = np.zeros((nx,)) if neumann else np.random.randn(nx)
+    V_m = np.zeros((nx,)) if neumann else np.random.randn(nx)
+
+    solver = TemperatureSolver(nz, nx)
+    solver.Value = V_curr
+    solver.Value_p = V_p
+    solver.Value_m = V_m
+    solver.implicit = True
+    assert not solver.prepare(dz)
+    assert not solver.compute_base(dz, npa)
+
+    diffusion = DiffusionSolver(nz, nx)
+    assert not diffusion.setup(dz, npa, neumann)
+    assert not diffusion.advance(solver, deltaT, diffusivity)
+
+    for k in range(nx):
+        A = diffusion_matrix(nz, dz, npa[k], neumann)
+        rhs = V_curr[:,k] + 0.5 * deltaT * diffusivity * np.dot(A, V_curr[:,k])
+        rhs[0] += deltaT * diffusivity * V_m[k] / (dz * dz)
+        rhs[-1] += deltaT * diffusivity * V_p[k] / (dz * dz)
+        expected = np.linalg.solve(np.eye(nz) - 0.5 * deltaT * diffusivity * A, rhs)
+        assert np.allclose(solver.Value[:,k], expected)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+#  test_engine.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-18.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import os, os.path
+import numpy as np
+
+import pytest
+
+from .test_system import system_from_args
+
+memmap_args = dict(nx=10, nz=12, nn=10, deltaT=1, depth=1, aspect=1, Prandtl=1, Rayleigh=1, kinematic_viscosity=1)
+
+def memmap_system(directory, layout, **kwargs):
+    """Create a system backed by a memmap engine."""
+    from Flox.hydro.system import NDSystem2D
+    engine = {'()':'Flox.engine.memmap.MemmapArrayEngine', 'directory':directory, 'layout':layout}
+    engine.update(kwargs)
+    return system_from_args(NDSystem2D, dict(memmap_args), dict(engine=engine))
+
+@pytest.mark.parametrize("layout", ['time-last', 'time-first'])
+def test_memmap_engine(tmpdir, layout):
+    """Write to a memmap engine, then reopen it read-only."""
+    directory = str(tmpdir)
+    system = memmap_system(directory, layout, length=5)
+    for i in range(1, 4):
+        packet = {}
+        for name in system.engine.get_data_list():
+            packet[name] = np.ones(system.engine[name].shape[:-1]) * i
+        system.read_packet(packet)
+    system.engine.flush()
+    assert system.engine.iterations == 3
+
+    if layout == 'time-first':
+        assert np.load(os.path.join(directory, "Temperature.npy")).shape == (5, 12, 10)
+
+    view = memmap_system(directory, layout, mode='r')
+    assert view.engine.persistent
+    assert view.engine.length == 5
+    assert view.engine.iterations == 3
+    for name in system.engine.get_data_list():
+        assert np.all(view.engine[name][...,2] == 2.0)
+        with pytest.raises(ValueError):
+            view.engine[name][...,4] = 1.0
+
+@pytest.mark.parametrize("compression", [None, 'lzf'])
+def test_hdf5_engine(tmpdir, compression):
+    """Write to an HDF5 engine from a single background thread."""
+    import h5py
+    import threading
+    from Flox.hydro.system import NDSystem2D
+    filename = str(tmpdir.join("engine.hdf5"))
+    engine = {'()':'Flox.engine.hdf5.HDF5ArrayEngine', 'filename':filename, 'queue_size':2, 'compression':compression}
+    system = system_from_args(NDSystem2D, dict(memmap_args), dict(engine=engine, nt=4))
+    threads = threading.active_count()
+    for i in range(1, 10):
+        packet = {}
+        for name in system.engine.get_data_list():
+            packet[name] = np.ones(system.engine[name].shape[:-1]) * i
+        system.read_packet(packet)
+        assert np.all(system.Temperature.raw == i)
+    assert threading.active_count() <= threads + 1
+    system.engine.close()
+    
+    with h5py.File(filename, 'r') as datafile:
+        assert datafile['Temperature'].shape[-1] == 10
+        assert datafile['Temperature'].chunks == (12, 10, 1)
+        assert datafile['Temperature'].compression == compression
+        assert np.all(datafile['Temperature'][...,9] == 9.0)
+
+@pytest.mark.parametrize("format", ['hdf5', 'npy'])
+def test_numpy_writer_engine(tmpdir, format):
+    """Write a run longer than the ring buffer."""
+    import glob
+    import h5py
+    from Flox.hydro.system import NDSystem2D
+    filename = str(tmpdir.join("writer"))
+    engine = {'()':'Flox.engine.numpy.NumpyWriterEngine', 'filename':filename, 'format':format}
+    system = system_from_args(NDSystem2D, dict(memmap_args), dict(engine=engine, nt=4))
+    for i in range(1, 10):
+        packet = {}
+        for name in system.engine.get_data_list():
+            packet[name] = np.ones(system.engine[name].shape[:-1]) * i
+        system.read_packet(packet)
+        assert np.all(system.Temperature.raw == i)
+    assert system.engine['Temperature'].shape[-1] == 4
+    assert system.engine.free > system.engine.iterations
+    iterator = system.engine.iterator(system)
+    for frame in iterator:
+        assert np.all(frame.Temperature.raw == frame.iteration)
+    assert iterator.iteration == system.engine.iterations
+    with pytest.raises(ValueError):
+        system.engine.__setdata__(iterator.system(1), 'Temperature', 1.0)
+    system.engine.close()
+    
+    if format == 'hdf5':
+        with h5py.File(filename, 'r') as datafile:
+            temperature = datafile['Temperature'][...]
+    else:
+        segments = sorted(glob.glob(os.path.join(filename, "Temperature.*.npy")))
+        assert len(segments) == 3
+        temperature = np.concatenate([ np.load(segment) for segment in segments ], axis=-1)
+    assert temperature.shape == (12, 10, 10)
+    assert np.all(temperature[...,9] == 9.0)
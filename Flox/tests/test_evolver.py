@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+#
+#  test_evolver.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-16.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import numpy as np
+import numpy.random
+
+import pytest
+
+def hydro_evolver(nz, nx, evolver=None, seed=2014, **settings):
+    """Build a HydroEvolver with random initial conditions."""
+    from Flox.evolver._hydro import HydroEvolver
+    evolver = HydroEvolver if evolver is None else evolver
+    npa = np.arange(nx) * np.pi / 3.0
+    ev = evolver(nz, nx, npa, 1.0 / (nz + 1), 3.0, 0.5, 10)
+    ev.Pr = 1.0
+    ev.Ra = 1e4
+    state = np.random.RandomState(seed)
+    ev.Temperature = state.rand(nz, nx)
+    ev.Vorticity = state.rand(nz, nx)
+    ev.set_T_bounds(state.rand(nx), state.rand(nx))
+    if settings.pop('forcing', False):
+        ev.set_T_forcing(1, nz - 2, state.rand(nz), 0.7)
+    for key, value in settings.items():
+        setattr(ev, key, value)
+    return ev
+
+@pytest.mark.parametrize("nz, nx, settings", [
+    (37, 11, {}), (8, 5, {}), (3, 1, {}),
+    (20, 6, {'linear':True}), (20, 6, {'forcing':True}),
+])
+def test_fused_step(nz, nx, settings):
+    """Fused and staged steps give the same result."""
+    staged = hydro_evolver(nz, nx, fused=False, **settings)
+    fused = hydro_evolver(nz, nx, fused=True, **settings)
+    staged.evolve(10.0, 25)
+    fused.evolve(10.0, 25)
+    for attr in ["Temperature", "dTemperature", "Vorticity", "dVorticity", "Stream", "Time"]:
+        assert np.allclose(getattr(staged, attr), getattr(fused, attr), rtol=1e-14, atol=0.0)
+
+@pytest.mark.parametrize("settings", [{}, {'implicit':True}, {'galerkin':'pseudospectral'}])
+def test_release_gil(settings):
+    """Evolving without the GIL gives the same result as the python dispatch."""
+    from Flox.evolver._magneto import MagnetoEvolver
+    nz, nx = 20, 6
+    npa = np.arange(nx) * np.pi / 3.0
+    results = []
+    for release_gil in (False, True):
+        ev = MagnetoEvolver(nz, nx, npa, 1.0 / (nz + 1), 3.0, 0.5, 10)
+        ev.Pr, ev.Ra, ev.Q, ev.q = 1.0, 1e4, 10.0, 1.0
+        state = np.random.RandomState(2014)
+        ev.Temperature = state.rand(nz, nx)
+        ev.VectorPotential = state.rand(nz, nx) * 0.1
+        ev.set_T_bounds(np.zeros(nx), np.zeros(nx))
+        for key, value in settings.items():
+            setattr(ev, key, value)
+        ev.release_gil = release_gil
+        ev.evolve(10.0, 25)
+        results.append([ev.Temperature, ev.Vorticity, ev.VectorPotential, ev.Time])
+    for staged, released in zip(*results):
+        assert np.allclose(staged, released, rtol=1e-14, atol=0.0)
+
+def legacy_magneto_evolver(nz, nx):
+    """Build the legacy MagnetoEvolver, which overrides step and delta_time."""
+    from Flox.magneto._magneto import MagnetoEvolver
+    npa = np.arange(nx) * np.pi / 3.0
+    ev = MagnetoEvolver(nz, nx, npa, 1.0 / (nz + 1), 3.0, 0.5)
+    ev.checkCFL = 10
+    ev.Pr, ev.Ra, ev.Q, ev.q = 1.0, 1e4, 10.0, 1.0
+    state = np.random.RandomState(2014)
+    ev.Temperature = state.rand(nz, nx)
+    ev.VectorPotential = state.rand(nz, nx) * 0.1
+    return ev
+
+def test_legacy_magneto_evolver():
+    """The legacy MagnetoEvolver evolves through its own step, and can't release the GIL."""
+    ev = legacy_magneto_evolver(20, 6)
+    assert not ev.release_gil
+    with pytest.raises(ValueError):
+        ev.release_gil = True
+    T = ev.Temperature.copy()
+    ev.evolve(10.0, 25)
+    assert ev.Time > 0.0
+    assert not np.allclose(ev.Temperature, T)
+
+def test_ensemble_evolver():
+    """Ensemble members evolve as they would on their own."""
+    from Flox.evolver._ensemble import EnsembleEvolver
+    nz, nx = 20, 6
+    Rayleigh = [1e3, 1e4, 1e5]
+    separate = [ hydro_evolver(nz, nx, Ra=Ra, forcing=(i == 1)) for i, Ra in enumerate(Rayleigh) ]
+    members = [ hydro_evolver(nz, nx, Ra=Ra, forcing=(i == 1)) for i, Ra in enumerate(Rayleigh) ]
+    ensemble = EnsembleEvolver(members)
+    assert len(ensemble) == 3
+    assert ensemble.fields["Temperature"].shape == (3, nz, nx)
+    
+    for ev in separate:
+        ev.evolve(10.0, 25)
+    ensemble.evolve(10.0, 25)
+    for m, ev in enumerate(separate):
+        for attr in ["Temperature", "dTemperature", "Vorticity", "dVorticity", "Stream", "Time"]:
+            assert np.allclose(getattr(ev, attr), getattr(ensemble[m], attr), rtol=1e-14, atol=0.0)
+        assert np.allclose(ev.Temperature, ensemble.fields["Temperature"][m], rtol=1e-14, atol=0.0)
+    
+    with pytest.raises(ValueError):
+        EnsembleEvolver([hydro_evolver(nz, nx), hydro_evolver(nz + 1, nx)])
+    with pytest.raises(ValueError):
+        EnsembleEvolver([legacy_magneto_evolver(nz, nx)])
+
+def test_ensemble_hydro_evolver():
+    """Packets read into one member are bound back into the ensemble."""
+    from Flox.hydro.evolver import HydroEvolver, EnsembleHydroEvolver
+    nz, nx = 20, 6
+    Rayleigh = [1e3, 1e4, 1e5]
+    separate = [ hydro_evolver(nz, nx, evolver=HydroEvolver, Ra=Ra) for Ra in Rayleigh ]
+    ensemble = EnsembleHydroEvolver([ hydro_evolver(nz, nx, evolver=HydroEvolver, Ra=Ra) for Ra in Rayleigh ])
+    
+    packet = hydro_evolver(nz, nx, evolver=HydroEvolver, seed=42).create_packet()
+    separate[1].read_packet(packet)
+    ensemble.read_packet(1, packet)
+    assert np.allclose(ensemble.fields["Temperature"][1], packet["Temperature"], rtol=0.0, atol=0.0)
+    
+    packets = []
+    for ev in separate:
+        ev.evolve(10.0, 10)
+        ev.evolve(10.0, 10)
+    ensemble.evolve_cb(10.0, chunksize=10, chunks=2, callback=lambda i, m, p : packets.append((i, m, p)))
+    assert [ (i, m) for i, m, p in packets ] == [ (i, m) for i in range(2) for m in range(3) ]
+    
+    fields = ensemble.fields
+    for m, ev in enumerate(separate):
+        last = packets[3 + m][2]
+        for attr in ["Temperature", "dTemperature", "Vorticity", "dVorticity", "Stream", "Time"]:
+            assert np.allclose(getattr(ev, attr), last[attr], rtol=1e-14, atol=0.0)
+            assert np.allclose(getattr(ev, attr), ensemble.create_packet(m)[attr], rtol=1e-14, atol=0.0)
+            if attr != "Time":
+                assert np.allclose(getattr(ev, attr), fields[attr][m], rtol=1e-14, atol=0.0)
+
+def test_adaptive_timestep():
+    """Adaptive timesteps stay under the CFL limit, and retry steps above the tolerance."""
+    steps, rejected = [], []
+    for tolerance in (1e-2, 1e-5):
+        ev = hydro_evolver(20, 6, adaptive=True, tolerance=tolerance)
+        assert ev.adaptive
+        n = 0
+        while ev.Time < 0.01:
+            time, ceiling, retries = ev.Time, ev.delta_time(), ev.rejected
+            ev.evolve(0.01, 1)
+            # A retried step is retracted first, so only a step without retries must advance.
+            assert ev.Time - time <= ceiling * (1.0 + 1e-12)
+            if ev.rejected == retries:
+                assert ev.Time > time
+            assert ev.error <= tolerance
+            n += 1
+        steps.append(n)
+        rejected.append(ev.rejected)
+    assert steps[1] > steps[0]
+    # Loose steps are limited by the CFL condition, tight ones sometimes overshoot the error.
+    assert rejected[0] == 0
+    assert rejected[1] > 0
+
+@pytest.mark.parametrize("scheme, order", [('ab2', 2), ('ab3', 3), ('rk3', 3)])
+def test_scheme_order(scheme, order):
+    """Each time integration scheme converges at its order."""
+    def run(scheme, n, time=0.002, start=1e-8):
+        ev = hydro_evolver(20, 6, scheme=scheme)
+        ev.solve()
+        # Two short steps give the multistep schemes accurate derivatives to start from.
+        ev.step(start)
+        ev.step(start)
+        for i in range(n):
+            ev.step(time / n)
+        return ev.Temperature
+    reference = run('rk3', 1024)
+    errors = [ np.abs(run(scheme, n) - reference).max() for n in (32, 64) ]
+    assert errors[0] / errors[1] > 2**order * 0.8
+    
+def test_scheme_options():
+    """Schemes are checked against the other evolver options."""
+    ev = hydro_evolver(8, 5)
+    assert ev.scheme == 'ab2'
+    with pytest.raises(ValueError):
+        ev.scheme = 'euler'
+    ev.scheme = 'rk3'
+    with pytest.raises(ValueError):
+        ev.implicit = True
+    with pytest.raises(ValueError):
+        ev.adaptive = True
+
+def test_compute_velocity():
+    """The largest velocity includes both components, and the bound is above it."""
+    from Flox.component.stream import StreamSolver
+    from Flox.transform import setup_transform
+    from Flox.finitedifference import first_derivative2D
+    nz, nx = 20, 6
+    npa = np.arange(nx) * np.pi / 3.0
+    state = np.random.RandomState(2014)
+    solver = StreamSolver(nz, nx)
+    solver.setup(1.0 / (nz + 1), npa)
+    solver.setup_transform(npa)
+    solver.Value = state.randn(nz, nx)
+    solver.prepare(1.0 / (nz + 1))
+    solver.compute_velocity()
+    
+    dVdz = np.zeros((nz, nx))
+    first_derivative2D(nz, nx, dVdz, solver.Value, 1.0 / (nz + 1), np.zeros(nx), np.zeros(nx), 1.0)
+    Vx = np.dot(dVdz, -setup_transform(np.sin, nx, nx))
+    Vz = np.dot(solver.Value, setup_transform(np.cos, nx, nx) * npa[:,np.newaxis])
+    assert np.allclose(np.asarray(solver.Velocity), Vx**2 + Vz**2)
+    assert np.allclose(solver.maxV, (Vx**2 + Vz**2).max())
+    
+    solver.bound = True
+    solver.compute_velocity()
+    assert solver.maxV >= (Vx**2 + Vz**2).max()
+
+def test_linear_lorentz():
+    """The linear lorentz force covers every row."""
+    from Flox.component.vorticity import linear_lorentz
+    state = np.random.RandomState(2014)
+    d_V, dJdz = state.rand(20, 6), state.rand(20, 6)
+    expected = d_V + 0.5 * dJdz
+    assert not linear_lorentz(20, 6, d_V, dJdz, 0.5)
+    assert np.allclose(d_V, expected)
+
+@pytest.mark.parametrize("settings", [{}, {'implicit':True}])
+def test_thread_count(settings):
+    """Evolution doesn't depend on the number of OpenMP threads."""
+    from Flox.process._threads import omp_set_num_threads, omp_get_max_threads
+    threads = omp_get_max_threads()
+    results = []
+    try:
+        for n in (1, 3):
+            omp_set_num_threads(n)
+            ev = hydro_evolver(37, 11, **settings)
+            ev.evolve(10.0, 25)
+            results.append([ev.Temperature, ev.Vorticity, ev.Stream, ev.Time])
+    finally:
+        omp_set_num_threads(threads)
+    for single, threaded in zip(*results):
+        assert np.allclose(single, threaded, rtol=1e-14, atol=0.0)
+
+@pytest.mark.parametrize("settings", [
+    {}, {'implicit':True}, {'scheme':'rk3'}, {'forcing':True}, {'galerkin':'pseudospectral'},
+])
+def test_mode_major(settings):
+    """Mode-major solver state evolves as z-major state does, and packets stay z-major."""
+    results = []
+    for order in ("C", "F"):
+        ev = hydro_evolver(37, 11, **settings)
+        ev.order = order
+        ev.evolve(10.0, 25)
+        for name in ("Temperature", "dTemperature", "Vorticity", "Stream"):
+            assert getattr(ev, name).shape == (37, 11)
+            assert getattr(ev, name).flags.c_contiguous
+        results.append([ev.Temperature, ev.dTemperature, ev.Vorticity, ev.Stream, ev.Time])
+    for z_major, mode_major in zip(*results):
+        # The FFTs of the pseudospectral engine round differently in each layout.
+        assert np.allclose(z_major, mode_major, rtol=1e-12, atol=1e-12 * np.abs(z_major).max())
+    
+    with pytest.raises(ValueError):
+        ev.order = "K"
+
+@pytest.mark.parametrize("evolver", [
+    "Flox.hydro.evolver.HydroEvolver", "Flox.magneto.evolver.MagnetoEvolver", "Flox.magneto.MagnetoEvolver",
+])
+def test_from_system_threads(evolver):
+    """Every evolver accepts the thread count which the manager passes to from_system."""
+    import inspect, importlib
+    module, name = evolver.rsplit(".", 1)
+    cls = getattr(importlib.import_module(module), name)
+    parameters = inspect.signature(cls.from_system).parameters
+    assert "threads" in parameters or any(p.kind == p.VAR_KEYWORD for p in parameters.values())
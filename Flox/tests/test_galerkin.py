@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+#  test_galerkin.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-12.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import numpy as np
+import numpy.random
+
+import pytest
+
+@pytest.fixture(params=[
+    (1, 1, 1.0), (5, 7, 3.0), (10, 16, 1.3), (4, 33, 2.0)
+])
+def galerkin_arrays(request):
+    """Return random modal amplitudes for the Galerkin terms."""
+    nz, nn, a = request.param
+    V_curr, dVdz, O_curr, dOdz = [np.random.randn(nz, nn) for i in range(4)]
+    return nz, nn, a, V_curr, dVdz, O_curr, dOdz
+
+def test_pseudospectral_cos_grad_sin(galerkin_arrays):
+    """Test the pseudo-spectral cos_grad_sin against the convolution."""
+    from Flox.nonlinear.galerkin import galerkin_cos_grad_sin
+    from Flox.nonlinear.pseudospectral import PseudoSpectralGalerkin
+    nz, nn, a, V_curr, dVdz, O_curr, dOdz = galerkin_arrays
+    npa = np.arange(nn) * np.pi / a
+
+    G_conv = np.zeros((nz, nn), dtype=np.float)
+    assert not galerkin_cos_grad_sin(nz, nn, G_conv, V_curr, dVdz, O_curr, dOdz, a, npa, -2.5)
+
+    G_ps = np.zeros((nz, nn), dtype=np.float)
+    assert not PseudoSpectralGalerkin(nz, nn, a).cos_grad_sin(G_ps, V_curr, dVdz, O_curr, dOdz, -2.5)
+
+    assert np.allclose(G_conv, G_ps, rtol=1e-12, atol=1e-12 * np.abs(G_conv).max())
+
+def test_pseudospectral_cos_grad_cos(galerkin_arrays):
+    """Test the pseudo-spectral cos_grad_cos against the convolution."""
+    from Flox.nonlinear.galerkin import galerkin_cos_grad_cos
+    from Flox.nonlinear.pseudospectral import PseudoSpectralGalerkin
+    nz, nn, a, V_curr, dVdz, O_curr, dOdz = galerkin_arrays
+
+    G_conv = np.zeros((nz, nn), dtype=np.float)
+    assert not galerkin_cos_grad_cos(nz, nn, G_conv, V_curr, dVdz, O_curr, dOdz, a, -2.5)
+
+    G_ps = np.zeros((nz, nn), dtype=np.float)
+    assert not PseudoSpectralGalerkin(nz, nn, a).cos_grad_cos(G_ps, V_curr, dVdz, O_curr, dOdz, -2.5)
+
+    assert np.allclose(G_conv, G_ps, rtol=1e-12, atol=1e-12 * np.abs(G_conv).max())
+
+def test_coupling_table(galerkin_arrays):
+    """Test the coupling table kernels against the convolution."""
+    from Flox.nonlinear.galerkin import galerkin_cos_grad_sin, galerkin_cos_grad_cos, galerkin_coupled, coupling_table
+    nz, nn, a, V_curr, dVdz, O_curr, dOdz = galerkin_arrays
+    npa = np.arange(nn) * np.pi / a
+    table = coupling_table(nn)
+    assert coupling_table(nn) is table
+
+    G_conv = np.zeros((nz, nn), dtype=np.float)
+    G_table = np.zeros((nz, nn), dtype=np.float)
+    assert not galerkin_cos_grad_sin(nz, nn, G_conv, V_curr, dVdz, O_curr, dOdz, a, npa, -2.5)
+    assert not galerkin_coupled(nz, nn, G_table, V_curr, dVdz, O_curr, dOdz, a, -2.5,
+        table.sin_start, table.sin_kp, table.sin_kpp, table.sin_wV, table.sin_wO)
+    assert np.allclose(G_conv, G_table, rtol=1e-12, atol=1e-12 * np.abs(G_conv).max())
+
+    G_conv = np.zeros((nz, nn), dtype=np.float)
+    G_table = np.zeros((nz, nn), dtype=np.float)
+    assert not galerkin_cos_grad_cos(nz, nn, G_conv, V_curr, dVdz, O_curr, dOdz, a, -2.5)
+    assert not galerkin_coupled(nz, nn, G_table, V_curr, dVdz, O_curr, dOdz, a, -2.5,
+        table.cos_start, table.cos_kp, table.cos_kpp, table.cos_wV, table.cos_wO)
+    assert np.allclose(G_conv, G_table, rtol=1e-12, atol=1e-12 * np.abs(G_conv).max())
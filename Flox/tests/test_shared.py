@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#
+#  test_shared.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-21.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import numpy as np
+from six.moves import queue
+
+import pytest
+
+from Flox.process.shared import SharedPacketRing
+
+def test_shared_packet_ring():
+    """Slots are reused only once every consumer has released them."""
+    ring = SharedPacketRing({'Temperature':(12, 10), 'Time':()}, [queue.Queue(), queue.Queue()], slots=2)
+    first, second = ring.consumer(0), ring.consumer(1)
+    for i in range(2):
+        ring.put({'Temperature':np.ones((12, 10)) * i, 'Time':i})
+    assert ring._flags.all()
+
+    packet = first.get()
+    assert np.all(packet['Temperature'] == 0.0)
+    assert packet['Time'] == 0.0
+    first.get()
+    assert ring._flags[0].tolist() == [0, 1]
+
+    second.get()
+    second.get()
+    ring.put({'Temperature':np.ones((12, 10)) * 2, 'Time':2}, consumers=[second.index])
+    assert np.all(second.get()['Temperature'] == 2.0)
+    with pytest.raises(queue.Empty):
+        first.get_nowait()
+
+    del packet
+    ring.close()
+
+def test_shared_packet_ring_latest():
+    """Consumers with the 'latest' policy get the newest frame, and never hold up the producer."""
+    ring = SharedPacketRing({'Temperature':(12, 10), 'Time':()}, [queue.Queue(), None], slots=2, policies=['block', 'latest'])
+    writer, animator = ring.consumer(0), ring.consumer(1)
+    for i in range(10):
+        ring.put({'Temperature':np.ones((12, 10)) * i, 'Time':i})
+        assert writer.get()['Time'] == i
+    packet = animator.get(timeout=1)
+    assert packet['Time'] == 9.0
+    assert np.all(packet['Temperature'] == 9.0)
+    with pytest.raises(queue.Empty):
+        animator.get_nowait()
+
+    ring.put({'Temperature':np.ones((12, 10)) * 10, 'Time':10})
+    assert animator.get_nowait()['Time'] == 10.0
+    assert packet['Time'] == 9.0
+
+    with pytest.raises(ValueError):
+        SharedPacketRing({'Time':()}, [None], policies=['drop'])
+
+    del packet
+    ring.close()
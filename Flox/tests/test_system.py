@@ -97,3 +97,99 @@ def test_system_engine_pickle(system):
     import pickle
     pickledSystem = pickle.loads(pickle.dumps(system))
     assert pickledSystem.engine is None
+    
+def test_system_array_values(system):
+    """Cached array values aren't pickled, are rebuilt after unpickling, and don't keep the system alive."""
+    import gc
+    import pickle
+    temperature = system.Temperature
+    assert system.Temperature is temperature
+    assert '_array_values' in system.__dict__
+    assert '_array_values' not in system.__getstate__()
+    assert system not in gc.get_referents(temperature)
+    
+    newsys = pickle.loads(pickle.dumps(system))
+    newsys.engine = system.engine
+    assert newsys.Temperature is not temperature
+    assert newsys.Temperature._system is newsys
+    assert np.all(newsys.Temperature.raw == system.Temperature.raw)
+    
+def test_system_unit_conversion(system):
+    """Dimensional views use cached conversions, which are reset with the bases."""
+    system.Temperature.dimensional = np.ones(system.Temperature.raw.shape) * system.deltaT
+    assert ('Temperature', 'nondimensional') in system._unit_cache
+    assert np.allclose(system.Temperature.raw, 1.0)
+    assert np.allclose(system.Temperature.dimensional.to(system.deltaT.unit).value, system.deltaT.value)
+    assert not np.may_share_memory(system.Temperature.dimensional.value, system.Temperature.raw)
+    assert np.allclose(system.Temperature.nondimensional.value, 1.0)
+    system.setup_bases()
+    assert ('Temperature', 'nondimensional') not in system._unit_cache
+    
+def test_system_transformed_cache(system):
+    """Transformed views are cached until the spectral data changes."""
+    system.Temperature.raw[...] = 0.0
+    system.Temperature.raw[:,1] = 1.0
+    transformed = system.Temperature.transformed
+    assert system.Temperature.transformed is transformed
+    with pytest.raises(ValueError):
+        transformed[...] = 0.0
+    system.Temperature.raw[:,1] = 2.0
+    assert system.Temperature.transformed is not transformed
+    assert np.allclose(system.Temperature.transformed.value, 2.0 * transformed.value)
+    transformed = system.Temperature.transformed
+    system.Temperature.nondimensional = system.Temperature.nondimensional * 3.0
+    assert system.Temperature.transformed is not transformed
+    assert np.allclose(system.Temperature.transformed.value, 3.0 * transformed.value)
+    
+def test_system_iterator(system):
+    """Iterating shares the system setup, and moves the iteration."""
+    for i in range(1, 4):
+        system.read_packet({ name:np.ones(system.engine[name].shape[:-1]) * i for name in system.engine.get_data_list() })
+    iterations = 0
+    for frame in system:
+        assert frame._bases is system._bases
+        assert frame.engine is system.engine
+        assert np.all(frame.Temperature.raw == frame.iteration)
+        iterations += 1
+    assert iterations == system.engine.iterations - 1
+    assert system.iteration == 3
+    
+def test_system_array_values(system):
+    """Array values are cached until the engine changes."""
+    value = system.Temperature
+    assert system.Temperature is value
+    assert system.Temperature.raw.shape == value.raw.shape
+    system.engine = {'()':'Flox.engine.numpy.NumpyArrayEngine', 'length':10}
+    system.engine.initialize_arrays(system)
+    assert system.Temperature is not value
+    assert system.Temperature._engine is system.engine
+    
+def test_system_computed_cache(system):
+    """Computed properties are kept until a parameter changes."""
+    dz = system.dz
+    assert system.dz is dz
+    assert system.npa is system.npa
+    system.depth = system.depth * 2
+    assert system.dz is not dz
+    assert np.allclose(system.dz.value, 2 * dz.value)
+    
+def test_recompose_unit_cache():
+    """Recomposed units are cached on the members of the base set."""
+    import astropy.units as u
+    from Flox.units import recompose_unit, _recomposed
+    unit = recompose_unit(u.km / u.hour, set([u.m, u.s]))
+    assert unit == u.m / u.s
+    assert (u.km / u.hour, frozenset([u.m, u.s]), False, False, 3) in _recomposed
+    assert recompose_unit(u.km / u.hour, set([u.m, u.s])) is unit
+    
+def test_recompose_unit_cache_warnings():
+    """A warning composition isn't answered from the cache of a quiet one."""
+    import warnings
+    import astropy.units as u
+    from Flox.units import recompose_unit
+    bases = set([u.J, u.N, u.m])
+    unit = recompose_unit(u.N * u.m, bases)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert recompose_unit(u.N * u.m, bases, warn_compositons=True) == unit
+    assert len(caught) == 1
@@ -47,4 +47,35 @@ def test_cython_spectral_transform(modal_amplitudes):
     
     assert np.allclose(sa, ca)
     
-    
\ No newline at end of file
+        
+def test_transform_basis():
+    """Transform bases are shared, and read-only."""
+    from Flox.transform import transform_basis
+    basis = transform_basis(np.sin, 20, 10, 2.0)
+    assert transform_basis(np.sin, 20, 10, 2.0) is basis
+    assert transform_basis(np.cos, 20, 10, 2.0) is not basis
+    assert not basis.flags.writeable
+    
+@pytest.mark.parametrize("perturbed", [False, True])
+def test_spectral_transform_frames(modal_amplitudes, perturbed):
+    """A stack of frames transforms the same as each frame."""
+    amplitudes, nx = modal_amplitudes
+    frames = np.dstack([amplitudes, 2.0 * amplitudes, -amplitudes])
+    sa = spectral_transform(np.sin, frames, nx, 2.0, perturbed=perturbed)
+    assert sa.shape == (amplitudes.shape[0], nx, 3)
+    for t in range(3):
+        assert np.allclose(sa[...,t], spectral_transform(np.sin, frames[...,t], nx, 2.0, perturbed=perturbed))
+    
+def test_cython_spectral_transform_frames(modal_amplitudes):
+    """Test the cython transform of a stack of frames."""
+    from Flox.component._transform import transform_frames
+    amplitudes, nx = modal_amplitudes
+    nz, nm = amplitudes.shape
+    frames = np.dstack([amplitudes, 2.0 * amplitudes, -amplitudes]).copy()
+    sa = spectral_transform(np.sin, frames, nx, 1.0, perturbed=False)
+    
+    transform_matrix = setup_transform(np.sin, nx, nm)
+    ca = np.zeros((nz, nx, 3), dtype=np.float)
+    assert not transform_frames(nz, nm, nx, 3, ca, frames, transform_matrix)
+    
+    assert np.allclose(sa, ca)
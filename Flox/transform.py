@@ -11,24 +11,40 @@ from __future__ import (absolute_import, unicode_literals, division, print_funct
 
 import numpy as np
 
+_bases = {}
+
+def transform_basis(func, nx, nm, a=1.0):
+    """The basis which converts `nm` modes to `nx` points in x.
+    
+    Bases are cached for each (func, nx, nm, a), and are read-only.
+    """
+    key = (func, nx, nm, a)
+    try:
+        return _bases[key]
+    except KeyError:
+        x = np.linspace(0, 1, nx+2)[1:-1] * a
+        n = np.arange(nm)
+        
+        # This array is n * x large.
+        # It will convert from modes to x-space.
+        cs = func(n[:,np.newaxis] * np.pi / a * x[np.newaxis,:])
+        cs.setflags(write=False)
+        _bases[key] = cs
+        return cs
+
 def spectral_transform(func, data, nx=1, a=1.0, perturbed=False):
-    """Do a function transform along the 1st index."""
-    data = np.asanyarray(data)
+    """Do a function transform along the 1st index.
     
-    nz = data.shape[0]
+    `data` is a single frame of modes, (nz, nm), or a stack of frames, (nz, nm, nt). The
+    result is (nz, nx) or (nz, nx, nt), computed as a single matrix product.
+    """
+    data = np.asanyarray(data)
     nm = data.shape[1]
     
-    x = np.linspace(0, 1, nx+2)[1:-1] * a
-    n = np.arange(nm)
-    
-    # This array is n * x large.
-    # It will convert from modes to x-space.
-    cs = func(n[:,np.newaxis] * np.pi / a * x[np.newaxis,:])
+    cs = transform_basis(func, nx, nm, a)[int(perturbed):]
     
-    result = np.zeros((nz, nx), dtype=data.dtype)
-    for i_n in range(int(perturbed), data.shape[1]):
-        result[:,:,...] += cs[np.newaxis,i_n,:] * data[:,i_n,np.newaxis,...]
-    return result
+    result = np.tensordot(data[:,int(perturbed):,...], cs, axes=([1],[0]))
+    return np.rollaxis(result, result.ndim - 1, 1)
     
 def setup_transform(func, nx, nm):
     """Setup the data for a transform."""
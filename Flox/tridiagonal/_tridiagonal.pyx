@@ -104,7 +104,64 @@ cpdef int tridiagonal_from_work(int J, DTYPE_t[:] rhs, DTYPE_t[:] sol, DTYPE_t[:
     for j in range(J-2, -1, -1):
         sol[j] = sol[j] - wk2[j] * sol[j+1]
     return 0
+
+# Modes are swept in blocks of this many, so that each thread works along contiguous rows.
+# In the mode-major layout, each mode of a block is a contiguous stream instead.
+DEF MODE_BLOCK = 8
+
+cpdef int tridiagonal_from_work2D(int J, int K, DTYPE_t[:,:] rhs, DTYPE_t[:,:] sol, DTYPE_t[:,:] wk1, DTYPE_t[:,:] wk2, DTYPE_t[:,:] sub) nogil:
+    
+    # J counts the two boundary rows, which are implicit: their right hand side is zero,
+    # and rhs, sol only hold the J-2 interior rows. rhs and sol may be the same array.
+    cdef int b, j, k, k0, k1
+    cdef int nb = (K + MODE_BLOCK - 1) // MODE_BLOCK
+    
+    for b in prange(nb, schedule='static'):
+        k0 = b * MODE_BLOCK
+        k1 = k0 + MODE_BLOCK
+        if k1 > K:
+            k1 = K
+        
+        # Forward sweep, the bottom boundary row solves to zero.
+        for k in range(k0, k1):
+            sol[0, k] = rhs[0, k] * wk1[1, k]
+        for j in range(2, J-1):
+            for k in range(k0, k1):
+                sol[j-1, k] = (rhs[j-1, k] - sub[j, k] * sol[j-2, k]) * wk1[j, k]
+        
+        # Back substitution, starting from the top boundary row.
+        for k in range(k0, k1):
+            sol[J-3, k] = sol[J-3, k] - wk2[J-2, k] * (-sub[J-1, k] * sol[J-3, k] * wk1[J-1, k])
+        for j in range(J-3, 0, -1):
+            for k in range(k0, k1):
+                sol[j-1, k] = sol[j-1, k] - wk2[j, k] * sol[j, k]
     
+    return 0
+    
+cpdef int tridiagonal_do_work2D(int J, int K, DTYPE_t[:,:] sub, DTYPE_t[:,:] dia, DTYPE_t[:,:] sup, DTYPE_t[:,:] wk1, DTYPE_t[:,:] wk2) nogil:
+    
+    # The factorization of tridiagonal_do_work for every mode, swept in blocks of modes like the solve.
+    cdef int b, j, k, k0, k1
+    cdef int nb = (K + MODE_BLOCK - 1) // MODE_BLOCK
+    
+    for b in prange(nb, schedule='static'):
+        k0 = b * MODE_BLOCK
+        k1 = k0 + MODE_BLOCK
+        if k1 > K:
+            k1 = K
+        
+        for k in range(k0, k1):
+            wk1[0, k] = 1.0 / dia[0, k]
+            wk2[0, k] = sup[0, k] * wk1[0, k]
+        for j in range(1, J-1):
+            for k in range(k0, k1):
+                wk1[j, k] = 1.0 / (dia[j, k] - sub[j, k] * wk2[j-1, k])
+                wk2[j, k] = sup[j, k] * wk1[j, k]
+        for k in range(k0, k1):
+            wk1[J-1, k] = 1.0 / (dia[J-1, k] - sub[J-1, k] * wk2[J-2, k])
+            wk2[J-1, k] = 0.0
+    
+    return 0
 
 cdef class TridiagonalSolver(Solver):
     
@@ -118,8 +175,15 @@ cdef class TridiagonalSolver(Solver):
         self.sub = np.zeros((self.J, self.K), dtype=np.float)
         self.dia = np.zeros((self.J, self.K), dtype=np.float)
         self.sup = np.zeros((self.J, self.K), dtype=np.float)
-        self.t_sol = np.zeros((self.J,), dtype=np.float)
-        self.t_rhs = np.zeros((self.J,), dtype=np.float)
+        
+    cdef int _relayout(self, object order) except -1:
+        Solver._relayout(self, order)
+        self.wk1 = np.asarray(self.wk1).copy(order=order)
+        self.wk2 = np.asarray(self.wk2).copy(order=order)
+        self.sub = np.asarray(self.sub).copy(order=order)
+        self.dia = np.asarray(self.dia).copy(order=order)
+        self.sup = np.asarray(self.sup).copy(order=order)
+        return 0
         
     
     cpdef int warm(self, DTYPE_t[:,:] sub, DTYPE_t[:,:] dia, DTYPE_t[:,:] sup):
@@ -130,14 +194,9 @@ cdef class TridiagonalSolver(Solver):
     
     cdef int _warm_work(self):
         
-        cdef int k, rv = 0
-        cdef DTYPE_t[:] t_wk1 = clone(array('d'), self.J, False)
-        cdef DTYPE_t[:] t_wk2 = clone(array('d'), self.J, False)
-        
-        for k in range(self.K):
-            rv += tridiagonal_do_work(self.J, self.sub[:,k], self.dia[:,k], self.sup[:,k], t_wk1, t_wk2)
-            self.wk1[:,k] = t_wk1
-            self.wk2[:,k] = t_wk2
+        cdef int rv
+        with nogil:
+            rv = tridiagonal_do_work2D(self.J, self.K, self.sub, self.dia, self.sup, self.wk1, self.wk2)
         
         self.warmed = True
         
@@ -145,17 +204,15 @@ cdef class TridiagonalSolver(Solver):
     
     cpdef int solve(self, DTYPE_t[:,:] rhs, DTYPE_t[:,:] sol):
         
-        cdef int k, rv = 0
-        sol[...] = 0.0
-        for k in range(self.K):
-            self.t_rhs[0] = 0.0
-            self.t_rhs[self.J-1] = 0.0
-            self.t_rhs[1:self.J-1] = rhs[:,k]
-            self.t_sol[:] = 0.0
-            rv += tridiagonal_from_work(self.J, self.t_rhs, self.t_sol, self.wk1[:,k], self.wk2[:,k], self.sub[:,k])
-            sol[:,k] = self.t_sol[1:self.J-1]
+        cdef int rv
+        with nogil:
+            rv = self._solve(rhs, sol)
         return rv
     
+    cdef int _solve(self, DTYPE_t[:,:] rhs, DTYPE_t[:,:] sol) nogil:
+        
+        return tridiagonal_from_work2D(self.J, self.K, rhs, sol, self.wk1, self.wk2, self.sub)
+    
     cpdef int matrix(self, DTYPE_t[:,:,:] mat):
         cdef int r1 = 0, r2, k
         cdef DTYPE_t[:] t_sub = clone(array('d'), self.J, False)
@@ -130,4 +130,35 @@ def test_tridiagonalsolver(boundary_tridiagonal_group):
     
     
     TS.solve(5 * rhsar, resar)
-    assert np.allclose(resar, 5 * solar)
\ No newline at end of file
+    assert np.allclose(resar, 5 * solar)
+    
+def tridiagonal_combine_matrix_full(sub, dia, sup):
+    """Combine full-length sub, dia and sup diagonals into a matrix."""
+    return np.diag(sub[1:], -1) + np.diag(dia, 0) + np.diag(sup[:-1], 1)
+
+@pytest.mark.parametrize("nz,nx", [(1, 3), (5, 1), (10, 13), (50, 20)])
+def test_tridiagonal_from_work2D(nz, nx):
+    """Batched tridiagonal solve over all modes"""
+    from ._tridiagonal import TridiagonalSolver
+    J = nz + 2
+    sub = np.random.rand(J, nx)
+    sup = np.random.rand(J, nx)
+    dia = np.random.rand(J, nx) + 4.0
+    sub[0,:] = sup[0,:] = sub[-1,:] = sup[-1,:] = 0.0
+    dia[0,:] = dia[-1,:] = 1.0
+    rhs = np.random.randn(nz, nx)
+    
+    TS = TridiagonalSolver(nz, nx)
+    assert not TS.warm(sub, dia, sup)
+    res = np.zeros((nz, nx))
+    assert not TS.solve(rhs, res)
+    
+    for k in range(nx):
+        mat = tridiagonal_combine_matrix_full(sub[:,k], dia[:,k], sup[:,k])
+        t_rhs = np.zeros((J,))
+        t_rhs[1:-1] = rhs[:,k]
+        assert np.allclose(res[:,k], np.linalg.solve(mat, t_rhs)[1:-1])
+    
+    # The solve also works in place.
+    assert not TS.solve(rhs, rhs)
+    assert np.allclose(rhs, res)
@@ -15,6 +15,7 @@ import six
 import abc
 import warnings
 import contextlib
+import threading
 from collections import OrderedDict
 
 try:
@@ -41,6 +42,10 @@ def recompose(quantity, bases, scaled=False, warn_compositons=False, max_depth=U
     result = quantity.to(result_unit)
     return result
 
+RECOMPOSE_CACHE_SIZE = 256
+_recomposed = OrderedDict()
+_recomposed_lock = threading.Lock()
+
 def recompose_unit(unit, bases, scaled=False, warn_compositons=False, max_depth=UNIT_MAX_DEPTH):
     """Recompose a unit in terms of the provided bases.
     
@@ -49,8 +54,26 @@ def recompose_unit(unit, bases, scaled=False, warn_compositons=False, max_depth=
     :param bool scaled: Whether to allow units with a scale or not.
     :param bool warn_compositons: Whether to warn when there were multiple compositions found.
     
+    Composing units is slow, so the most recent results are kept, keyed on the unit and the
+    members of the base set (callers often build a new set for each call). The cache is
+    shared between threads, so it is only changed while holding a lock.
     """
-    composed = unit.compose(units=bases, max_depth=UNIT_MAX_DEPTH)
+    key = (unit, frozenset(bases), bool(scaled), bool(warn_compositons), max_depth)
+    with _recomposed_lock:
+        result = _recomposed.pop(key, None)
+        if result is not None:
+            _recomposed[key] = result
+            return result
+    result = _recompose_unit(unit, bases, scaled, warn_compositons, max_depth)
+    with _recomposed_lock:
+        _recomposed[key] = result
+        if len(_recomposed) > RECOMPOSE_CACHE_SIZE:
+            _recomposed.popitem(last=False)
+    return result
+    
+def _recompose_unit(unit, bases, scaled, warn_compositons, max_depth):
+    """Recompose a unit, without the cache."""
+    composed = unit.compose(units=bases, max_depth=max_depth)
     if len(composed) != 1 and warn_compositons:
         warnings.warn("Multiple compositions are possible for {!r}: {!r}".format(unit,composed))
     result = composed[0]
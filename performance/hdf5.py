@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  hdf5.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-20.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import time
+import tempfile
+import shutil
+import numpy as np
+import h5py
+import os, os.path
+
+import matplotlib.pyplot as plt
+
+from Flox.io import dataset_options
+
+layouts = [
+    ("auto", dict(chunks="auto")),
+    ("auto, gzip", dict(chunks="auto", compression="gzip")),
+    ("frame", dict(chunks="frame")),
+    ("frame, lzf", dict(chunks="frame", compression="lzf")),
+    ("frame, gzip 1", dict(chunks="frame", compression="gzip", compression_opts=1)),
+    ("frame, gzip 4, shuffle", dict(chunks="frame", compression="gzip", compression_opts=4, shuffle=True)),
+    ("time-first, frame", dict(chunks="frame", time_first=True)),
+]
+
+def frame_trial(directory, nz, nx, nt, seed, chunks="frame", time_first=False, **options):
+    """Time writing and reading single frames, in ms per frame."""
+    np.random.seed(seed)
+    frames = np.random.randn(nt, nz, nx)
+    filename = os.path.join(directory, "frames.hdf5")
+
+    options = dataset_options((nz, nx, nt), chunks=chunks, **options)
+    if time_first:
+        if isinstance(options.get('chunks'), tuple):
+            options['chunks'] = options['chunks'][-1:] + options['chunks'][:-1]
+        shape, maxshape = (nt, nz, nx), (None, nz, nx)
+        index = lambda i : (i, Ellipsis)
+    else:
+        shape, maxshape = (nz, nx, nt), (nz, nx, None)
+        index = lambda i : (Ellipsis, i)
+
+    with h5py.File(filename, 'w') as datafile:
+        dataset = datafile.create_dataset("Temperature", shape, maxshape=maxshape, dtype=frames.dtype, **options)
+        start = time.time()
+        for i in range(nt):
+            dataset[index(i)] = frames[i]
+        datafile.flush()
+        write = 1e3 * (time.time() - start) / nt
+
+    with h5py.File(filename, 'r') as datafile:
+        dataset = datafile["Temperature"]
+        start = time.time()
+        for i in range(nt):
+            frame = dataset[index(i)]
+        read = 1e3 * (time.time() - start) / nt
+        size = os.path.getsize(filename)
+
+    os.remove(filename)
+    return write, read, size
+
+if __name__ == '__main__':
+
+    seed = 5
+    nz, nx, nt = 100, 200, 200
+
+    directory = tempfile.mkdtemp()
+    try:
+        results = []
+        for label, options in layouts:
+            print("Trying {:s}".format(label))
+            results.append(frame_trial(directory, nz, nx, nt, seed, **options))
+    finally:
+        shutil.rmtree(directory)
+    writes, reads, sizes = map(np.array, zip(*results))
+
+    for (label, options), write, read, size in zip(layouts, writes, reads, sizes):
+        print("{:>24s}: write {:7.3f}ms read {:7.3f}ms size {:6.1f}MB".format(label, write, read, size / 1024**2))
+
+    print("Plotting Timing Results")
+    plotname = os.path.join(os.path.dirname(__file__),"hdf5.pdf")
+    position = np.arange(len(layouts))
+    plt.barh(position - 0.2, writes, height=0.4, color='b', label="Write")
+    plt.barh(position + 0.2, reads, height=0.4, color='g', label="Read")
+    plt.yticks(position, [ label for label, options in layouts ])
+    plt.xlabel(r"Time per frame $(ms)$")
+    plt.title(r"HDF5 Frame Timing, ${:d} \times {:d}$".format(nz, nx))
+    plt.legend(loc="lower right")
+    plt.tight_layout()
+    plt.savefig(plotname)
+
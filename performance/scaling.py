@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  scaling.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-24.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import time
+import numpy as np
+import multiprocessing as mp
+import os, os.path
+
+import matplotlib.pyplot as plt
+
+from Flox.evolver._hydro import HydroEvolver
+from Flox.process._threads import omp_set_num_threads
+
+def hydro_evolver(nz, nn, **settings):
+    """Build a HydroEvolver with random initial conditions."""
+    npa = np.arange(nn) * np.pi / 3.0
+    ev = HydroEvolver(nz, nn, npa, 1.0 / (nz + 1), 3.0, 0.5, 10)
+    ev.Pr = 1.0
+    ev.Ra = 1e4
+    state = np.random.RandomState(2014)
+    ev.Temperature = state.rand(nz, nn) * 1e-3
+    ev.Vorticity = state.rand(nz, nn) * 1e-3
+    ev.set_T_bounds(np.zeros(nn), np.zeros(nn))
+    for key, value in settings.items():
+        setattr(ev, key, value)
+    return ev
+
+def scaling_trial(threads, nz, nn, iterations=100, **settings):
+    """Time a step with some number of threads, in ms."""
+    omp_set_num_threads(threads)
+    ev = hydro_evolver(nz, nn, **settings)
+    ev.evolve(1e10, 10)
+    start = time.time()
+    ev.evolve(1e10, iterations)
+    return 1e3 * (time.time() - start) / iterations
+
+if __name__ == '__main__':
+
+    cores = mp.cpu_count()
+    threads = np.unique(np.power(2, np.arange(int(np.log2(cores)) + 1)).tolist() + [cores])
+    grids = [(100, 50), (400, 100), (1000, 200)]
+
+    results = {}
+    for nz, nn in grids:
+        for n in threads:
+            results[nz, nn, n] = scaling_trial(int(n), nz, nn)
+            print("{:4d} x {:3d}, {:2d} threads: {:8.3f} ms/step".format(nz, nn, n, results[nz, nn, n]))
+
+    print("Plotting Timing Results")
+    plotname = os.path.join(os.path.dirname(__file__),"scaling.pdf")
+    for nz, nn in grids:
+        speedup = [ results[nz, nn, 1] / results[nz, nn, n] for n in threads ]
+        plt.plot(threads, speedup, 'o-', label=r"${:d} \times {:d}$".format(nz, nn))
+    plt.plot(threads, threads, 'k:', label="Ideal")
+    plt.xlabel(r"OpenMP threads")
+    plt.ylabel(r"Speedup")
+    plt.title(r"Hydro step scaling")
+    plt.legend(loc="upper left")
+    plt.savefig(plotname)
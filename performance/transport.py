@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  transport.py
+#  Flox
+#
+#  Created by Alexander Rudy on 2014-06-22.
+#  Copyright 2014 Alexander Rudy. All rights reserved.
+#
+
+from __future__ import (absolute_import, unicode_literals, division, print_function)
+
+import time
+import numpy as np
+import multiprocessing as mp
+import multiprocessing.managers as mm
+import os, os.path
+
+import matplotlib.pyplot as plt
+
+from Flox.process.channel import DirectQueue, FanOut
+from Flox.process.shared import SharedPacketRing
+
+names = ['Temperature', 'dTemperature', 'Vorticity', 'dVorticity', 'Stream', 'Time']
+
+def frame_shapes(nz, nn):
+    """Shapes of the arrays in one frame."""
+    return { name:(() if name == 'Time' else (nz, nn)) for name in names }
+
+def consume(queue, frames, timeout=60):
+    """Read frames off of a queue, copying them as a system would."""
+    for i in range(frames):
+        packet = queue.get(timeout=timeout)
+        for name in names:
+            np.array(packet[name], copy=True)
+
+class ManagerFanOut(object):
+    """The old path, which puts each packet on every manager queue."""
+    def __init__(self, queues):
+        self.queues = queues
+
+    def put(self, packet):
+        for q in self.queues:
+            q.put(packet)
+
+def transport_trial(transport, nz, nn, consumers, frames):
+    """Time sending frames to consumers, in frames per second."""
+    shapes = frame_shapes(nz, nn)
+    packet = { name:np.random.randn(*shape) for name, shape in shapes.items() }
+    manager = None
+    if transport == "manager":
+        manager = mm.SyncManager()
+        manager.start()
+        queues = [ manager.Queue() for i in range(consumers) ]
+        producer, readers = ManagerFanOut(queues), queues
+    elif transport == "pipe":
+        queues = [ DirectQueue() for i in range(consumers) ]
+        producer, readers = FanOut(queues), queues
+    elif transport == "shared":
+        queues = [ DirectQueue() for i in range(consumers) ]
+        producer = SharedPacketRing(shapes, queues, slots=8)
+        readers = [ producer.consumer(i) for i in range(consumers) ]
+
+    processes = [ mp.Process(target=consume, args=(reader, frames)) for reader in readers ]
+    for process in processes:
+        process.start()
+    start = time.time()
+    for i in range(frames):
+        producer.put(packet)
+    for process in processes:
+        process.join()
+    fps = frames / (time.time() - start)
+
+    if transport == "shared":
+        producer.close()
+    if manager is not None:
+        manager.shutdown()
+    return fps
+
+if __name__ == '__main__':
+
+    nz, nn = 100, 50
+    frames = 500
+    transports = ["manager", "pipe", "shared"]
+    consumer_counts = [1, 2]
+
+    results = {}
+    for transport in transports:
+        for consumers in consumer_counts:
+            print("Trying {:s} with {:d} consumers".format(transport, consumers))
+            results[transport, consumers] = transport_trial(transport, nz, nn, consumers, frames)
+            print("{:>10s} x{:d}: {:8.1f} frames/s".format(transport, consumers, results[transport, consumers]))
+
+    print("Plotting Timing Results")
+    plotname = os.path.join(os.path.dirname(__file__),"transport.pdf")
+    position = np.arange(len(transports))
+    for i, consumers in enumerate(consumer_counts):
+        plt.bar(position + 0.4 * i, [ results[transport, consumers] for transport in transports ], width=0.4, color='bg'[i], label="{:d} consumers".format(consumers))
+    plt.xticks(position + 0.4, transports)
+    plt.ylabel(r"Frames per second")
+    plt.title(r"Packet Transport, ${:d} \times {:d}$ modes".format(nz, nn))
+    plt.legend(loc="upper left")
+    plt.savefig(plotname)
+